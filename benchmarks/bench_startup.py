@@ -0,0 +1,157 @@
+"""
+Startup benchmark of the console scripts.
+
+Imports the module behind each console script of setup.py in a fresh
+interpreter with `python -X importtime`, and reports the median wall time of
+the process, the time spent importing the module and its slowest direct
+imports. Run it on two checkouts to compare them:
+
+    python benchmarks/bench_startup.py --repeat 10
+
+With --check it exits with a non-zero status when a script imports one of its
+LAZY_IMPORTS at startup or takes longer than its STARTUP_BUDGET to import,
+so CI can catch startup regressions:
+
+    python benchmarks/bench_startup.py --check
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules a console script must not import at startup, because only some of its
+# commands need them (checked with --check)
+LAZY_IMPORTS = {
+    'ttnn-trace-viewer': ('pandas', 'numpy', 'googleapiclient', 'google_auth_oauthlib'),
+    'ttnn-store': ('multiprocessing', 'pandas', 'numpy', 'googleapiclient'),
+    'ttnn-to-csv': ('multiprocessing', 'pandas', 'numpy', 'googleapiclient'),
+    'ttnn-to-sheets': ('pandas', 'numpy', 'googleapiclient', 'google_auth_oauthlib'),
+    'ttnn-db-audit': ('multiprocessing', 'pandas', 'numpy', 'googleapiclient'),
+    'ttnn-db-sweep': ('multiprocessing', 'pandas', 'numpy', 'googleapiclient'),
+}
+
+# Median time to import a console script's module that --check allows, as a
+# multiple of the interpreter startup measured in the same run, so a budget
+# means the same on fast and slow machines. The budgets leave room for noise;
+# the lazy imports above are the precise check.
+STARTUP_BUDGET = {
+    'ttnn-trace-viewer': 25,
+    'ttnn-store': 8,
+    'ttnn-to-csv': 4,
+    'ttnn-to-sheets': 4,
+    'ttnn-db-audit': 8,
+    'ttnn-db-sweep': 8,
+}
+
+# Environment variable naming the database the tools open (trace_db.DB_PATH_ENV)
+DB_PATH_ENV = 'TTNN_TRACE_DB'
+
+_ENTRY_POINT = re.compile(r'"([\w-]+)=(\w+):main"')
+_IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$')
+
+def console_scripts():
+    """(script, module) pairs of the console scripts declared in setup.py."""
+    with open(os.path.join(ROOT, 'setup.py'), encoding='utf-8') as f:
+        return _ENTRY_POINT.findall(f.read())
+
+def measure(module, workdir):
+    """
+    Import `module` in a fresh interpreter, run in `workdir` with its database
+    there, so nothing an import creates lands in the checkout. Returns the wall
+    time of the process in seconds and {name: (depth, self us, cumulative us)}
+    of the imports made by importing the module (depth 0 is the module itself),
+    or raises RuntimeError with the last line of the error if the import fails.
+    """
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [ROOT, env.get('PYTHONPATH')]))
+    env[DB_PATH_ENV] = os.path.join(workdir, 'traces.db')
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=workdir, env=env, capture_output=True, text=True
+    )
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    # Imports are reported after the imports they make, so the module's tree is
+    # made of the lines between its own and the previous top-level import
+    imports = {}
+    for line in result.stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        if not indent and name != module:
+            imports = {}
+            continue
+        imports[name] = (len(indent) // 2, int(self_us), int(cumulative_us))
+        if name == module:
+            break
+    return wall, imports
+
+def lazy_violations(script, imports):
+    """The LAZY_IMPORTS of `script` found among its imports."""
+    return [
+        lazy for lazy in LAZY_IMPORTS.get(script, ())
+        if any(name == lazy or name.startswith(lazy + '.') for name in imports)
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the startup of the console scripts')
+    parser.add_argument('--repeat', type=int, default=5, help='Interpreters started per script')
+    parser.add_argument('--top', type=int, default=5, help='Slowest direct imports shown per script')
+    parser.add_argument('--check', action='store_true',
+                        help='Exit with status 1 if a script breaks its lazy imports or startup budget')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='bench_startup_') as workdir:
+        failures = run(args, workdir)
+    if args.check:
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        sys.exit(1 if failures else 0)
+
+def run(args, workdir):
+    """Report the startup of every console script; returns the --check failures."""
+    baseline = statistics.median(measure('sys', workdir)[0] for _ in range(args.repeat))
+    print(f"Interpreter startup: {baseline * 1000:.1f} ms")
+
+    failures = []
+    for script, module in console_scripts():
+        try:
+            # The first run also compiles bytecode; it is not timed
+            measure(module, workdir)
+            runs = [measure(module, workdir) for _ in range(args.repeat)]
+        except RuntimeError as e:
+            print(f"{script} ({module}): skipped, {e}")
+            continue
+        wall = statistics.median(run[0] for run in runs)
+        import_ms = statistics.median(run[1][module][2] for run in runs) / 1000
+        print(f"{script} ({module}): {wall * 1000:.1f} ms wall, {import_ms:.1f} ms importing {module}")
+
+        imports = runs[0][1]
+        direct = sorted(
+            ((cumulative, name) for name, (depth, _, cumulative) in imports.items() if depth == 1),
+            reverse=True
+        )
+        for cumulative, name in direct[:args.top]:
+            print(f"    {name:<32} {cumulative / 1000:6.1f} ms")
+
+        for lazy in lazy_violations(script, imports):
+            failures.append(f"{script} imports {lazy} at startup")
+        budget = STARTUP_BUDGET.get(script)
+        if budget is not None and import_ms > budget * baseline * 1000:
+            failures.append(
+                f"{script} takes {import_ms:.1f} ms to import {module}, over its budget of "
+                f"{budget}x the interpreter startup ({budget * baseline * 1000:.1f} ms)"
+            )
+    return failures
+
+if __name__ == '__main__':
+    main()
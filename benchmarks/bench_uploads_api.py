@@ -0,0 +1,61 @@
+"""
+Micro-benchmark of the /api/uploads handler.
+
+Builds a throwaway database with a number of uploads and traces, then times
+GET /api/uploads (by upload) and GET /api/uploads?mode=consolidated through
+Flask's test client. Run it on two checkouts to compare them:
+
+    python benchmarks/bench_uploads_api.py --uploads 20 --traces 40 --repeat 50
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def build_database(db, uploads, traces, rows):
+    from store_traces import SimpleDF
+    headers = ['operation', 'arg0', 'arg1', 'arg2']
+    for u in range(uploads):
+        upload_id = db.create_upload(f"run {u}")
+        for t in range(traces):
+            data = [
+                [f"ttnn.op_{t}", f"Tensor[1, 32, {32 * (r + 1)}]", str(u * r), 'BFLOAT16']
+                for r in range(rows)
+            ]
+            db.add_trace(upload_id, f"ttnn.op_{t}.csv", f"ttnn.op_{t}", SimpleDF(headers, data))
+
+def time_request(client, url, repeat):
+    response = client.get(url)
+    assert response.status_code == 200, response.status_code
+    start = time.perf_counter()
+    for _ in range(repeat):
+        client.get(url)
+    return (time.perf_counter() - start) / repeat
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the /api/uploads handler')
+    parser.add_argument('--uploads', type=int, default=20, help='Number of uploads')
+    parser.add_argument('--traces', type=int, default=40, help='Traces per upload')
+    parser.add_argument('--rows', type=int, default=20, help='Rows per trace')
+    parser.add_argument('--repeat', type=int, default=50, help='Requests timed per endpoint')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_uploads_')
+    # The viewer keeps uploaded files in the working directory
+    os.chdir(workdir)
+    sys.path.insert(0, ROOT)
+    import trace_viewer
+    trace_viewer.open_database(os.path.join(workdir, 'traces.db'))
+
+    build_database(trace_viewer.db, args.uploads, args.traces, args.rows)
+    client = trace_viewer.app.test_client()
+    print(f"{args.uploads} uploads x {args.traces} traces x {args.rows} rows in {workdir}")
+    for url in ('/api/uploads', '/api/uploads?mode=consolidated'):
+        elapsed = time_request(client, url, args.repeat)
+        print(f"GET {url}: {elapsed * 1000:.2f} ms/request")
+
+if __name__ == '__main__':
+    main()
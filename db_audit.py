@@ -0,0 +1,271 @@
+"""
+Index audit for TraceDB.
+
+Calls every TraceDB query method against a database, records the SQL each one
+runs through the connections' trace callback, and prints the EXPLAIN QUERY PLAN
+of every distinct statement. Full scans of a table are flagged, except for
+methods that list a whole table by design (see EXPECTED_SCANS) and scans of
+partial indexes, which only cover the rows their WHERE clause selects.
+
+    ttnn-db-audit                 # audit a generated sample database
+    ttnn-db-audit traces.db       # audit a copy of an existing database
+
+The exit status is 1 when an unexpected full scan is found.
+"""
+import argparse
+import io
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+from contextlib import redirect_stdout
+from trace_db import TraceDB, ConnectionPool
+from store_traces import SimpleDF
+
+# (method, table) pairs whose full scan is expected: these methods return or
+# aggregate every row of the table
+EXPECTED_SCANS = {
+    ('get_uploads', 'uploads'),
+    ('get_trace_summaries', 'uploads'),
+    ('get_trace_summaries', 'trace_summaries'),
+    ('get_all_traces', 'traces'),
+    ('get_traces', 'traces'),
+    ('get_all_parsers', 'parsers'),
+    # Sweeping the dictionary reads every stored row and string
+    ('sweep_unused_values', 'trace_rows'),
+    ('sweep_unused_values', 'parser_outputs'),
+    ('sweep_unused_values', 'tensor_values'),
+    ('sweep_unused_values', 'cell_values'),
+    # Filters read the whole string dictionary only when it holds no more strings
+    # than the rows being filtered (see trace_db._filter_scope)
+    ('get_values_page', 'cell_values'),
+    ('get_deduplicated_values_page_by_filename', 'cell_values'),
+}
+
+# Statements that have no query plan worth auditing
+_SKIPPED = re.compile(r'^\s*(BEGIN|COMMIT|ROLLBACK|SAVEPOINT|RELEASE|PRAGMA|VACUUM|CREATE|DROP|ALTER)\b', re.I)
+# Temporary tables, created and dropped on the EXPLAIN connection as well so
+# the statements using them can be explained
+_TEMP_TABLE = re.compile(r'^\s*(CREATE\s+TEMP(ORARY)?\s+TABLE|DROP\s+TABLE\s+temp\.)', re.I)
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b-?\d+(?:\.\d+)?\b")
+_SCAN = re.compile(r'^SCAN (\w+)(?! VIRTUAL TABLE)(?: USING (?:COVERING )?INDEX (\w+))?')
+_SUBQUERY = re.compile(r'^(?:CO-ROUTINE|MATERIALIZE) (\w+)')
+
+class RecordingPool(ConnectionPool):
+    """Connection pool that records every statement its connections run."""
+    def __init__(self, db_path, statements):
+        super().__init__(db_path)
+        self.statements = statements
+
+    def _open(self):
+        conn = super()._open()
+        conn.set_trace_callback(self.statements.append)
+        return conn
+
+def build_sample_database(db_path, uploads=3, traces=4, rows=200):
+    """Create a database with a few uploads of overlapping traces to audit."""
+    with redirect_stdout(io.StringIO()):
+        db = TraceDB(db_path)
+    columns = ['operation', 'arg0', 'arg1', 'arg2']
+    for u in range(uploads):
+        upload_id = db.create_upload(f"sample {u}")
+        with db.bulk_load(upload_id) as loader:
+            for t in range(traces):
+                loader.add_trace(f"ttnn.op_{t}.csv", f"ttnn.op_{t}", columns, (
+                    [f"ttnn::op_{t}", f"Tensor[1, 32, {32 * (r % 7 + 1)}|BFLOAT16]", str(u * r), f"{u}.{t}.{r}"]
+                    for r in range(rows)
+                ))
+        db.set_upload_content_hash(upload_id, f"{u:064x}")
+
+def audit_calls(db):
+    """
+    (method, call) pairs that together run every query of TraceDB, using the
+    newest upload and its first trace as arguments.
+    """
+    upload_id = db.get_uploads()[0][0]
+    trace_id, filename = next(
+        (trace[0], trace[1]) for trace in db.get_traces_for_upload(upload_id) if trace[3] is None
+    )
+    columns = db.get_columns(trace_id)
+    sort, filtered = columns[-1], columns[0]
+    filters = {filtered: 'shape[-1] >= 32 OR /op/i'}
+    # Checks on the tensors of the second column, looked up in tensor_values
+    tensor_filters = {columns[1]: 'dtype = BFLOAT16 AND numel > 1024'}
+
+    def new_upload():
+        new_id = db.create_upload('audit')
+        db.add_trace(new_id, filename, 'audit', SimpleDF(columns, [['audit'] * len(columns)]))
+        return new_id
+
+    def parsers():
+        parser_id = db.create_parser('audit parser', 'return value;')
+        db.get_parser(parser_id)
+        db.get_parser_by_name('audit parser')
+        db.update_parser(parser_id, 'audit parser', 'return value + 1;')
+        db.delete_parser(parser_id)
+
+    # Pages sorted and filtered on a column derived by the auditShape parser,
+    # created and deleted around them
+    derived_column = f'auditShape({sort})'
+    derived_filters = {derived_column: '1x32'}
+
+    def jobs():
+        db.create_job('audit-job', 'audit', 'audit.json', 'audit-client')
+        db.update_job('audit-job', phase='storing', percent=50.0)
+        db.get_job('audit-job')
+
+    return [
+        ('get_uploads', db.get_uploads),
+        ('get_upload', lambda: db.get_upload(upload_id)),
+        ('get_upload_by_content_hash', lambda: db.get_upload_by_content_hash('0' * 64)),
+        ('get_trace_summaries', db.get_trace_summaries),
+        ('get_traces_for_upload', lambda: db.get_traces_for_upload(upload_id)),
+        ('get_all_traces', db.get_all_traces),
+        ('get_traces', lambda: db.get_traces(upload_id)),
+        ('get_trace_by_id', lambda: db.get_trace_by_id(trace_id)),
+        ('get_traces_by_filename', lambda: db.get_traces_by_filename(filename)),
+        ('get_columns', lambda: db.get_columns(trace_id)),
+        ('get_trace_values', lambda: db.get_trace_values(trace_id)),
+        ('get_values', lambda: db.get_values(trace_id)),
+        ('get_values_page', lambda: db.get_values_page(trace_id, 10, 20, sort=sort, filters=filters)),
+        ('get_values_page', lambda: db.get_values_page(trace_id, 0, 20, filters=tensor_filters)),
+        ('iter_values', lambda: list(db.iter_values(trace_id, columns=columns[:2]))),
+        ('get_deduplicated_values_page_by_filename', lambda: db.get_deduplicated_values_page_by_filename(
+            filename, 10, 20, sort=sort, order='desc', filters=filters
+        )),
+        ('get_deduplicated_values_page_by_filename', lambda: db.get_deduplicated_values_page_by_filename(
+            filename, 0, 20
+        )),
+        ('get_deduplicated_values_page_by_filename', lambda: db.get_deduplicated_values_page_by_filename(
+            filename, 0, 20, filters=tensor_filters
+        )),
+        ('iter_deduplicated_values_by_filename', lambda: list(db.iter_deduplicated_values_by_filename(filename))),
+        ('get_all_parsers', db.get_all_parsers),
+        ('parsers', parsers),
+        ('create_parser', lambda: db.create_parser('auditShape', 'return value;', 'shape | join("x")')),
+        ('get_values_page', lambda: db.get_values_page(
+            trace_id, 10, 20, sort=derived_column, filters=derived_filters, derived=[derived_column]
+        )),
+        ('get_deduplicated_values_page_by_filename', lambda: db.get_deduplicated_values_page_by_filename(
+            filename, 0, 20, sort=derived_column, filters=derived_filters, derived=[derived_column]
+        )),
+        ('delete_parser', lambda: db.delete_parser(db.get_parser_by_name('auditShape')[0])),
+        ('jobs', jobs),
+        ('get_active_jobs', lambda: db.get_active_jobs('audit-client')),
+        ('add_trace', new_upload),
+        ('rename_upload', lambda: db.rename_upload(upload_id, 'audit')),
+        ('delete_upload', lambda: db.delete_upload(upload_id)),
+        ('sweep_unused_values', db.sweep_unused_values),
+    ]
+
+def normalize(sql):
+    """Statement text with literals replaced by ?, to group repeated statements."""
+    return ' '.join(_LITERAL.sub('?', sql).split())
+
+def full_scans(plan, partial_indexes=()):
+    """
+    Names scanned in full by a query plan (tables or their aliases), with the index
+    used if any. Scans of the indexes in `partial_indexes` are not counted.
+    """
+    subqueries = {match.group(1) for _, _, _, detail in plan for match in [_SUBQUERY.match(detail)] if match}
+    scans = []
+    for _, _, _, detail in plan:
+        match = _SCAN.match(detail)
+        if (match and match.group(1) not in subqueries and match.group(2) not in partial_indexes
+                and detail != 'SCAN CONSTANT ROW'):
+            scans.append((match.group(1), match.group(2)))
+    return scans
+
+def table_of(name, sql, tables):
+    """Resolve a table alias used in `sql` to its table name."""
+    if name in tables:
+        return name
+    for match in re.finditer(rf'\b(\w+)\s+(?:AS\s+)?{name}\b', sql, re.I):
+        if match.group(1) in tables:
+            return match.group(1)
+    return name
+
+def format_plan(plan):
+    depth = {0: -1}
+    lines = []
+    for node, parent, _, detail in plan:
+        depth[node] = depth.get(parent, -1) + 1
+        lines.append('    ' + '  ' * depth[node] + detail)
+    return lines
+
+def audit(db_path):
+    """
+    Run the audit against db_path (modified by the write methods) and print the report.
+    Returns the number of unexpected full scans.
+    """
+    statements = []
+    with redirect_stdout(io.StringIO()):
+        db = TraceDB(db_path)
+    db.pool = RecordingPool(db_path, statements)
+    explain = ConnectionPool(db_path)._open()
+    tables = {name for (name,) in explain.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    partial_indexes = {name for (name,) in explain.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND sql LIKE '% WHERE %'"
+    )}
+
+    unexpected = 0
+    for method, call in audit_calls(db):
+        del statements[:]
+        with redirect_stdout(io.StringIO()):
+            call()
+        seen = set()
+        for sql in statements:
+            key = normalize(sql)
+            if _TEMP_TABLE.match(sql):
+                explain.execute(sql)
+            if _SKIPPED.match(sql) or key in seen:
+                continue
+            seen.add(key)
+            plan = explain.execute('EXPLAIN QUERY PLAN ' + sql).fetchall()
+            flags = []
+            for name, index in full_scans(plan, partial_indexes):
+                table = table_of(name, sql, tables)
+                expected = (method, table) in EXPECTED_SCANS
+                unexpected += not expected
+                how = f" using {index}" if index else ''
+                flags.append(f"{'expected ' if expected else ''}full scan of {table}{how}")
+            print(f"{method}: {key[:160]}{'...' if len(key) > 160 else ''}")
+            print('\n'.join(format_plan(plan)))
+            for flag in flags:
+                print(f"  !! {flag}" if not flag.startswith('expected') else f"  -- {flag}")
+        print()
+    explain.close()
+    print(f"{unexpected} unexpected full scan(s)")
+    return unexpected
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Print the query plans of TraceDB queries and flag full table scans'
+    )
+    parser.add_argument('database', nargs='?',
+                        help='Database to audit (a copy is used); a sample database is generated if omitted')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='ttnn_db_audit_')
+    try:
+        db_path = os.path.join(workdir, 'audit.db')
+        if args.database:
+            if not os.path.exists(args.database):
+                parser.error(f"Database not found: {args.database}")
+            # Copy through the backup API so WAL contents are included
+            source = sqlite3.connect(args.database)
+            target = sqlite3.connect(db_path)
+            source.backup(target)
+            source.close()
+            target.close()
+        else:
+            build_sample_database(db_path)
+        unexpected = audit(db_path)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    sys.exit(1 if unexpected else 0)
+
+if __name__ == '__main__':
+    main()
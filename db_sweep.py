@@ -0,0 +1,35 @@
+"""
+Dictionary sweep for TraceDB.
+
+Deleting an upload leaves behind the cell strings only its rows used, with
+their tensor attributes and parser outputs. This deletes them, reading every
+stored row once, so it is meant to run after uploads are deleted (for example
+after the nightly upload that replaces the oldest one) rather than on every
+deletion. The database may be in use by the viewer meanwhile; writers wait
+for the sweep to finish.
+
+    ttnn-db-sweep                 # sweep the default database (TTNN_TRACE_DB or traces.db)
+    ttnn-db-sweep traces.db       # sweep a given database
+"""
+import argparse
+import os
+import time
+from trace_db import TraceDB
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Delete the cell strings no upload uses any more from a trace database'
+    )
+    parser.add_argument('database', nargs='?',
+                        help='Database to sweep; the default database is used if omitted')
+    args = parser.parse_args()
+
+    if args.database and not os.path.exists(args.database):
+        parser.error(f"Database not found: {args.database}")
+    db = TraceDB(args.database)
+    started = time.monotonic()
+    deleted = db.sweep_unused_values()
+    print(f"Deleted {deleted} unused cell strings from {db.db_path} in {time.monotonic() - started:.1f} s")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""
+Background ingest jobs for uploaded trace files.
+
+Uploads are stored by a small thread pool instead of the request thread.
+Job progress is written to the ingest_jobs table, so any server process
+sharing the database can report on a job, not only the one running it.
+"""
+import json
+import os
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from store_traces import ingest_json_file
+
+# Minimum number of seconds between two progress writes for the same phase
+PROGRESS_WRITE_INTERVAL = 0.5
+
+# Jobs that have not reported progress for this long are treated as lost
+# (for example because the server process running them was restarted)
+STALE_JOB_SECONDS = 600
+
+FINISHED_PHASES = ('done', 'failed')
+
+class JobProgress:
+    """Progress callback for ingest_json_file that records progress on a job."""
+    def __init__(self, db, job_id):
+        self.db = db
+        self.job_id = job_id
+        self.phase = None
+        self.phase_started = None
+        self.last_write = 0.0
+        self.rows_stored = 0
+
+    def __call__(self, phase, done, total):
+        now = time.monotonic()
+        if phase != self.phase:
+            self.phase = phase
+            self.phase_started = now
+        elif now - self.last_write < PROGRESS_WRITE_INTERVAL and done < total:
+            return
+        self.last_write = now
+        if phase == 'reused':
+            # Nothing is parsed or stored, so there is no throughput to report
+            self.db.update_job(self.job_id, phase=phase, percent=100.0)
+            return
+
+        percent = 100.0 * done / total if total else 100.0
+        elapsed = now - self.phase_started
+        rate = done / elapsed if elapsed > 0 else 0.0
+        if phase == 'storing':
+            self.rows_stored = done
+            throughput, unit = rate, 'rows/s'
+        else:
+            throughput, unit = rate / (1024 * 1024), 'MB/s'
+
+        self.db.update_job(
+            self.job_id,
+            phase=phase,
+            percent=round(percent, 1),
+            rows_stored=self.rows_stored,
+            throughput=round(throughput, 1),
+            throughput_unit=unit
+        )
+
+class IngestJobQueue:
+    """Runs JSON ingests on a thread pool and tracks them in the database."""
+    def __init__(self, db, max_workers=1):
+        self.db = db
+        # A single worker by default: SQLite serializes writers anyway
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ingest')
+
+    def submit(self, file_path, upload_name, client=None, fingerprint=None):
+        """
+        Queue a saved JSON file for ingest and return the job id.
+        `fingerprint` is the file's SHA-256 hex digest, if already known.
+        The file is removed once the job has finished, whether or not it succeeded.
+        """
+        job_id = uuid.uuid4().hex
+        self.db.create_job(job_id, upload_name, os.path.basename(file_path), client)
+        self.executor.submit(self._run, job_id, file_path, upload_name, fingerprint)
+        return job_id
+
+    def _run(self, job_id, file_path, upload_name, fingerprint):
+        progress = JobProgress(self.db, job_id)
+        try:
+            upload_id = ingest_json_file(
+                file_path, upload_name, progress=progress, fingerprint=fingerprint, db=self.db
+            )
+            self.db.update_job(
+                job_id,
+                phase='done',
+                percent=100.0,
+                upload_id=upload_id,
+                reused=int(progress.phase == 'reused'),
+                finished_at=datetime.now().isoformat()
+            )
+        except Exception as e:
+            if isinstance(e, json.JSONDecodeError):
+                error = f"Invalid JSON format: {str(e)}"
+            else:
+                error = str(e)
+            print(f"Ingest job {job_id} failed: {error}")
+            traceback.print_exc()
+            self.db.update_job(job_id, phase='failed', error=error, finished_at=datetime.now().isoformat())
+        finally:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+def job_status(job, db):
+    """
+    Build the API representation of a job row, marking lost jobs as failed.
+    Jobs that reused an earlier upload name it in reused_upload_name, and
+    report no throughput.
+    """
+    status = dict(job)
+    status.pop('client', None)
+    if status['reused'] or status['phase'] == 'reused':
+        status.pop('throughput', None)
+        status.pop('throughput_unit', None)
+    if status['reused']:
+        upload = db.get_upload(status['upload_id'])
+        status['reused_upload_name'] = upload[1] if upload else None
+    if status['phase'] not in FINISHED_PHASES:
+        updated_at = datetime.fromisoformat(status['updated_at'])
+        if (datetime.now() - updated_at).total_seconds() > STALE_JOB_SECONDS:
+            status['phase'] = 'failed'
+            status['error'] = 'The job stopped reporting progress'
+    status['finished'] = status['phase'] in FINISHED_PHASES
+    return status
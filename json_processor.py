@@ -2,40 +2,83 @@
 import json
 import sys
 import os
-import tempfile
 from raw_trace_to_op_trace import GraphTracerUtils
-from ttnn_capture_to_csv import json_to_csv
+from ttnn_capture_to_csv import operations_to_csv
+from json_stream import iter_json_items, sniff_json_format
 
-def is_raw_json(data):
+def is_raw_json_file(input_file):
     """
-    Determine if a loaded JSON structure is a raw graph format that needs processing.
+    Determine if a JSON file is in raw graph format without loading it.
+    Only the first few kilobytes of the file are inspected.
     
     Args:
-        data: Loaded JSON data
+        input_file: Path to the JSON file
     
     Returns:
         bool: True if the JSON is in raw format, False if already processed
     """
-    # Raw JSON has a list of nodes with "arguments" and "connections" keys
-    if isinstance(data, list) and len(data) > 0:
-        first_item = data[0]
-        if isinstance(first_item, dict) and "arguments" in first_item and "connections" in first_item:
-            return True
-    
-    # Processed JSON has a "content" key with a list of operations
-    if isinstance(data, dict) and "content" in data and isinstance(data["content"], list):
-        return False
-    
-    # If format is unknown, check deeper for raw format clues
-    if isinstance(data, list) and len(data) > 0:
-        for item in data:
-            if isinstance(item, dict) and "params" in item and "arguments" in item:
-                return True
-    
-    # Default to assuming it needs processing
-    return True
+    return sniff_json_format(input_file) == 'raw'
 
-def process_json(input_file, output_file=None, is_csv=False, group_by=False, no_duplicates=False):
+# Number of operations between two progress callbacks in iter_operations
+PROGRESS_INTERVAL = 256
+
+def iter_operations(input_file, jobs=1, progress=None):
+    """
+    Stream processed operations from a raw or processed JSON file.
+    
+    Raw graph nodes are serialized one at a time as they are read, so memory
+    use does not grow with the size of the file.
+    
+    Args:
+        input_file: Path to input JSON file
+        jobs: Number of worker processes for raw graph serialization (0 = one per CPU)
+        progress: Optional callable(bytes_read, total_bytes, operations) called every
+            PROGRESS_INTERVAL operations and once more when the file is exhausted
+    
+    Returns:
+        Iterator of processed operations ({"operation": ..., "arguments": [...]})
+    """
+    raw_format = is_raw_json_file(input_file)
+    if raw_format:
+        print("Detected raw JSON format, processing with GraphTracerUtils.serialize_nodes")
+    else:
+        print("Detected already processed JSON format, using as is")
+    
+    return _iter_file_operations(input_file, raw_format, jobs, progress)
+
+def _iter_file_operations(input_file, raw_format, jobs, progress=None):
+    total_bytes = os.path.getsize(input_file)
+    with open(input_file, 'r', encoding='utf-8') as f:
+        items = iter_json_items(f)
+        if raw_format:
+            items = GraphTracerUtils.serialize_nodes(items, jobs=jobs)
+        count = 0
+        for operation in items:
+            # Nodes without an operation name serialize to None
+            if operation is not None:
+                count += 1
+                if progress is not None and count % PROGRESS_INTERVAL == 0:
+                    # The binary buffer position tracks how far the reader got
+                    progress(f.buffer.tell(), total_bytes, count)
+                yield operation
+        if progress is not None:
+            progress(total_bytes, total_bytes, count)
+
+def write_processed_json(operations, output_file):
+    """
+    Write streamed operations as a processed JSON document.
+    The output matches json.dump({"content": [...]}, f, indent=4).
+    """
+    with open(output_file, 'w') as f:
+        f.write('{\n    "content": [')
+        first = True
+        for operation in operations:
+            f.write('\n' if first else ',\n')
+            first = False
+            f.write('        ' + json.dumps(operation, indent=4).replace('\n', '\n        '))
+        f.write(']\n}' if first else '\n    ]\n}')
+
+def process_json(input_file, output_file=None, is_csv=False, group_by=False, no_duplicates=False, jobs=1):
     """
     Universal processor for both raw and processed JSON files.
     
@@ -45,22 +88,14 @@ def process_json(input_file, output_file=None, is_csv=False, group_by=False, no_
         is_csv: If True, output should be CSV format
         group_by: Group operations by name (CSV only)
         no_duplicates: Remove duplicate entries (CSV only)
+        jobs: Number of worker processes for raw graph serialization (0 = one per CPU)
         
     Returns:
         The path to the processed output file or output directory if group_by is True
     """
-    # Read and load the JSON
+    # Stream the JSON, processing it if needed
     print(f"Reading input file: {input_file}")
-    with open(input_file, 'r') as f:
-        data = json.load(f)
-    
-    # Determine JSON format and process if needed
-    if is_raw_json(data):
-        print("Detected raw JSON format, processing with GraphTracerUtils.serialize_graph")
-        processed_data = GraphTracerUtils.serialize_graph(data)
-    else:
-        print("Detected already processed JSON format, using as is")
-        processed_data = data
+    operations = iter_operations(input_file, jobs)
     
     # Determine output path
     if not output_file:
@@ -85,25 +120,15 @@ def process_json(input_file, output_file=None, is_csv=False, group_by=False, no_
     
     # If CSV output is requested
     if is_csv:
-        # Create a temporary JSON file with the processed data
-        temp_fd, temp_json = tempfile.mkstemp(suffix='.json')
-        with os.fdopen(temp_fd, 'w') as f:
-            json.dump(processed_data, f)
-        
-        try:
-            # Convert to CSV using existing function
-            print(f"Converting to CSV: {output_file}"
-                  f"{' (grouped by operation)' if group_by else ''}"
-                  f"{' (removing duplicates)' if no_duplicates else ''}")
-            json_to_csv(temp_json, output_file, group_by, no_duplicates)
-        finally:
-            # Clean up temporary file
-            os.unlink(temp_json)
+        # Convert the streamed operations straight to CSV
+        print(f"Converting to CSV: {output_file}"
+              f"{' (grouped by operation)' if group_by else ''}"
+              f"{' (removing duplicates)' if no_duplicates else ''}")
+        operations_to_csv(operations, output_file, group_by, no_duplicates)
     else:
         # Write processed JSON
         print(f"Writing processed JSON to: {output_file}")
-        with open(output_file, 'w') as f:
-            json.dump(processed_data, f, indent=4)
+        write_processed_json(operations, output_file)
     
     print("Processing complete!")
     return output_file
@@ -111,7 +136,7 @@ def process_json(input_file, output_file=None, is_csv=False, group_by=False, no_
 def print_usage():
     """Print usage information."""
     print("Usage:")
-    print("  python json_processor.py input.json [output_file] [--csv] [--group] [--no-duplicates]")
+    print("  python json_processor.py input.json [output_file] [--csv] [--group] [--no-duplicates] [--jobs N]")
     print("")
     print("Arguments:")
     print("  input.json      - Input JSON file (raw or processed format)")
@@ -119,6 +144,7 @@ def print_usage():
     print("  --csv           - Output in CSV format instead of JSON")
     print("  --group         - Group operations by name (CSV only)")
     print("  --no-duplicates - Remove duplicate entries (CSV only)")
+    print("  --jobs N        - Serialize raw graphs with N worker processes (0 = one per CPU)")
     print("")
     print("Example:")
     print("  python json_processor.py input.json output.csv --csv --group")
@@ -144,8 +170,12 @@ if __name__ == "__main__":
     is_csv = False
     group_by = False
     no_duplicates = False
+    jobs = 1
     
-    for i, arg in enumerate(sys.argv[2:], 2):
+    args = sys.argv[2:]
+    i = 0
+    while i < len(args):
+        arg = args[i]
         if arg.startswith('--'):
             if arg == '--csv':
                 is_csv = True
@@ -153,7 +183,20 @@ if __name__ == "__main__":
                 group_by = True
             elif arg == '--no-duplicates':
                 no_duplicates = True
-        elif i == 2:  # First non-flag argument is the output file
+            elif arg == '--jobs' or arg.startswith('--jobs='):
+                if '=' in arg:
+                    value = arg.split('=', 1)[1]
+                elif i + 1 < len(args):
+                    i += 1
+                    value = args[i]
+                else:
+                    value = ''
+                if not value.isdigit():
+                    print("Error: --jobs expects a non-negative integer")
+                    sys.exit(1)
+                jobs = int(value)
+        elif i == 0:  # First non-flag argument is the output file
             output_file = arg
+        i += 1
     
-    process_json(input_file, output_file, is_csv, group_by, no_duplicates) 
\ No newline at end of file
+    process_json(input_file, output_file, is_csv, group_by, no_duplicates, jobs)
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Incremental JSON reading for large trace captures.
+
+Raw TT-NN graph captures are a single top-level JSON array and processed
+captures are an object with a "content" array. Both can be several gigabytes,
+so instead of json.load this module decodes the items of that array one at a
+time from a buffered reader, keeping memory bounded by the largest item.
+"""
+import json
+import re
+
+# Bytes read per refill; grows while a single item does not fit
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+# Amount of the file inspected by sniff_json_format
+SNIFF_SIZE = 16 * 1024
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_CONTENT_ARRAY = re.compile(r'"content"\s*:\s*\[')
+_NUMBER_CHARS = '0123456789.eE+-'
+
+
+class JSONStreamReader:
+    """Decodes top-level JSON array items from a text file object incrementally."""
+
+    def __init__(self, f, chunk_size=DEFAULT_CHUNK_SIZE):
+        self._file = f
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self, size=None):
+        """Read more data into the buffer. Returns False at end of file."""
+        if self._eof:
+            return False
+        data = self._file.read(size or self._chunk_size)
+        if not data:
+            self._eof = True
+            return False
+        # Drop everything already consumed so the buffer stays small
+        self._buffer = self._buffer[self._pos:] + data
+        self._pos = 0
+        return True
+
+    def _error(self, message):
+        return json.JSONDecodeError(message, self._buffer, self._pos)
+
+    def peek(self):
+        """Return the next non-whitespace character without consuming it ('' at EOF)."""
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char):
+        """Consume the next non-whitespace character, which must be `char`."""
+        if self.peek() != char:
+            raise self._error(f"Expecting '{char}'")
+        self._pos += 1
+
+    def decode_value(self):
+        """Decode the next complete JSON value, reading more data as needed."""
+        self.peek()
+        read_size = self._chunk_size
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+                # A number cut by the buffer end may continue in the next chunk
+                if (self._eof or isinstance(value, (dict, list, str))
+                        or (end < len(self._buffer) and self._buffer[end] not in _NUMBER_CHARS)):
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            if not self._fill(read_size):
+                continue
+            # Items larger than a chunk get progressively larger reads
+            read_size *= 2
+
+    def iter_array(self):
+        """Yield the items of the JSON array starting at the current position."""
+        self.expect('[')
+        if self.peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield self.decode_value()
+            char = self.peek()
+            self._pos += 1
+            if char == ']':
+                return
+            if char != ',':
+                self._pos -= 1
+                raise self._error("Expecting ',' delimiter")
+
+    def iter_object_array(self, key):
+        """Yield the items of the array stored under `key` in the object at the current position."""
+        self.expect('{')
+        if self.peek() == '}':
+            self._pos += 1
+            return
+        while True:
+            name = self.decode_value()
+            if not isinstance(name, str):
+                raise self._error("Expecting property name")
+            self.expect(':')
+            if name == key and self.peek() == '[':
+                yield from self.iter_array()
+                return
+            # Skip values of other keys
+            self.decode_value()
+            char = self.peek()
+            self._pos += 1
+            if char == '}':
+                return
+            if char != ',':
+                self._pos -= 1
+                raise self._error("Expecting ',' delimiter")
+
+
+def iter_json_items(f, key='content', chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield the items of a trace JSON document one at a time.
+    
+    Args:
+        f: Text file object opened for reading
+        key: For a top-level object, the key holding the array to stream
+        chunk_size: Number of characters read per refill
+    
+    Yields:
+        Items of the top-level array, or of the array under `key` if the
+        document is an object. Nothing is yielded for other documents.
+    """
+    reader = JSONStreamReader(f, chunk_size)
+    char = reader.peek()
+    if char == '[':
+        yield from reader.iter_array()
+    elif char == '{':
+        yield from reader.iter_object_array(key)
+    elif char == '':
+        raise json.JSONDecodeError("Expecting value", '', 0)
+    else:
+        # Scalars have nothing to stream, but still validate them
+        reader.decode_value()
+
+
+def sniff_json_format(path, sample_size=SNIFF_SIZE):
+    """
+    Detect the format of a trace JSON file from its first few kilobytes.
+    
+    Args:
+        path: Path to the JSON file
+        sample_size: Number of characters to inspect
+    
+    Returns:
+        str: 'processed' for an object with a "content" array, otherwise 'raw'
+             (unrecognised documents are assumed to need processing)
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        sample = f.read(sample_size)
+    
+    stripped = sample.lstrip()
+    if stripped.startswith('{') and _CONTENT_ARRAY.search(stripped):
+        return 'processed'
+    return 'raw'
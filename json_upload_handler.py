@@ -1,8 +1,9 @@
 #!/usr/bin/env python3
 import os
-import tempfile
-from json_processor import process_json, is_raw_json
 import json
+import shutil
+import tempfile
+from json_processor import process_json, is_raw_json_file
 
 class UploadHandler:
     """
@@ -34,7 +35,7 @@ class UploadHandler:
                 with os.fdopen(temp_fd, 'wb') as f:
                     # Handle both string content and binary content
                     if hasattr(uploaded_file, 'read'):
-                        f.write(uploaded_file.read())
+                        shutil.copyfileobj(uploaded_file, f)
                     else:
                         f.write(uploaded_file)
             except Exception as e:
@@ -42,13 +43,8 @@ class UploadHandler:
                 return {"success": False, "error": f"Failed to save uploaded file: {str(e)}"}
         
         try:
-            # Determine file format
-            with open(input_path, 'r') as f:
-                try:
-                    data = json.load(f)
-                    raw_format = is_raw_json(data)
-                except json.JSONDecodeError as e:
-                    return {"success": False, "error": f"Invalid JSON format: {str(e)}"}
+            # Determine file format from the first few kilobytes
+            raw_format = is_raw_json_file(input_path)
             
             # Process based on format
             is_csv = (output_format.lower() == 'csv')
@@ -80,6 +76,9 @@ class UploadHandler:
                 "no_duplicates": no_duplicates
             }
         
+        except json.JSONDecodeError as e:
+            return {"success": False, "error": f"Invalid JSON format: {str(e)}"}
+        
         except Exception as e:
             return {"success": False, "error": f"Processing error: {str(e)}"}
         
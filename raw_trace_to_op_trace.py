@@ -2,8 +2,142 @@
 
 # SPDX-License-Identifier: Apache-2.0
 
+import os
 import re
 import json
+from collections import deque
+from functools import lru_cache
+from itertools import islice
+
+# Tokens of the TT-NN argument grammar: identifiers (optionally `::` qualified), JSON numbers,
+# brace-enclosed integer lists such as `{32, 32}`, runs of spaces, and any other single character
+_ARGUMENT_TOKEN = re.compile(
+    r"[A-Za-z_][A-Za-z0-9_]*(?:::[A-Za-z_][A-Za-z0-9_]*)*"
+    r"|-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][-+]?[0-9]+)?"
+    r"|\{ *[0-9]+(?: *, *[0-9]+)* *\}"
+    r"| +"
+    r"|.",
+    re.S,
+)
+
+# Characters that the regex conversion rewrites; strings without them are plain values
+_STRUCTURE_CHARS = re.compile(r'[:=(){}"\\~]')
+
+
+# Number of distinct (argument string, index) conversions kept by the serialization cache
+CONVERSION_CACHE_SIZE = 8192
+
+
+class _GrammarError(Exception):
+    """Raised when an argument string falls outside the grammar handled by the tokenizer."""
+
+
+def _tokenize_argument(input_str):
+    """Split an argument string into grammar tokens, dropping spaces that follow a comma."""
+    tokens = []
+    for token in _ARGUMENT_TOKEN.findall(input_str):
+        if token[0] == " ":
+            if not tokens or tokens[-1] != ",":
+                raise _GrammarError(input_str)
+            continue
+        tokens.append(token)
+    return tokens
+
+
+def _parse_number(token):
+    return float(token) if ("." in token or "e" in token or "E" in token) else int(token)
+
+
+def _parse_list(tokens, pos):
+    """Parse `[n, n, ...]` starting at tokens[pos] == '['. Returns (list, next position)."""
+    pos += 1
+    result = []
+    if tokens[pos] == "]":
+        return result, pos + 1
+    while True:
+        token = tokens[pos]
+        if not (token[0].isdigit() or (token[0] == "-" and len(token) > 1)):
+            raise _GrammarError(token)
+        result.append(_parse_number(token))
+        token = tokens[pos + 1]
+        pos += 2
+        if token == "]":
+            return result, pos
+        if token != ",":
+            raise _GrammarError(token)
+
+
+def _parse_body(tokens, pos):
+    """Parse the contents of `Name(...)` after the opening parenthesis. Returns (value, next position)."""
+    token = tokens[pos]
+    if token == ")":
+        return {}, pos + 1
+    if token == "[":
+        result, pos = _parse_list(tokens, pos)
+        if tokens[pos] != ")":
+            raise _GrammarError(tokens[pos])
+        return result, pos + 1
+
+    result = {}
+    while True:
+        key = tokens[pos]
+        if not (key[0].isalpha() or key[0] == "_") or "::" in key or tokens[pos + 1] != "=":
+            raise _GrammarError(key)
+        result[key], pos = _parse_value(tokens, pos + 2)
+        token = tokens[pos]
+        pos += 1
+        if token == ")":
+            return result, pos
+        if token != ",":
+            raise _GrammarError(token)
+
+
+def _parse_value(tokens, pos):
+    """Parse the value of a `key=value` pair. Returns (value, next position)."""
+    token = tokens[pos]
+    first = token[0]
+    if first.isalpha() or first == "_":
+        if tokens[pos + 1] == "(":
+            # Nested object: the type name is dropped, only its fields are kept
+            if "::" in token:
+                raise _GrammarError(token)
+            return _parse_body(tokens, pos + 2)
+        return token, pos + 1
+    if first.isdigit() or (first == "-" and len(token) > 1):
+        return _parse_number(token), pos + 1
+    if first == "[":
+        return _parse_list(tokens, pos)
+    if first == "{" and len(token) > 1:
+        # `{32, 32}` stays a string, exactly as written
+        return token, pos + 1
+    raise _GrammarError(token)
+
+
+def _parse_argument(input_str):
+    """
+    Parse an argument string in a single pass of the TT-NN argument grammar:
+
+        argument := Name '(' body ')' | plain text without structure characters
+        body     := <empty> | list | key '=' value (',' key '=' value)*
+        value    := Name '(' body ')' | identifier | number | list | '{' int (',' int)* '}'
+        list     := '[' (number (',' number)*)? ']'
+
+    Raises _GrammarError for anything else, so the caller can fall back to the regex conversion.
+    """
+    if not _STRUCTURE_CHARS.search(input_str):
+        return input_str
+
+    tokens = _tokenize_argument(input_str)
+    try:
+        name = tokens[0]
+        if not (name[0].isalpha() or name[0] == "_") or "::" in name or tokens[1] != "(":
+            raise _GrammarError(name)
+        body, pos = _parse_body(tokens, 2)
+    except IndexError:
+        raise _GrammarError(input_str)
+    if pos != len(tokens):
+        raise _GrammarError(input_str)
+    return {name: body}
 
 
 class GraphTracerUtils:
@@ -19,7 +153,19 @@ class GraphTracerUtils:
 
     @staticmethod
     def _convert_to_json(input_str, index):
-        """Converts TTNN graph output into a properly formatted JSON object."""
+        """Converts TTNN graph output into a properly formatted JSON object.
+
+        Arguments are parsed in one pass by the grammar tokenizer; strings outside that grammar
+        go through the original regex conversion so their output is unchanged.
+        """
+        try:
+            return {"arg" + str(index): _parse_argument(input_str)}
+        except _GrammarError:
+            return GraphTracerUtils._convert_to_json_regex(input_str, index)
+
+    @staticmethod
+    def _convert_to_json_regex(input_str, index):
+        """Converts TTNN graph output into a properly formatted JSON object using regex rewrites."""
         result = input_str
         # Remove '::' notation (for example, `TensorMemoryLayout::INTERLEAVED` → `TensorMemoryLayout~~~INTERLEAVED`)
         result = re.sub(r"::", "~~~", result)
@@ -81,6 +227,11 @@ class GraphTracerUtils:
         except json.JSONDecodeError as e:
             return {"UnparsedElement": {"error": e, "element_info": result}}
 
+    @staticmethod
+    def _convert_to_json_cached(input_str, index):
+        """Converts an argument through the bounded LRU cache, returning a copy the caller may mutate."""
+        return _copy_json(_cached_conversion(input_str, index))
+
     @staticmethod
     def serialize_arguments_to_json(operation_name, arguments):
         """Serialize the arguments of an operation into json"""
@@ -90,22 +241,156 @@ class GraphTracerUtils:
 
         i = 0
         for argument in arguments:
-            json_obj = GraphTracerUtils._convert_to_json(argument, i)
+            json_obj = GraphTracerUtils._convert_to_json_cached(argument, i)
             serialized_list.append(json_obj)
             i = i + 1
         return {"operation": operation_name, "arguments": serialized_list}
 
+    @staticmethod
+    def serialize_nodes(nodes, jobs=1, batch_size=256):
+        """Serialize graph nodes one at a time, yielding an operation for each node with arguments
+
+        With jobs > 1 (or jobs=0 for one per CPU) nodes are serialized in batches across a process
+        pool. Results are yielded in node order and only a few batches are in flight at a time.
+        """
+        if jobs == 0:
+            jobs = os.cpu_count() or 1
+        if jobs <= 1:
+            start = _cached_conversion.cache_info()
+            for node in nodes:
+                arguments = node["arguments"]
+                if not arguments:
+                    continue
+
+                operation_name = node["params"].get("name", "")
+                yield GraphTracerUtils.serialize_arguments_to_json(operation_name, arguments)
+            end = _cached_conversion.cache_info()
+            _report_cache_stats(end.hits - start.hits, end.misses - start.misses)
+            return
+
+        # Imported here: multiprocessing adds noticeably to the startup of every
+        # command that reads captures, and most runs use a single process
+        from concurrent.futures import ProcessPoolExecutor
+
+        # Only ship what serialization needs to the workers
+        work = ((node["params"].get("name", ""), node["arguments"]) for node in nodes if node["arguments"])
+        hits = misses = 0
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            pending = deque()
+            while True:
+                while len(pending) < jobs * 2:
+                    batch = list(islice(work, batch_size))
+                    if not batch:
+                        break
+                    pending.append(executor.submit(GraphTracerUtils._serialize_batch, batch))
+                if not pending:
+                    break
+                operations, batch_hits, batch_misses = pending.popleft().result()
+                hits += batch_hits
+                misses += batch_misses
+                yield from operations
+        _report_cache_stats(hits, misses)
+
+    @staticmethod
+    def _serialize_batch(batch):
+        """Serialize a batch of (operation name, arguments) pairs in a worker process
+
+        Returns the operations together with the cache hits and misses of the worker's own cache.
+        """
+        start = _cached_conversion.cache_info()
+        operations = [
+            GraphTracerUtils.serialize_arguments_to_json(operation_name, arguments)
+            for operation_name, arguments in batch
+        ]
+        end = _cached_conversion.cache_info()
+        return operations, end.hits - start.hits, end.misses - start.misses
+
     @staticmethod
     def serialize_graph(captured_graph):
-        """Serialize the graph into a json document"""
-        json_result = {"content": []}
-        for node in captured_graph:
-            arguments = node["arguments"]
-            if not arguments:
-                continue
-
-            operation_name = node["params"].get("name", "")
-            operation = GraphTracerUtils.serialize_arguments_to_json(operation_name, arguments)
-            json_result["content"].append(operation)
-
-        return json_result
\ No newline at end of file
+        """Serialize the graph into a json document, reporting argument cache hits and misses"""
+        json_result = {"content": list(GraphTracerUtils.serialize_nodes(captured_graph))}
+        return json_result
+
+    @staticmethod
+    def verify_conversion(input_str, index):
+        """Differential check of one argument: returns (matches, used_tokenizer, tokenizer_result, regex_result)"""
+        try:
+            _parse_argument(input_str)
+            used_tokenizer = True
+        except _GrammarError:
+            used_tokenizer = False
+        converted = GraphTracerUtils._convert_to_json(input_str, index)
+        expected = GraphTracerUtils._convert_to_json_regex(input_str, index)
+        matches = _comparable(converted) == _comparable(expected)
+        return matches, used_tokenizer, converted, expected
+
+
+@lru_cache(maxsize=CONVERSION_CACHE_SIZE)
+def _cached_conversion(input_str, index):
+    """Memoized argument conversion; callers must copy the result before handing it out."""
+    return GraphTracerUtils._convert_to_json(input_str, index)
+
+
+def _copy_json(value):
+    """Copy the dicts and lists of a converted argument; leaf values are immutable and shared."""
+    if isinstance(value, dict):
+        return {key: _copy_json(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_copy_json(item) for item in value]
+    return value
+
+
+def _report_cache_stats(hits, misses):
+    """Print the argument conversion cache hits and misses of one serialization"""
+    total = hits + misses
+    if total:
+        print(f"Argument conversion cache: {hits} hits, {misses} misses ({hits / total:.1%} hit rate)")
+
+
+def _comparable(value):
+    """Normalize a conversion result for comparison (exceptions compare by message, numbers by type)."""
+    if isinstance(value, dict):
+        return {key: _comparable(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_comparable(item) for item in value]
+    if isinstance(value, Exception):
+        return (type(value).__name__, str(value))
+    return (type(value).__name__, value)
+
+
+def _verify_captures(paths, max_reports=10):
+    """Run the tokenizer and the regex conversion side by side over every argument of raw captures"""
+    from json_stream import iter_json_items
+
+    total = tokenized = mismatches = 0
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for node in iter_json_items(f):
+                for index, argument in enumerate(node.get("arguments", [])):
+                    matches, used_tokenizer, converted, expected = GraphTracerUtils.verify_conversion(argument, index)
+                    total += 1
+                    tokenized += used_tokenizer
+                    if not matches:
+                        mismatches += 1
+                        if mismatches <= max_reports:
+                            print(f"Mismatch in {path}: {argument!r}")
+                            print(f"  tokenizer: {converted}")
+                            print(f"  regex:     {expected}")
+
+    print(f"Checked {total} arguments: {tokenized} parsed by the tokenizer, "
+          f"{total - tokenized} by the regex fallback, {mismatches} mismatches")
+    return mismatches == 0
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 3 or sys.argv[1] != "--verify":
+        print("Usage:")
+        print("  python raw_trace_to_op_trace.py --verify capture.json [capture.json ...]")
+        print("")
+        print("Compares the single-pass argument tokenizer against the regex conversion")
+        print("for every argument in the given raw graph captures.")
+        sys.exit(1)
+
+    sys.exit(0 if _verify_captures(sys.argv[2:]) else 1)
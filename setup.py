@@ -23,12 +23,17 @@ setup(
     ],
     python_requires=">=3.6",
     install_requires=requirements,
+    extras_require={
+        "production": ["gunicorn>=20.1"],
+    },
     entry_points={
         "console_scripts": [
             "ttnn-trace-viewer=trace_viewer:main",
             "ttnn-store=store_traces:main",
             "ttnn-to-csv=ttnn_capture_to_csv:main",
             "ttnn-to-sheets=upload_to_sheets:main",
+            "ttnn-db-audit=db_audit:main",
+            "ttnn-db-sweep=db_sweep:main",
         ],
     },
     include_package_data=True,
@@ -9,8 +9,10 @@ if (typeof window.columnFilters === 'undefined') {
 window.uploads = [];
 window.filteredUploads = [];
 window.viewMode = 'by_upload';
-window.commonFilterFn = null;
+window.commonFilterText = null;
 let customParsers = {};
+// Server-side expressions of the custom parsers that have one, by name
+let parserExpressions = {};
 
 // Initialize operations in progress from localStorage
 window.operationsInProgress = {
@@ -241,6 +243,7 @@ function saveOperationStatus() {
     try {
         localStorage.setItem('operationsInProgress', JSON.stringify({
             upload: window.operationsInProgress.upload,
+            uploadJob: window.operationsInProgress.uploadJob || null,
             exportIds: Object.keys(window.operationsInProgress.export).filter(
                 id => window.operationsInProgress.export[id]
             ),
@@ -263,26 +266,10 @@ function restoreOperationStatus() {
                 const isRecent = (new Date().getTime() - parsedStatus.lastUpdated) < 10 * 60 * 1000;
                 
                 if (isRecent) {
-                    // Restore upload status
-                    if (parsedStatus.upload) {
-                        window.operationsInProgress.upload = true;
-                        
-                        // Update UI to reflect ongoing upload
-                        const uploadButton = document.querySelector('.upload-section button');
-                        if (uploadButton) {
-                            uploadButton.disabled = true;
-                            uploadButton.innerHTML = '<i class="bi bi-arrow-clockwise spin"></i> Uploading...';
-                        }
-                        
-                        // Show notification bar that upload is in progress
-                        const notificationBar = document.createElement('div');
-                        notificationBar.id = 'upload-notification';
-                        notificationBar.style.cssText = 'position:fixed;top:0;left:0;right:0;background:#007bff;color:white;padding:10px;text-align:center;z-index:9999;';
-                        notificationBar.innerHTML = `<i class="bi bi-arrow-clockwise spin"></i> Upload in progress. This might take a couple of minutes. Please wait...`;
-                        document.body.prepend(notificationBar);
-                        
-                        // Check upload status via server after a small delay
-                        setTimeout(checkUploadStatusFromServer, 1000);
+                    // Restore upload status and resume following its ingest job
+                    if (parsedStatus.upload && parsedStatus.uploadJob) {
+                        showUploadInProgress('Upload in progress. This might take a couple of minutes. Please wait...');
+                        watchUploadJob(parsedStatus.uploadJob);
                     }
                     
                     // Restore export statuses
@@ -319,7 +306,8 @@ function startServerHeartbeat() {
     setInterval(checkServerStatus, 60000);
 }
 
-// Function to check if server is reachable and verify upload status
+// Function to check if server is reachable and pick up ingest jobs started elsewhere
+// (for example from another tab)
 function checkServerStatus() {
     const url = `/api/uploads/status?_t=${new Date().getTime()}`;
     
@@ -337,48 +325,11 @@ function checkServerStatus() {
             clearTimeout(timeoutId);
             
             if (response.ok) {
-                // Always parse response to check upload status
                 return response.json().then(data => {
-                    // If server reports active uploads
-                    if (data.uploading) {
-                        // Update our state if it doesn't match server
-                        if (!window.operationsInProgress.upload) {
-                            window.operationsInProgress.upload = true;
-                            saveOperationStatus();
-                        }
-                        
-                        // Update UI
-                        const uploadButton = document.querySelector('.upload-section button');
-                        if (uploadButton) {
-                            uploadButton.disabled = true;
-                            uploadButton.innerHTML = '<i class="bi bi-arrow-clockwise spin"></i> Uploading...';
-                        }
-                        
-                        // Show notification if not already shown
-                        if (!document.getElementById('upload-notification')) {
-                            const notificationBar = document.createElement('div');
-                            notificationBar.id = 'upload-notification';
-                            notificationBar.style.cssText = 'position:fixed;top:0;left:0;right:0;background:#007bff;color:white;padding:10px;text-align:center;z-index:9999;';
-                            notificationBar.innerHTML = `<i class="bi bi-arrow-clockwise spin"></i> Upload in progress. This might take a couple of minutes. Please wait...`;
-                            document.body.prepend(notificationBar);
-                        }
-                        
-                        // Schedule next check sooner for active uploads
-                        setTimeout(checkUploadStatusFromServer, 3000);
-                    }
-                    // If server reports no uploads but we think there is one
-                    else if (!data.uploading && window.operationsInProgress.upload) {
-                        window.operationsInProgress.upload = false;
-                        document.getElementById('upload-notification')?.remove();
-                        
-                        const uploadButton = document.querySelector('.upload-section button');
-                        if (uploadButton) {
-                            uploadButton.disabled = false;
-                            uploadButton.innerHTML = 'Upload JSON';
-                        }
-                        
-                        saveOperationStatus();
-                        loadUploads(); // Reload uploads list
+                    // If server reports an active job we are not following yet, follow it
+                    if (data.uploading && data.jobs && data.jobs.length > 0 && !window.operationsInProgress.uploadJob) {
+                        showUploadInProgress('Upload in progress. This might take a couple of minutes. Please wait...');
+                        watchUploadJob(data.jobs[0]);
                     }
                 });
             }
@@ -389,11 +340,81 @@ function checkServerStatus() {
         });
 }
 
-// Function to check upload status from server
-function checkUploadStatusFromServer() {
-    const url = `/api/uploads/status?_t=${new Date().getTime()}`;
+// Show the upload notification bar and lock the upload button
+function showUploadInProgress(message) {
+    window.operationsInProgress.upload = true;
     
-    fetch(url, {
+    const uploadButton = document.querySelector('.upload-section button');
+    if (uploadButton) {
+        uploadButton.disabled = true;
+        uploadButton.innerHTML = '<i class="bi bi-arrow-clockwise spin"></i> Uploading...';
+    }
+    
+    let notificationBar = document.getElementById('upload-notification');
+    if (!notificationBar) {
+        notificationBar = document.createElement('div');
+        notificationBar.id = 'upload-notification';
+        notificationBar.style.cssText = 'position:fixed;top:0;left:0;right:0;background:#007bff;color:white;padding:10px;text-align:center;z-index:9999;';
+        document.body.prepend(notificationBar);
+    }
+    notificationBar.innerHTML = `<i class="bi bi-arrow-clockwise spin"></i> ${message}`;
+}
+
+// Remove the upload notification bar, unlock the upload button and forget the job
+function clearUploadInProgress() {
+    window.operationsInProgress.upload = false;
+    window.operationsInProgress.uploadJob = null;
+    
+    document.getElementById('upload-notification')?.remove();
+    
+    const uploadButton = document.querySelector('.upload-section button');
+    if (uploadButton) {
+        uploadButton.disabled = false;
+        uploadButton.innerHTML = 'Upload JSON';
+    }
+    
+    saveOperationStatus();
+}
+
+// Show a temporary full-width notification bar
+function showUploadResult(message, success) {
+    const resultBar = document.createElement('div');
+    resultBar.style.cssText = `position:fixed;top:0;left:0;right:0;background:${success ? '#28a745' : '#dc3545'};color:white;padding:10px;text-align:center;z-index:9999;`;
+    resultBar.innerHTML = `<i class="bi ${success ? 'bi-check-circle' : 'bi-exclamation-triangle'}"></i> ${message}`;
+    document.body.prepend(resultBar);
+    setTimeout(() => resultBar.remove(), 5000);
+}
+
+// Describe the progress of an ingest job for the notification bar
+function describeUploadJob(job) {
+    const name = `"${job.upload_name}"`;
+    if (job.phase === 'queued') {
+        return `Processing of ${name} is queued. Please wait...`;
+    }
+    if (job.phase === 'reused') {
+        return `${name} matches an earlier upload. Finishing...`;
+    }
+    
+    const details = [];
+    if (job.phase === 'storing') {
+        details.push(`${job.rows_stored.toLocaleString()} rows stored`);
+    }
+    if (job.throughput > 0) {
+        details.push(`${job.throughput.toLocaleString()} ${job.throughput_unit}`);
+    }
+    
+    const phase = job.phase === 'storing' ? 'Storing' : 'Parsing';
+    const suffix = details.length > 0 ? ` (${details.join(', ')})` : '';
+    return `${phase} ${name}: ${Math.floor(job.percent)}%${suffix}`;
+}
+
+// Poll an ingest job until it finishes, updating the notification bar on the way
+function watchUploadJob(jobId) {
+    window.operationsInProgress.upload = true;
+    window.operationsInProgress.uploadJob = jobId;
+    saveOperationStatus();
+    
+    fetch(`/api/jobs/${jobId}?_t=${new Date().getTime()}`, {
         method: 'GET',
         headers: { 'Cache-Control': 'no-cache' },
         credentials: 'same-origin'
@@ -404,66 +425,36 @@ function checkUploadStatusFromServer() {
             }
             return response.json();
         })
-        .then(data => {
-            if (data.uploading) {
-                // Server confirms upload is in progress
-                window.operationsInProgress.upload = true;
+        .then(job => {
+            if (!job.finished) {
+                showUploadInProgress(describeUploadJob(job));
                 
-                // Make sure UI reflects this
-                const uploadButton = document.querySelector('.upload-section button');
-                if (uploadButton) {
-                    uploadButton.disabled = true;
-                    uploadButton.innerHTML = '<i class="bi bi-arrow-clockwise spin"></i> Uploading...';
-                }
-                
-                // Make sure notification is shown
-                if (!document.getElementById('upload-notification')) {
-                    const notificationBar = document.createElement('div');
-                    notificationBar.id = 'upload-notification';
-                    notificationBar.style.cssText = 'position:fixed;top:0;left:0;right:0;background:#007bff;color:white;padding:10px;text-align:center;z-index:9999;';
-                    notificationBar.innerHTML = `<i class="bi bi-arrow-clockwise spin"></i> Upload in progress. This might take a couple of minutes. Please wait...`;
-                    document.body.prepend(notificationBar);
-                }
-                
-                // Check again in 3 seconds
-                setTimeout(checkUploadStatusFromServer, 3000);
+                // Check again in a second
+                setTimeout(() => watchUploadJob(jobId), 1000);
+                return;
+            }
+            
+            clearUploadInProgress();
+            if (job.phase === 'done' && job.reused) {
+                // Identical file: the server kept the earlier upload instead of storing a copy
+                const existing = job.reused_upload_name ? ` "${job.reused_upload_name}"` : '';
+                showToast(`"${job.upload_name}" was uploaded before; showing the existing upload${existing}`, 'success');
+                showUploadResult(`"${job.upload_name}" matches the existing upload${existing}, nothing new was stored`, true);
+            } else if (job.phase === 'done') {
+                showToast(`"${job.upload_name}" uploaded successfully!`, 'success');
+                showUploadResult(`"${job.upload_name}" uploaded successfully!`, true);
             } else {
-                // If server reports no active uploads, clear our status
-                window.operationsInProgress.upload = false;
-                
-                const notification = document.getElementById('upload-notification');
-                if (notification) {
-                    notification.remove();
-                }
-                
-                const uploadButton = document.querySelector('.upload-section button');
-                if (uploadButton) {
-                    uploadButton.disabled = false;
-                    uploadButton.innerHTML = 'Upload JSON';
-                }
-                
-                saveOperationStatus();
-                loadUploads(); // Reload uploads to get the latest data
+                showToast(`Upload failed: ${job.error}`, 'error');
+                showUploadResult(`Upload failed: ${job.error}`, false);
             }
+            loadUploads(); // Reload uploads to get the latest data
         })
         .catch(error => {
-            console.warn('Error checking upload status:', error);
+            console.warn('Error checking upload job:', error);
             
             // On error, assume upload is complete to avoid locking the UI
-            window.operationsInProgress.upload = false;
-            
-            const notification = document.getElementById('upload-notification');
-            if (notification) {
-                notification.remove();
-            }
-            
-            const uploadButton = document.querySelector('.upload-section button');
-            if (uploadButton) {
-                uploadButton.disabled = false;
-                uploadButton.innerHTML = 'Upload JSON';
-            }
-            
-            saveOperationStatus();
+            clearUploadInProgress();
+            loadUploads();
         });
 }
 
@@ -479,25 +470,12 @@ function handleFileUpload(event) {
         return;
     }
     
-    // Set upload in progress immediately
-    if (!window.operationsInProgress) window.operationsInProgress = {};
-    window.operationsInProgress.upload = true;
+    // Set upload in progress immediately, with a global notification at the top of the UI
+    showUploadInProgress(`Uploading "${file.name}". This might take a couple of minutes depending on the size of the trace. Please wait...`);
     
     // Save operation status to localStorage
     saveOperationStatus();
     
-    // Get reference to the upload button and disable it immediately
-    const uploadButton = document.querySelector('.upload-section button');
-    uploadButton.disabled = true;
-    uploadButton.innerHTML = '<i class="bi bi-arrow-clockwise spin"></i> Uploading...';
-    
-    // Add a global notification at the top of the UI immediately
-    const notificationBar = document.createElement('div');
-    notificationBar.id = 'upload-notification';
-    notificationBar.style.cssText = 'position:fixed;top:0;left:0;right:0;background:#007bff;color:white;padding:10px;text-align:center;z-index:9999;';
-    notificationBar.innerHTML = `<i class="bi bi-arrow-clockwise spin"></i> Uploading "${file.name}". This might take a couple of minutes depending on the size of the trace. Please wait...`;
-    document.body.prepend(notificationBar);
-    
     const formData = new FormData();
     formData.append('file', file);
     formData.append('name', file.name.replace(/\.[^/.]+$/, "")); // Use filename without extension as initial name
@@ -510,68 +488,22 @@ function handleFileUpload(event) {
         })
         .then(response => response.json())
         .then(data => {
-            // Remove notification bar
-            document.getElementById('upload-notification')?.remove();
-            
-            // Reset upload button
-            uploadButton.disabled = false;
-            uploadButton.innerHTML = 'Upload JSON';
-            
-            // Mark upload as no longer in progress
-            window.operationsInProgress.upload = false;
-            
-            // Update localStorage
-            saveOperationStatus();
-            
             if (data.success) {
-                // Show success toast
-                showToast(`File ${file.name} uploaded successfully!`, 'success');
-                
-                // Show global success notification
-                const successBar = document.createElement('div');
-                successBar.style.cssText = 'position:fixed;top:0;left:0;right:0;background:#28a745;color:white;padding:10px;text-align:center;z-index:9999;';
-                successBar.innerHTML = `<i class="bi bi-check-circle"></i> "${file.name}" uploaded successfully!`;
-                document.body.prepend(successBar);
-                setTimeout(() => successBar.remove(), 5000);
-                
-                // Reload uploads list
-                loadUploads();
+                // The server processes the file in the background; follow its job
+                watchUploadJob(data.job_id);
             } else {
+                clearUploadInProgress();
                 showToast(`Upload failed: ${data.error}`, 'error');
-                
-                // Show error notification
-                const errorBar = document.createElement('div');
-                errorBar.style.cssText = 'position:fixed;top:0;left:0;right:0;background:#dc3545;color:white;padding:10px;text-align:center;z-index:9999;';
-                errorBar.innerHTML = `<i class="bi bi-exclamation-triangle"></i> Upload failed: ${data.error}`;
-                document.body.prepend(errorBar);
-                setTimeout(() => errorBar.remove(), 5000);
+                showUploadResult(`Upload failed: ${data.error}`, false);
             }
         })
         .catch(error => {
-            // Remove notification bar
-            document.getElementById('upload-notification')?.remove();
-            
-            // Reset upload button
-            uploadButton.disabled = false;
-            uploadButton.innerHTML = 'Upload JSON';
-            
-            // Mark upload as no longer in progress
-            window.operationsInProgress.upload = false;
-            
-            // Update localStorage
-            saveOperationStatus();
-            
+            clearUploadInProgress();
             showToast(`Upload error: ${error}`, 'error');
-            
-            // Show error notification
-            const errorBar = document.createElement('div');
-            errorBar.style.cssText = 'position:fixed;top:0;left:0;right:0;background:#dc3545;color:white;padding:10px;text-align:center;z-index:9999;';
-            errorBar.innerHTML = `<i class="bi bi-exclamation-triangle"></i> Upload error: ${error}`;
-            document.body.prepend(errorBar);
-            setTimeout(() => errorBar.remove(), 5000);
+            showUploadResult(`Upload error: ${error}`, false);
         });
     }, 50); // Small delay to ensure UI updates are visible
     
     // Reset file input
     event.target.value = '';
-} 
\ No newline at end of file
+}
@@ -0,0 +1,268 @@
+// Filter Worker for TT-NN Trace Viewer
+//
+// Holds the rows loaded by traces.js and evaluates the browser-side filters
+// (`js:` column filters and the common filter) on them, off the page's
+// thread. The page moves each fetched page of rows here as the raw response
+// buffer, which only the worker parses; the page gets back the rows it
+// renders and the indices of the matching rows.
+//
+// Messages from the page:
+//   {type: 'parsers', parsers: {name: {code, version}}, generation}
+//       Register the custom parsers, which filters can call by name, and match
+//       the rows of `generation` again if filters are set.
+//   {type: 'filters', version, generation, columnFilters: [[column, expression]], common}
+//       Compile the filters (or clear them if there are none) and match every
+//       loaded row of `generation`.
+//   {type: 'page', request, generation, pageIndex, limit, sample, buffer}
+//       Store a page of rows (the values endpoint response) and match it.
+//   {type: 'rows', request, generation, limit, indices}
+//       Send the rows at these indices of the trace, of the pages held.
+//   {type: 'match', request, buffer}
+//       Send the matching rows of a page without keeping it, for exports of
+//       pages dropped since they were matched.
+//   {type: 'drop', generation, pageIndices} / {type: 'forget', generation}
+//       Forget pages the page no longer shows.
+//
+// Messages with a request id are answered with {type: 'reply', request, ...}:
+// the total, row count, columns and uploads of the response and `sample` of
+// its rows for 'page' (or its error), the rows found and their indices for
+// 'rows', and the matching rows for 'match'.
+//
+// Replies, for the current filters only:
+//   {type: 'matches', version, generation, pageIndex, indices}
+//       Matching row indices of one page, or of every loaded page when
+//       pageIndex is undefined; `pageIndices` then lists those pages and
+//       `errors` the filters that did not compile.
+
+importScripts('parser_registry.js');
+
+// Loaded rows: generation -> Map(page index -> {rows, start})
+const generations = new Map();
+
+// Custom parsers by name, which filters can call
+let parsers = {};
+
+// Filters last sent by the page, and the row predicate compiled from them
+let filterSpec = null;
+let rowFilter = null;
+let filterErrors = [];
+
+// Text shown in a cell for a value, as the page renders it
+function cellText(value) {
+    if (value === undefined || value === null) {
+        return '';
+    }
+    if (typeof value === 'object') {
+        try {
+            return JSON.stringify(value);
+        } catch (e) {
+            return '[Complex Object]';
+        }
+    }
+    return String(value);
+}
+
+// Register the parsers sent by the page. Parsers whose code has not changed
+// keep their compiled function and remembered results.
+function compileParsers(sources) {
+    parsers = {};
+    for (const [name, source] of Object.entries(sources)) {
+        // Parsers are passed to filters as arguments named after them
+        if (!/^[A-Za-z_$][A-Za-z0-9_$]*$/.test(name)) continue;
+        try {
+            parsers[name] = registerParser(name, source.code, source.version);
+        } catch (error) {
+            console.error(`Error compiling parser ${name}:`, error);
+        }
+    }
+    Array.from(parserRegistry.keys())
+        .filter(name => !(name in sources))
+        .forEach(unregisterParser);
+}
+
+// Compile an expression into a function of `argument`, with the parsers in scope
+function compileWithParsers(argument, body) {
+    const names = Object.keys(parsers);
+    const factory = new Function(...names, `return function(${argument}) { ${body} };`);
+    return factory(...names.map(name => parsers[name]));
+}
+
+// Compile the filters into one row predicate. A column filter that does not
+// compile matches nothing; a common filter that does not compile is ignored.
+function compileFilters(spec) {
+    filterErrors = [];
+    if (!spec) {
+        return null;
+    }
+    
+    const columnFilters = spec.columnFilters.map(([column, expression]) => {
+        try {
+            return [column, compileWithParsers('value', `
+                try {
+                    return ${expression};
+                } catch (e) {
+                    return false;
+                }
+            `)];
+        } catch (error) {
+            filterErrors.push({ column: column, message: error.message });
+            return [column, () => false];
+        }
+    });
+    
+    let common = null;
+    if (spec.common) {
+        try {
+            common = compileWithParsers('row', `
+                try {
+                    return (${spec.common})(row);
+                } catch (e) {
+                    return true;
+                }
+            `);
+        } catch (error) {
+            filterErrors.push({ column: null, message: error.message });
+        }
+    }
+    
+    return row => columnFilters.every(([column, filterFunction]) =>
+        filterFunction(cellText(row[column])) === true
+    ) && (!common || Boolean(common(row)));
+}
+
+// Up to `count` of the rows of a page, spread evenly over them
+function sampleRows(rows, count) {
+    const step = Math.max(1, rows.length / count);
+    const sample = [];
+    for (let i = 0; i < rows.length && sample.length < count; i += step) {
+        sample.push(rows[Math.floor(i)]);
+    }
+    return sample;
+}
+
+// Indices in the trace of the rows of a page that match the filters
+function matchPage(page) {
+    const indices = [];
+    page.rows.forEach((row, i) => {
+        if (rowFilter(row)) {
+            indices.push(page.start + i);
+        }
+    });
+    return indices;
+}
+
+// Post the matching rows of every loaded page of a generation
+function postAllMatches(generation) {
+    const pages = generations.get(generation) || new Map();
+    const pageIndices = Array.from(pages.keys()).sort((a, b) => a - b);
+    const indices = [];
+    pageIndices.forEach(pageIndex => {
+        indices.push(...matchPage(pages.get(pageIndex)));
+    });
+    
+    const matches = Int32Array.from(indices);
+    self.postMessage({
+        type: 'matches',
+        version: filterSpec.version,
+        generation: generation,
+        pageIndices: pageIndices,
+        indices: matches,
+        errors: filterErrors
+    }, [matches.buffer]);
+}
+
+// Answer a message that carries a request id
+function reply(message, fields) {
+    self.postMessage({ type: 'reply', request: message.request, ...fields });
+}
+
+self.addEventListener('message', event => {
+    const message = event.data;
+    try {
+        handleMessage(message);
+    } catch (error) {
+        // A response that is not JSON, for example
+        if (message.request !== undefined) {
+            reply(message, { error: error.message });
+        } else {
+            console.error(`Error handling ${message.type} message:`, error);
+        }
+    }
+});
+
+function handleMessage(message) {
+    if (message.type === 'parsers') {
+        compileParsers(message.parsers);
+        if (filterSpec) {
+            // Filters may call the parsers that changed
+            rowFilter = compileFilters(filterSpec);
+            postAllMatches(message.generation);
+        }
+    } else if (message.type === 'filters') {
+        filterSpec = message.columnFilters.length > 0 || message.common ? message : null;
+        rowFilter = compileFilters(filterSpec);
+        if (filterSpec) {
+            postAllMatches(message.generation);
+        }
+    } else if (message.type === 'page') {
+        const data = JSON.parse(new TextDecoder().decode(message.buffer));
+        if (data.error) {
+            reply(message, { error: data.error });
+            return;
+        }
+        if (!generations.has(message.generation)) {
+            generations.set(message.generation, new Map());
+        }
+        const page = { rows: data.rows || [], start: message.pageIndex * message.limit };
+        generations.get(message.generation).set(message.pageIndex, page);
+        reply(message, {
+            total: data.total,
+            count: page.rows.length,
+            columns: data.columns,
+            uploads: data.uploads,
+            sample: sampleRows(page.rows, message.sample || 0)
+        });
+        
+        if (rowFilter) {
+            const matches = Int32Array.from(matchPage(page));
+            self.postMessage({
+                type: 'matches',
+                version: filterSpec.version,
+                generation: message.generation,
+                pageIndex: message.pageIndex,
+                indices: matches
+            }, [matches.buffer]);
+        }
+    } else if (message.type === 'rows') {
+        const pages = generations.get(message.generation) || new Map();
+        const indices = [];
+        const rows = [];
+        message.indices.forEach(index => {
+            const page = pages.get(Math.floor(index / message.limit));
+            const row = page ? page.rows[index - page.start] : undefined;
+            if (row !== undefined) {
+                indices.push(index);
+                rows.push(row);
+            }
+        });
+        reply(message, { indices: indices, rows: rows });
+    } else if (message.type === 'match') {
+        const data = JSON.parse(new TextDecoder().decode(message.buffer));
+        if (data.error) {
+            reply(message, { error: data.error });
+            return;
+        }
+        const rows = data.rows || [];
+        reply(message, { rows: rowFilter ? rows.filter(rowFilter) : rows });
+    } else if (message.type === 'drop') {
+        const pages = generations.get(message.generation);
+        if (pages) {
+            message.pageIndices.forEach(pageIndex => pages.delete(pageIndex));
+            if (pages.size === 0) {
+                generations.delete(message.generation);
+            }
+        }
+    } else if (message.type === 'forget') {
+        generations.delete(message.generation);
+    }
+}
@@ -0,0 +1,86 @@
+// Custom Parser Registry for TT-NN Trace Viewer
+//
+// Compiles each custom parser once per version of its code, and remembers the
+// parser's result for every distinct value it is called with: trace columns
+// repeat the same `Tensor[...]` strings on many rows, so a parser runs once per
+// distinct string rather than once per row. Loaded by the page (parsers.js)
+// and by the filter worker, which keeps its own registry.
+
+// Results remembered per parser; a parser's results are forgotten when it
+// has this many
+const PARSER_RESULT_CACHE_SIZE = 10000;
+
+// Registered parsers by name: {version, code, parser}
+const parserRegistry = new Map();
+
+// Turn parser source code into a function. Named functions and
+// `const name = ...` declarations define the parser; any other code is an
+// expression whose value is the parser.
+function compileParser(code) {
+    const source = code.trim();
+    const declared = source.match(/^function\s+([A-Za-z0-9_$]+)\s*\(/) ||
+        source.match(/^(?:const|let|var)\s+([A-Za-z0-9_$]+)\s*=/);
+    const parser = declared
+        ? new Function(`${source}\nreturn ${declared[1]};`)()
+        : new Function(`return (${source});`)();
+    if (typeof parser !== 'function') {
+        throw new Error('Parser is not a function');
+    }
+    return parser;
+}
+
+// Wrap a compiled parser so it is called once per distinct value. Results are
+// shared between calls, so callers must not modify them.
+function cacheParserResults(compiled) {
+    const results = new Map();
+    return function(value) {
+        if (results.has(value)) {
+            return results.get(value);
+        }
+        const result = compiled(value);
+        if (results.size >= PARSER_RESULT_CACHE_SIZE) {
+            results.clear();
+        }
+        results.set(value, result);
+        return result;
+    };
+}
+
+// Register the code of a parser and return the parser. `version` identifies
+// the code (the parser's updated_at); the code is compiled again, and the
+// remembered results dropped, only when the version and the code both change.
+// Throws if the code does not compile to a function.
+function registerParser(name, code, version) {
+    const entry = parserRegistry.get(name);
+    if (entry && ((version !== undefined && entry.version === version) || entry.code === code)) {
+        if (version !== undefined) {
+            entry.version = version;
+        }
+        return entry.parser;
+    }
+    
+    const compiled = compileParser(code);
+    const registered = {
+        version: version,
+        code: code,
+        parser: cacheParserResults(compiled)
+    };
+    parserRegistry.set(name, registered);
+    return registered.parser;
+}
+
+// The registered parser called `name`, or undefined
+function getRegisteredParser(name) {
+    const entry = parserRegistry.get(name);
+    return entry ? entry.parser : undefined;
+}
+
+// Version of the code of the registered parser called `name`, or undefined
+function getParserVersion(name) {
+    const entry = parserRegistry.get(name);
+    return entry ? entry.version : undefined;
+}
+
+function unregisterParser(name) {
+    parserRegistry.delete(name);
+}
@@ -31,6 +31,7 @@ function loadCustomParsers() {
         .then(response => response.json())
         .then(data => {
             customParsers = {};
+            parserExpressions = {};
             
             // Recreate function objects from saved strings
             for (const parser of data) {
@@ -39,18 +40,24 @@ function loadCustomParsers() {
                     customParsers[parser.name] = parser.code;
                     
                     // Also register it globally
-                    updateGlobalParser(parser.name, parser.code);
+                    updateGlobalParser(parser.name, parser.code, parser.updated_at);
                     
                     // Store the ID if we have one
                     if (parser.id) {
                         customParsers[parser.name + '_id'] = parser.id;
                     }
+                    
+                    // And the server-side expression, which derived columns run
+                    if (parser.expression) {
+                        parserExpressions[parser.name] = parser.expression;
+                    }
                 } catch (e) {
                     console.error(`Error recreating parser ${parser.name}:`, e);
                 }
             }
             
             displayCustomParsers();
+            updateFilterWorkerParsers();
             
             // Log available parsers to console for debugging
             console.log("Registered parsers:", Object.keys(customParsers).filter(k => !k.endsWith('_id')));
@@ -113,16 +120,19 @@ function addBuiltInTensorShapeParser() {
 }`;
 
     customParsers['tensorShape'] = parserCode;
+    parserExpressions['tensorShape'] = 'shape';
     updateGlobalParser('tensorShape', parserCode);
     
-    // Save to server
-    createOrUpdateParserOnServer('tensorShape', parserCode);
+    // Save to server, with the same parser for derived columns
+    createOrUpdateParserOnServer('tensorShape', parserCode, 'shape');
     
     displayCustomParsers();
+    updateFilterWorkerParsers();
 }
 
-// Create or update a parser on the server
-function createOrUpdateParserOnServer(name, code) {
+// Create or update a parser on the server. Without an expression the server
+// keeps the one it has.
+function createOrUpdateParserOnServer(name, code, expression) {
     const parserId = customParsers[name + '_id'];
     const method = parserId ? 'PUT' : 'POST';
     const url = parserId ? `/api/parsers/${parserId}` : '/api/parsers';
@@ -134,13 +144,16 @@ function createOrUpdateParserOnServer(name, code) {
         },
         body: JSON.stringify({
             name: name,
-            code: code
+            code: code,
+            expression: expression
         })
     })
     .then(response => response.json())
     .then(data => {
         if (data.success && data.id) {
             customParsers[name + '_id'] = data.id;
+        } else if (!data.success) {
+            showToast(`Error saving parser: ${data.error}`, 'error');
         }
     })
     .catch(error => {
@@ -149,36 +162,11 @@ function createOrUpdateParserOnServer(name, code) {
     });
 }
 
-// Update global namespace with a parser
-function updateGlobalParser(name, code) {
+// Update global namespace with a parser. The parser is compiled once per
+// version of its code (see parser_registry.js).
+function updateGlobalParser(name, code, version) {
     try {
-        // Directly evaluate the code and assign to window
-        const parserFunctionCode = code.trim();
-        const isArrowFunction = parserFunctionCode.includes('=>');
-        const isNamedFunction = parserFunctionCode.startsWith('function');
-        
-        if (isNamedFunction) {
-            // For normal functions, just eval the code
-            eval(parserFunctionCode);
-            // Also make sure it's in the window object
-            if (typeof window[name] !== 'function') {
-                window[name] = eval(name);
-            }
-        } else if (isArrowFunction) {
-            // For arrow functions or const declarations
-            const fnMatch = parserFunctionCode.match(/(?:const|let|var)?\s*([a-zA-Z0-9_]+)\s*=/);
-            if (fnMatch && fnMatch[1]) {
-                eval(parserFunctionCode);
-                window[name] = eval(fnMatch[1]);
-            } else {
-                // Anonymous arrow function
-                window[name] = new Function('x', `return (${parserFunctionCode})(x);`);
-            }
-        } else {
-            // Default fallback method
-            window[name] = new Function(`return ${code}`)();
-        }
-        
+        window[name] = registerParser(name, code, version);
         console.log(`Parser '${name}' registered successfully:`, typeof window[name] === 'function');
     } catch (error) {
         console.error(`Error registering parser ${name}:`, error);
@@ -217,7 +205,7 @@ function addNewParser() {
 function editParser(name) {
     editorIsNew = false;
     currentParserName = name;
-    openParserEditor(customParsers[name]);
+    openParserEditor(customParsers[name], parserExpressions[name] || '');
 }
 
 // Delete a parser
@@ -235,8 +223,11 @@ function deleteParser(name) {
                 if (data.success) {
                     delete customParsers[name];
                     delete customParsers[name + '_id'];
+                    delete parserExpressions[name];
                     delete window[name];
+                    unregisterParser(name);
                     displayCustomParsers();
+                    updateFilterWorkerParsers();
                     showToast(`Parser "${name}" deleted`);
                 } else {
                     showToast(`Failed to delete parser: ${data.error}`, 'error');
@@ -249,8 +240,11 @@ function deleteParser(name) {
         } else {
             // No ID, just delete locally
             delete customParsers[name];
+            delete parserExpressions[name];
             delete window[name];
+            unregisterParser(name);
             displayCustomParsers();
+            updateFilterWorkerParsers();
             showToast(`Parser "${name}" deleted`);
         }
     }
@@ -281,9 +275,10 @@ function testParser(name) {
 }
 
 // Open the parser editor modal
-function openParserEditor(code = '') {
+function openParserEditor(code = '', expression = '') {
     // Show the modal
     document.getElementById('parserEditorModal').style.display = 'flex';
+    document.getElementById('parserExpression').value = expression;
     
     // Set default test input
     document.getElementById('testInput').value = 'Tensor[8x384x1024|BFLOAT16|INTERLEAVED|L1]';
@@ -470,8 +465,8 @@ function testParserInEditor() {
     const resultElement = document.getElementById('testResult');
     
     try {
-        // Evaluate the function
-        const parserFunction = new Function(`return ${code}`)();
+        // Compile the code being edited, without registering it
+        const parserFunction = compileParser(code);
         
         // Test the function with the input
         const result = parserFunction(testInput);
@@ -496,6 +491,7 @@ function saveParser() {
     }
     
     const code = monacoEditor.getValue();
+    const expression = document.getElementById('parserExpression').value.trim();
     let name = document.getElementById('parserName').value.trim();
     
     // If no name provided, try to extract it from the code
@@ -511,12 +507,9 @@ function saveParser() {
         }
     }
     
-    // Validate the parser function
+    // Validate the parser function, compiling it for the registry
     try {
-        const parserFunction = new Function(`return ${code}`)();
-        if (typeof parserFunction !== 'function') {
-            throw new Error('Parser must be a valid function');
-        }
+        registerParser(name, code);
     } catch (error) {
         showToast(`Invalid parser function: ${error.message}`, 'error');
         return;
@@ -524,15 +517,21 @@ function saveParser() {
     
     // Save the parser
     customParsers[name] = code;
+    if (expression) {
+        parserExpressions[name] = expression;
+    } else {
+        delete parserExpressions[name];
+    }
     
     // Update the global namespace
     updateGlobalParser(name, code);
     
-    // Save to server
-    createOrUpdateParserOnServer(name, code);
+    // Save to server; the server checks the expression
+    createOrUpdateParserOnServer(name, code, expression);
     
     // Update display
     displayCustomParsers();
+    updateFilterWorkerParsers();
     
     // Close the editor
     closeParserEditor();
@@ -46,53 +46,262 @@ function selectConsolidatedTrace(traceId) {
 }
 window.selectConsolidatedTrace = selectConsolidatedTrace;
 
-// Load trace data for by-upload view
-function loadTraceData(traceId, uploadId) {
-    fetch(`/api/trace/${traceId}/values?upload_id=${uploadId}`)
-        .then(response => response.json())
+// Number of rows fetched per request from the values endpoints
+const TRACE_PAGE_SIZE = 1000;
+
+// Fetched pages of rows kept by the filter worker; the pages farthest from
+// the rows on screen are dropped first
+const TRACE_CACHED_PAGES = 20;
+
+// Rows the page keeps above and below those rendered, asked from the filter
+// worker ahead of scrolling; the worker holds the rest of the fetched pages
+const TRACE_WINDOW_ROWS = 200;
+
+// Rows rendered above and below the visible ones, so short scrolls show rows at once
+const TRACE_ROW_BUFFER = 20;
+
+// Height of a table row in pixels until a rendered row has been measured
+const TRACE_ROW_HEIGHT = 31;
+
+// Tallest scroll area in pixels. Browsers cap the height of an element, so
+// longer traces map the scroll position onto rows at a coarser step.
+const TRACE_MAX_SCROLL_HEIGHT = 10000000;
+
+// Paging and sort state of the trace currently shown. Rows are sorted and
+// filtered on the server and fetched a page at a time as the table scrolls,
+// so only the pages around the visible rows are held in the browser, by the
+// filter worker, and the page itself holds only the rows around those in view.
+window.tracePage = null;
+
+// Measured height of a table row
+let traceRowHeight = TRACE_ROW_HEIGHT;
+
+// Identifies the fetched rows of each trace, sort order and set of server
+// filters shown, so the filter worker keeps their rows apart
+let traceRowsGeneration = 0;
+
+// Build the values URL for the page of rows starting at offset
+function traceValuesUrl(page, offset) {
+    const base = page.consolidated
+        ? `/api/consolidated-trace/${encodeURIComponent(page.traceId)}/values`
+        : `/api/trace/${page.traceId}/values`;
+    const params = new URLSearchParams({ offset: offset, limit: page.limit });
+    if (page.sort) {
+        params.set('sort', page.sort);
+        params.set('order', page.order);
+    }
+    if (Object.keys(page.filters).length > 0) {
+        params.set('filters', JSON.stringify(page.filters));
+    }
+    if (page.derived.length > 0) {
+        params.set('derived', JSON.stringify(page.derived));
+    }
+    return `${base}?${params.toString()}`;
+}
+
+// Forget the fetched rows, for a new sort order, new filters or new derived columns
+function resetTraceRows(page) {
+    page.cache = {
+        generation: ++traceRowsGeneration,
+        pages: new Map(),        // page index -> row count, of the pages the worker holds
+        pending: new Set(),
+        rows: new Map(),         // trace index -> row, around the rows in view
+        requestedRows: new Set(),
+        sample: [],              // rows of the first page, for fitting columns
+        sort: page.sort,
+        order: page.order,
+        filters: page.filters,
+        derived: page.derived
+    };
+    page.selectedIndex = null;
+    page.matches = null;
+    page.matched = new Set();
+}
+
+// Fetch a page of rows into the filter worker, which parses and holds it.
+// Resolves with the total, row count, columns and uploads of the response and
+// up to `sample` of its rows, or with null if the sort or filters changed
+// while it was being fetched.
+function fetchTraceRows(page, pageIndex, sample) {
+    const cache = page.cache;
+    cache.pending.add(pageIndex);
+    return fetch(traceValuesUrl(page, pageIndex * page.limit))
+        .then(response => response.arrayBuffer())
+        // The buffer is moved to the worker, not copied
+        .then(buffer => filterWorkerRequest({
+            type: 'page',
+            generation: cache.generation,
+            pageIndex: pageIndex,
+            limit: page.limit,
+            sample: sample || 0,
+            buffer: buffer
+        }, [buffer]))
         .then(data => {
-            window.currentTrace = data;
-            displayTraceData(data);
-            populateColumnsList(data);
+            cache.pending.delete(pageIndex);
+            if (data.error) {
+                throw new Error(data.error);
+            }
+            if (window.tracePage !== page || page.cache !== cache) {
+                getFilterWorker().postMessage({ type: 'drop', generation: cache.generation, pageIndices: [pageIndex] });
+                return null;
+            }
+            
+            page.total = data.total;
+            cache.pages.set(pageIndex, data.count);
+            dropDistantTraceRows(page, pageIndex);
+            return data;
+        }, error => {
+            cache.pending.delete(pageIndex);
+            throw error;
         });
 }
-window.loadTraceData = loadTraceData;
 
-// Load trace data for consolidated view
-function loadConsolidatedTraceData(traceId) {
-    console.log(`Loading consolidated trace data for ${traceId}`);
-    
-    // Use the consolidated trace API endpoint
-    fetch(`/api/consolidated-trace/${encodeURIComponent(traceId)}/values`)
-        .then(response => response.json())
-        .then(events => {
-            // The API returns an array of events joined from all uploads with this trace name
-            console.log(`Received ${events.length} events for consolidated trace`);
-            
-            // Create a consolidated data structure
-            const processedData = {
-                name: traceId,
-                filename: `${traceId} (Consolidated)`,
-                events: events,
-                uploads: extractUploadsFromEvents(events),
-                length: events.length
-            };
+// Ask the filter worker for the rows of the loaded pages around the table
+// positions first to last that the page does not have, and forget the rows
+// farther away. The rows in view are rendered again when they arrive.
+function requestTraceRows(page, first, last) {
+    const cache = page.cache;
+    const from = Math.max(0, first - TRACE_WINDOW_ROWS);
+    const to = Math.min(traceViewLength(page), last + TRACE_WINDOW_ROWS);
+    const kept = new Set();
+    const wanted = [];
+    for (let position = from; position < to; position++) {
+        const index = traceRowIndex(page, position);
+        if (index === null) continue;
+        kept.add(index);
+        if (!cache.rows.has(index) && !cache.requestedRows.has(index)
+            && cache.pages.has(Math.floor(index / page.limit))) {
+            wanted.push(index);
+        }
+    }
+    cache.rows.forEach((row, index) => {
+        if (!kept.has(index)) cache.rows.delete(index);
+    });
+    if (wanted.length === 0) return;
+    
+    wanted.forEach(index => cache.requestedRows.add(index));
+    filterWorkerRequest({ type: 'rows', generation: cache.generation, limit: page.limit, indices: wanted })
+        .then(reply => {
+            wanted.forEach(index => cache.requestedRows.delete(index));
+            if (window.tracePage !== page || page.cache !== cache) return;
+            reply.indices.forEach((index, i) => cache.rows.set(index, reply.rows[i]));
+            renderVisibleRows(true);
+        });
+}
+
+// Keep at most TRACE_CACHED_PAGES pages, dropping those farthest from pageIndex.
+// With browser filters the worker's matches of dropped pages are kept, so a
+// dropped page is fetched again only when its matching rows come into view.
+function dropDistantTraceRows(page, pageIndex) {
+    const pages = page.cache.pages;
+    if (pages.size <= TRACE_CACHED_PAGES) return;
+    
+    const distant = Array.from(pages.keys())
+        .sort((a, b) => Math.abs(b - pageIndex) - Math.abs(a - pageIndex))
+        .slice(0, pages.size - TRACE_CACHED_PAGES);
+    distant.forEach(index => pages.delete(index));
+    getFilterWorker().postMessage({ type: 'drop', generation: page.cache.generation, pageIndices: distant });
+}
+
+// Fetch the first page of the trace described by window.tracePage and display it
+function loadTracePage() {
+    const page = window.tracePage;
+    if (!page) return;
+    
+    const previous = page.cache;
+    resetTraceRows(page);
+    fetchTraceRows(page, 0, COLUMN_WIDTH_SAMPLE)
+        .then(data => {
+            if (!data) return;
+            if (previous) {
+                getFilterWorker().postMessage({ type: 'forget', generation: previous.generation });
+            }
+            // The worker holds the rows; a sample of them is enough to find
+            // the columns and fit their widths
+            page.cache.sample = data.sample;
             
-            // Update the UI
-            window.currentTrace = processedData;
-            displayConsolidatedTraceData(processedData);
-            populateColumnsList(processedData);
+            if (page.consolidated) {
+                // The API returns a page of events joined from all uploads with this trace name
+                console.log(`Received ${data.count} of ${data.total} events for consolidated trace`);
+                
+                // Create a consolidated data structure
+                const processedData = {
+                    name: page.traceId,
+                    filename: `${page.traceId} (Consolidated)`,
+                    events: data.sample,
+                    columns: data.columns,
+                    uploads: data.uploads,
+                    length: data.total
+                };
+                
+                // Update the UI
+                window.currentTrace = processedData;
+                displayConsolidatedTraceData(processedData);
+                populateColumnsList(processedData);
+            } else {
+                window.currentTrace = data.sample;
+                displayTraceData(data.sample);
+                populateColumnsList(data.sample);
+            }
         })
         .catch(error => {
-            console.error("Error loading consolidated trace:", error);
+            console.error("Error loading trace:", error);
+            if (Object.keys(page.filters).length > 0 || page.derived.length > 0) {
+                // Most likely a malformed filter or an unknown derived column;
+                // keep the table and the rows it was showing, and report it
+                if (previous && window.tracePage === page) {
+                    getFilterWorker().postMessage({ type: 'forget', generation: page.cache.generation });
+                    page.cache = previous;
+                    page.sort = previous.sort;
+                    page.order = previous.order;
+                    page.filters = previous.filters;
+                    page.derived = previous.derived;
+                    applyBrowserFilters();
+                    currentSortColumn = page.sort;
+                    currentSortDirection = page.order;
+                    updateSortIndicators();
+                }
+                showToast(`Error loading rows: ${error.message}`, 'error');
+                return;
+            }
             const traceDataContainer = document.getElementById('traceData');
             traceDataContainer.innerHTML = `
                 <div class="alert alert-danger">
-                    Failed to load consolidated trace: ${error.message}
+                    Failed to load trace: ${error.message}
                 </div>
             `;
         });
 }
+
+// Start showing a trace from its first row
+function openTracePage(traceId, consolidated) {
+    if (window.tracePage && window.tracePage.cache) {
+        getFilterWorker().postMessage({ type: 'forget', generation: window.tracePage.cache.generation });
+    }
+    window.tracePage = {
+        traceId: traceId,
+        consolidated: consolidated,
+        limit: TRACE_PAGE_SIZE,
+        sort: null,
+        order: 'asc',
+        filters: getServerFilters(),
+        derived: getDerivedColumns(),
+        total: 0
+    };
+    loadTracePage();
+}
+
+// Load trace data for by-upload view
+function loadTraceData(traceId, uploadId) {
+    openTracePage(traceId, false);
+}
+window.loadTraceData = loadTraceData;
+
+// Load trace data for consolidated view
+function loadConsolidatedTraceData(traceId) {
+    console.log(`Loading consolidated trace data for ${traceId}`);
+    openTracePage(traceId, true);
+}
 window.loadConsolidatedTraceData = loadConsolidatedTraceData;
 
 // Helper function to extract uploads from events
@@ -210,7 +419,7 @@ function displayTraceData(traceData) {
             </div>
         </div>
         <div class="trace-stats">
-            ${traceData.length || 0} events
+            ${window.tracePage ? window.tracePage.total : (traceData.length || 0)} events
         </div>
         <div id="eventsTableContainer" class="mt-3"></div>
     `;
@@ -220,11 +429,8 @@ function displayTraceData(traceData) {
     // Get all unique columns from the events
     const columns = getTraceColumns(traceData);
     
-    // Get filtered events
-    const filteredEvents = getFilteredEvents(traceData);
-    
-    // Update the trace table with events
-    updateTraceTable(filteredEvents, columns);
+    // Show the rows of the trace in a table
+    updateTraceTable(columns);
 }
 
 // Display consolidated trace data
@@ -242,7 +448,7 @@ function displayConsolidatedTraceData(traceData) {
     }
     
     // Count the events and uploads
-    const eventCount = traceData.events.length;
+    const eventCount = traceData.length || traceData.events.length;
     const uploadCount = traceData.uploads ? traceData.uploads.length : 0;
     
     // Create container for consolidated trace data
@@ -256,7 +462,7 @@ function displayConsolidatedTraceData(traceData) {
             </div>
         </div>
         <div class="trace-stats">
-            ${uploadCount} uploads, ${eventCount} total events
+            ${uploadCount} uploads, ${eventCount} distinct events
         </div>
     `;
     
@@ -277,11 +483,8 @@ function displayConsolidatedTraceData(traceData) {
     // Get all unique columns from the events
     const columns = getTraceColumns(traceData);
     
-    // Get filtered events
-    const filteredEvents = getFilteredEvents(traceData);
-    
-    // Update the trace table with events
-    updateTraceTable(filteredEvents, columns);
+    // Show the rows of the trace in a table
+    updateTraceTable(columns);
 }
 
 // Get all unique columns from trace events
@@ -293,6 +496,11 @@ function getTraceColumns(traceData) {
         return [];
     }
     
+    // Consolidated pages carry the columns of all traces, not only those on the page
+    if (Array.isArray(traceData.columns)) {
+        return sortColumns(traceData.columns);
+    }
+    
     // Get events array from the appropriate source
     let events = [];
     
@@ -342,7 +550,7 @@ function getTraceColumns(traceData) {
     if (traceData.uploads || events.some(e => e.upload_id || e.upload_name)) {
         // Add both underscore and non-underscore versions
         excludeColumns.push(
-            '_upload_id', '_upload_name', '_upload_time',
+            '_upload_id', '_upload_name', '_upload_time', '_occurrences', '_uploads',
             'upload_id', 'upload_name', 'upload_time'
         );
     }
@@ -379,112 +587,210 @@ function sortColumns(columns) {
     return [...operationColumn, ...argColumns, ...otherColumns];
 }
 
-// Function to filter events based on column filters from the right panel
+// Prefix of column filters that are JavaScript expressions evaluated in the browser
+const BROWSER_FILTER_PREFIX = 'js:';
+
+// Column filters in the server filter language (see trace_filters.py)
+function getServerFilters() {
+    const filters = {};
+    for (const column in window.columnFilters) {
+        const filterText = window.columnFilters[column] && window.columnFilters[column].trim();
+        if (filterText && !filterText.startsWith(BROWSER_FILTER_PREFIX)) {
+            filters[column] = filterText;
+        }
+    }
+    return filters;
+}
+
+// Derived columns entered in the right panel, as parser(column) names
+function getDerivedColumns() {
+    const input = document.getElementById('derivedColumns');
+    const text = input ? input.value : '';
+    return (text.match(/[^\s,][^,(]*\([^)]*\)/g) || []).map(name => name.trim());
+}
+
+// Function to filter events based on column filters from the right panel.
+// Filters in the server filter language reload the trace from the server;
+// `js:` filters are evaluated on the rows loaded in the browser.
 function filterEvents() {
-    // No column-filter elements in headers anymore, using columnFilters object
-    if (Object.keys(window.columnFilters).length === 0) {
-        // No filters active, show all events
-        document.querySelectorAll('tr.event-row').forEach(row => {
-            row.style.display = '';
-        });
-        updateRowCount();
+    const page = window.tracePage;
+    if (!page) return;
+    
+    const serverFilters = getServerFilters();
+    if (JSON.stringify(serverFilters) !== JSON.stringify(page.filters)) {
+        page.filters = serverFilters;
+        loadTracePage();
         return;
     }
     
-    console.log("Applying filters:", window.columnFilters);
+    applyBrowserFilters();
+    const scrollWrapper = document.getElementById('eventsTableScroll');
+    if (scrollWrapper) {
+        scrollWrapper.scrollTop = 0;
+    }
+    renderVisibleRows(true);
+}
+
+// `js:` column filters as [column, expression] pairs
+function getBrowserFilters() {
+    return Object.entries(window.columnFilters)
+        .map(([column, filterText]) => [column, (filterText || '').trim()])
+        .filter(([column, filterText]) => filterText.startsWith(BROWSER_FILTER_PREFIX))
+        .map(([column, filterText]) => [column, filterText.slice(BROWSER_FILTER_PREFIX.length).trim()]);
+}
+
+// Worker that evaluates the browser filters and custom parsers on the loaded
+// rows, so long traces never block the page (see filter_worker.js)
+let filterWorker = null;
+
+// Version of the browser filters sent to the worker last; matches computed
+// for earlier versions are ignored
+let browserFilterVersion = 0;
+
+// Version at which the common filter was last changed, until its result is reported
+let commonFilterVersion = null;
+
+// Replies awaited from the filter worker, by request id
+const filterWorkerRequests = new Map();
+let filterWorkerRequestId = 0;
+
+// Send a message to the filter worker and resolve with its reply
+function filterWorkerRequest(message, transfer) {
+    const request = ++filterWorkerRequestId;
+    return new Promise(resolve => {
+        filterWorkerRequests.set(request, resolve);
+        getFilterWorker().postMessage({ ...message, request: request }, transfer || []);
+    });
+}
+
+// Start the filter worker on first use
+function getFilterWorker() {
+    if (!filterWorker) {
+        filterWorker = new Worker('/static/js/filter_worker.js');
+        filterWorker.addEventListener('message', handleFilterWorkerMessage);
+        filterWorker.addEventListener('error', e => console.error('Filter worker error:', e.message));
+        filterWorker.postMessage({ type: 'parsers', parsers: getParserSources() });
+    }
+    return filterWorker;
+}
+
+// Source code and version of the custom parsers by name, which filters can call
+function getParserSources() {
+    const sources = {};
+    Object.keys(customParsers).forEach(name => {
+        if (!name.endsWith('_id')) {
+            sources[name] = { code: customParsers[name], version: getParserVersion(name) };
+        }
+    });
+    return sources;
+}
+
+// Send the custom parsers to the filter worker after they change. Filters
+// may call them, so the worker matches the loaded rows again.
+function updateFilterWorkerParsers() {
+    if (!filterWorker) return;
+    
+    const page = window.tracePage;
+    filterWorker.postMessage({
+        type: 'parsers',
+        parsers: getParserSources(),
+        generation: page && page.cache ? page.cache.generation : null
+    });
+}
+window.updateFilterWorkerParsers = updateFilterWorkerParsers;
+
+// Send the `js:` column filters and the common filter to the worker, which
+// answers with the loaded rows matching them. While any is set, the table
+// shows only the matching rows.
+function applyBrowserFilters() {
+    const page = window.tracePage;
+    if (!page) return;
+    
+    const columnFilters = getBrowserFilters();
+    const common = window.commonFilterText || null;
+    browserFilterVersion++;
+    page.browserFilters = columnFilters.length > 0 || common !== null;
+    page.matches = null;
+    page.matched = new Set();
+    
+    if (page.browserFilters) {
+        console.log("Applying browser filters:", columnFilters, common);
+    }
+    getFilterWorker().postMessage({
+        type: 'filters',
+        version: browserFilterVersion,
+        generation: page.cache.generation,
+        columnFilters: columnFilters,
+        common: common
+    });
+}
+
+// Take in the replies and the matching rows reported by the filter worker
+function handleFilterWorkerMessage(event) {
+    const message = event.data;
+    if (message.type === 'reply') {
+        const resolve = filterWorkerRequests.get(message.request);
+        filterWorkerRequests.delete(message.request);
+        if (resolve) resolve(message);
+        return;
+    }
     
-    // Apply filters
-    document.querySelectorAll('tr.event-row').forEach(row => {
-        let visible = true;
-        
-        for (const column in window.columnFilters) {
-            const filterText = window.columnFilters[column] && window.columnFilters[column].trim();
-            if (!filterText) continue; // Skip empty filters
-            
-            const cellValue = row.querySelector(`td[data-column="${column}"]`)?.textContent || '';
-            console.log(`Checking cell value "${cellValue}" against filter "${filterText}"`);
-            
-            // Check if this is a parser function call (contains parentheses)
-            if (filterText.includes('(') && filterText.includes(')')) {
-                try {
-                    // Create a function that will evaluate the expression with the event value
-                    const filterFunction = new Function('value', `
-                        // Make all parser functions available in this scope
-                        ${Object.keys(window)
-                            .filter(key => typeof window[key] === 'function' && !key.startsWith('_'))
-                            .map(key => `const ${key} = window['${key}'];`)
-                            .join('\n')}
-                        
-                        try {
-                            return ${filterText};
-                        } catch (e) {
-                            console.error("Filter evaluation error:", e);
-                            return false;
-                        }
-                    `);
-                    
-                    // Apply the function to the cell value
-                    const result = filterFunction(cellValue);
-                    console.log(`Function filter result: ${result}`);
-                    if (result !== true) {
-                        visible = false;
-                        break;
-                    }
-                } catch (error) {
-                    console.error(`Error evaluating filter expression "${filterText}":`, error);
-                    // If there's an error evaluating the expression, consider it as not matching
-                    visible = false;
-                    break;
-                }
-            } else {
-                // For expressions without parentheses, evaluate them directly
-                try {
-                    // Create a function that will evaluate the expression with the event value
-                    const filterFunction = new Function('value', `
-                        // Make all parser functions available in this scope
-                        ${Object.keys(window)
-                            .filter(key => typeof window[key] === 'function' && !key.startsWith('_'))
-                            .map(key => `const ${key} = window['${key}'];`)
-                            .join('\n')}
-                        
-                        try {
-                            return ${filterText};
-                        } catch (e) {
-                            // Fall back to substring search
-                            return value.toLowerCase().includes("${filterText.toLowerCase().replace(/"/g, '\\"')}");
-                        }
-                    `);
-                    
-                    // Apply the function to the cell value
-                    const result = filterFunction(cellValue);
-                    console.log(`Expression filter result: ${result}`);
-                    if (result !== true) {
-                        visible = false;
-                        break;
-                    }
-                } catch (error) {
-                    console.error(`Error evaluating expression "${filterText}":`, error);
-                    // Fall back to simple text filter
-                    if (!cellValue.toLowerCase().includes(filterText.toLowerCase())) {
-                        visible = false;
-                        break;
-                    }
-                }
-            }
+    const page = window.tracePage;
+    if (message.type !== 'matches' || !page || !page.browserFilters) return;
+    if (message.version !== browserFilterVersion || message.generation !== page.cache.generation) return;
+    
+    if (message.pageIndex === undefined) {
+        // Matches of every loaded page
+        page.matches = Array.from(message.indices);
+        page.matched = new Set(message.pageIndices);
+        reportFilterErrors(message.version, message.errors);
+    } else if (page.matches && !page.matched.has(message.pageIndex)) {
+        // Insert the matches of a new page before those of the pages after it
+        const start = message.pageIndex * page.limit;
+        let position = page.matches.findIndex(index => index >= start);
+        if (position === -1) {
+            position = page.matches.length;
         }
-        
-        row.style.display = visible ? '' : 'none';
+        page.matches.splice(position, 0, ...message.indices);
+        page.matched.add(message.pageIndex);
+    }
+    renderVisibleRows(true);
+}
+
+// Report filters that did not compile, and whether a new common filter did
+function reportFilterErrors(version, errors) {
+    errors.forEach(error => {
+        const target = error.column === null ? 'common filter' : `filter on ${error.column}`;
+        showToast(`Invalid ${target}: ${error.message}`, 'error');
     });
     
-    updateRowCount();
+    if (version === commonFilterVersion) {
+        commonFilterVersion = null;
+        if (!errors.some(error => error.column === null)) {
+            showToast('Filter applied successfully');
+        }
+    }
 }
 
 // Global variables for sorting
 let currentSortColumn = null;
 let currentSortDirection = 'asc';
-let currentEvents = [];
 
-// Function to sort events by a column
+// Show the sort indicator on the current sort column
+function updateSortIndicators() {
+    document.querySelectorAll('th.sortable').forEach(th => {
+        // Clear all sort indicators
+        th.classList.remove('sort-asc', 'sort-desc');
+        
+        // Add indicator to current sort column
+        if (th.dataset.column === currentSortColumn) {
+            th.classList.add(currentSortDirection === 'asc' ? 'sort-asc' : 'sort-desc');
+        }
+    });
+}
+
+// Function to sort events by a column. Traces are sorted on the server, so
+// the trace is reloaded from its first row in the new order.
 function sortEvents(column) {
     if (currentSortColumn === column) {
         // Toggle direction if clicking the same column
@@ -495,126 +801,268 @@ function sortEvents(column) {
         currentSortDirection = 'asc';
     }
     
-    // Update sort indicators in headers
-    document.querySelectorAll('th.sortable').forEach(th => {
-        // Clear all sort indicators
-        th.classList.remove('sort-asc', 'sort-desc');
-        
-        // Add indicator to current sort column
-        if (th.dataset.column === currentSortColumn) {
-            th.classList.add(currentSortDirection === 'asc' ? 'sort-asc' : 'sort-desc');
+    const page = window.tracePage;
+    if (!page) return;
+    
+    page.sort = currentSortColumn;
+    page.order = currentSortDirection;
+    loadTracePage();
+}
+
+// Text shown in a cell for a value
+function cellText(value) {
+    if (value === undefined || value === null) {
+        return '';
+    }
+    if (typeof value === 'object') {
+        // For objects, display as JSON
+        try {
+            return JSON.stringify(value);
+        } catch (e) {
+            return '[Complex Object]';
         }
+    }
+    return String(value);
+}
+
+// Number of rows in the table: every row of the trace or, with browser
+// filters, the matching loaded rows and a last row that loads another page
+// while any is missing or being matched
+function traceViewLength(page) {
+    if (!page.matches) {
+        return page.total;
+    }
+    const complete = nextMissingTracePage(page) === null && loadedRowsMatched(page);
+    return page.matches.length + (complete ? 0 : 1);
+}
+
+// Whether the worker has matched every loaded page against the browser filters
+function loadedRowsMatched(page) {
+    return Array.from(page.cache.pages.keys()).every(pageIndex => page.matched.has(pageIndex));
+}
+
+// Index in the trace of the row at a table position, or null for the row
+// that loads another page
+function traceRowIndex(page, position) {
+    if (!page.matches) {
+        return position;
+    }
+    return position < page.matches.length ? page.matches[position] : null;
+}
+
+// A row of the trace, or undefined while the page does not have it
+function traceRowAt(page, index) {
+    return page.cache.rows.get(index);
+}
+
+// Number of rows of the trace matched against the browser filters, in pages
+// loaded now or dropped since
+function matchedTraceRowCount(page) {
+    let count = 0;
+    page.matched.forEach(pageIndex => {
+        count += Math.min(page.limit, page.total - pageIndex * page.limit);
     });
-    
-    // Sort the events array
-    currentEvents.sort((a, b) => {
-        const valueA = String(a[column] || '');
-        const valueB = String(b[column] || '');
-        
-        // Try to convert to numbers if both are numeric
-        if (!isNaN(valueA) && !isNaN(valueB)) {
-            return currentSortDirection === 'asc' 
-                ? Number(valueA) - Number(valueB)
-                : Number(valueB) - Number(valueA);
+    return count;
+}
+
+// First page of the trace that is neither loaded nor matched, or null if none is
+function nextMissingTracePage(page) {
+    const pageCount = Math.ceil(page.total / page.limit);
+    for (let pageIndex = 0; pageIndex < pageCount; pageIndex++) {
+        if (!page.cache.pages.has(pageIndex) && !page.matched.has(pageIndex)) {
+            return pageIndex;
         }
+    }
+    return null;
+}
+
+// Fetch the pages that are neither loaded nor being fetched, and show their
+// rows when they arrive
+function requestTracePages(page, pageIndices) {
+    pageIndices.forEach(pageIndex => {
+        if (page.cache.pages.has(pageIndex) || page.cache.pending.has(pageIndex)) return;
         
-        // Otherwise sort as strings
-        return currentSortDirection === 'asc'
-            ? valueA.localeCompare(valueB)
-            : valueB.localeCompare(valueA);
+        fetchTraceRows(page, pageIndex)
+            .then(data => {
+                if (data) {
+                    renderVisibleRows(true);
+                }
+            })
+            .catch(error => {
+                console.error("Error loading trace rows:", error);
+                showToast(`Failed to load rows: ${error.message}`, 'error');
+            });
     });
+}
+
+// Table row standing in for the rows above or below those rendered
+function spacerRow(height, columnCount) {
+    const row = document.createElement('tr');
+    row.className = 'spacer-row';
+    const cell = document.createElement('td');
+    cell.colSpan = columnCount || 1;
+    cell.style.height = height + 'px';
+    row.appendChild(cell);
+    return row;
+}
+
+// Table row shown for a row whose page is being fetched
+function loadingRow(columnCount) {
+    const row = document.createElement('tr');
+    row.className = 'loading-row';
+    const cell = document.createElement('td');
+    cell.colSpan = columnCount || 1;
+    cell.textContent = 'Loading...';
+    cell.className = 'text-muted';
+    row.appendChild(cell);
+    return row;
+}
+
+// Table row showing an event, the row at `index` of the trace
+function eventRow(event, index, position, columns) {
+    const row = document.createElement('tr');
+    // Stripe by position, since rows are rendered from the middle of the table
+    row.className = position % 2 === 0 ? 'event-row striped' : 'event-row';
+    row.dataset.eventIndex = index;
+    if (index === window.tracePage.selectedIndex) {
+        row.classList.add('selected');
+    }
+    if (event._occurrences) {
+        // Consolidated rows stand for every stored copy of the same content
+        row.title = `${event._occurrences} occurrences in ${event._uploads.length} uploads`;
+    }
     
-    // Redraw the table body
-    renderTableBody();
+    // Add cells only for visible columns
+    columns.forEach(field => {
+        const cell = document.createElement('td');
+        cell.dataset.column = field;
+        if (event[field] === undefined || event[field] === null) {
+            cell.classList.add('empty-cell');
+        } else {
+            cell.textContent = cellText(event[field]);
+        }
+        row.appendChild(cell);
+    });
+    return row;
 }
 
-// Render the table body without recreating the whole table
-function renderTableBody() {
+// Render the table rows in view, with spacer rows standing in for the rows
+// above and below them. Only the rows in view and TRACE_ROW_BUFFER rows on
+// either side are in the DOM, so a scroll costs the same however long the
+// trace is. Rows are re-rendered when the range in view changes, or when forced.
+function renderVisibleRows(force) {
+    const page = window.tracePage;
+    const scrollWrapper = document.getElementById('eventsTableScroll');
     const tableBody = document.getElementById('eventsTableBody');
-    if (!tableBody) return;
+    if (!page || !scrollWrapper || !tableBody) return;
     
-    tableBody.innerHTML = '';
-    
-    // Get the current column headers (these are the filtered columns without 'id')
-    const visibleColumns = Array.from(document.querySelectorAll('th.sortable')).map(th => th.dataset.column);
-    
-    if (currentEvents.length === 0) {
+    const columns = page.columns || [];
+    const length = traceViewLength(page);
+    if (length === 0) {
         // No events to display
         const emptyRow = document.createElement('tr');
         const emptyCell = document.createElement('td');
-        emptyCell.colSpan = visibleColumns.length || 1;
+        emptyCell.colSpan = columns.length || 1;
         emptyCell.textContent = "No events to display";
         emptyCell.className = "text-center text-muted py-3";
         emptyRow.appendChild(emptyCell);
-        tableBody.appendChild(emptyRow);
+        tableBody.replaceChildren(emptyRow);
+        page.renderedRange = null;
+        updateRowCount();
         return;
     }
     
-    // Add event rows
-    currentEvents.forEach((event, index) => {
-        const row = document.createElement('tr');
-        row.className = 'event-row';
-        row.dataset.eventIndex = index;
-        
-        // Add cells only for visible columns
-        visibleColumns.forEach(field => {
-            const cell = document.createElement('td');
-            cell.dataset.column = field;
-            
-            // Handle different data types appropriately
-            if (event[field] === undefined || event[field] === null) {
-                cell.textContent = '';
-                cell.classList.add('empty-cell');
-            } else if (typeof event[field] === 'object') {
-                // For objects, display as JSON
-                try {
-                    cell.textContent = JSON.stringify(event[field]);
-                } catch (e) {
-                    cell.textContent = '[Complex Object]';
+    // Map the scroll position onto rows. Traces taller than TRACE_MAX_SCROLL_HEIGHT
+    // move more than a pixel of rows per pixel scrolled.
+    const viewport = Math.max(0, scrollWrapper.clientHeight - (page.headerHeight || 0));
+    const fullHeight = length * traceRowHeight;
+    const scrollHeight = Math.min(fullHeight, TRACE_MAX_SCROLL_HEIGHT);
+    const scale = scrollHeight > viewport ? Math.max(1, (fullHeight - viewport) / (scrollHeight - viewport)) : 1;
+    const offset = scrollWrapper.scrollTop * scale;
+    const first = Math.max(0, Math.floor(offset / traceRowHeight) - TRACE_ROW_BUFFER);
+    const last = Math.min(length, Math.ceil((offset + viewport) / traceRowHeight) + TRACE_ROW_BUFFER);
+    
+    const range = `${first}:${last}:${length}`;
+    if (!force && range === page.renderedRange) return;
+    page.renderedRange = range;
+    
+    const fragment = document.createDocumentFragment();
+    const top = Math.max(0, first * traceRowHeight - scrollWrapper.scrollTop * (scale - 1));
+    fragment.appendChild(spacerRow(top, columns.length));
+    const missing = new Set();
+    for (let position = first; position < last; position++) {
+        const index = traceRowIndex(page, position);
+        const event = index === null ? undefined : traceRowAt(page, index);
+        if (event === undefined) {
+            // Rows of loaded pages come from the filter worker. With browser
+            // filters, load another page once the loaded ones are matched.
+            if (index !== null) {
+                const pageIndex = Math.floor(index / page.limit);
+                if (!page.cache.pages.has(pageIndex)) {
+                    missing.add(pageIndex);
                 }
-            } else {
-                cell.textContent = event[field];
+            } else if (loadedRowsMatched(page)) {
+                missing.add(nextMissingTracePage(page));
             }
-            
-            row.appendChild(cell);
-        });
-        
-        // Add click handler to select the event
-        row.addEventListener('click', () => {
-            document.querySelectorAll('tr.event-row').forEach(r => {
-                r.classList.remove('selected');
-            });
-            row.classList.add('selected');
-            
-            // Show event details
-            showEventDetails(event);
-        });
-        
-        tableBody.appendChild(row);
-    });
+            fragment.appendChild(loadingRow(columns.length));
+        } else {
+            fragment.appendChild(eventRow(event, index, position, columns));
+        }
+    }
+    const bottom = Math.max(0, scrollHeight - top - (last - first) * traceRowHeight);
+    fragment.appendChild(spacerRow(bottom, columns.length));
+    tableBody.replaceChildren(fragment);
+    
+    // Rows are as tall as their font and padding make them; measure one the
+    // first time rows are rendered and lay the table out again if it differs
+    const renderedRow = tableBody.querySelector('tr.event-row, tr.loading-row');
+    if (!page.rowHeightMeasured && renderedRow && renderedRow.offsetHeight > 0) {
+        page.rowHeightMeasured = true;
+        if (renderedRow.offsetHeight !== traceRowHeight) {
+            traceRowHeight = renderedRow.offsetHeight;
+            renderVisibleRows(true);
+            return;
+        }
+    }
     
-    // Apply any active filters
-    filterEvents();
+    requestTracePages(page, missing);
+    requestTraceRows(page, first, last);
+    updateRowCount();
 }
 
-// Update trace table with events
-function updateTraceTable(events, fields) {
+// Render the rows coming into view when the window is resized
+window.addEventListener('resize', () => renderVisibleRows(false));
+
+// Create the events table for the columns of the trace and render the rows in view
+function updateTraceTable(fields) {
     const tableContainer = document.getElementById('eventsTableContainer');
-    if (!tableContainer) return;
+    const page = window.tracePage;
+    if (!tableContainer || !page) return;
     
-    // Store events globally for sorting/filtering
-    currentEvents = [...events];
+    page.columns = fields;
+    page.renderedRange = null;
     
     // Create table if it doesn't exist
     if (!document.getElementById('eventsTable')) {
-        // Create a scrollable wrapper
+        // Create a scrollable wrapper, the viewport of the rendered rows
         const scrollWrapper = document.createElement('div');
+        scrollWrapper.id = 'eventsTableScroll';
         scrollWrapper.className = 'table-scroll-wrapper';
         tableContainer.appendChild(scrollWrapper);
         
+        // Render the rows coming into view, at most once per frame
+        let frame = null;
+        scrollWrapper.addEventListener('scroll', () => {
+            if (frame !== null) return;
+            frame = requestAnimationFrame(() => {
+                frame = null;
+                renderVisibleRows(false);
+            });
+        });
+        
         const table = document.createElement('table');
         table.id = 'eventsTable';
-        table.className = 'table table-striped table-sm resizable-table';
+        table.className = 'table table-sm resizable-table';
         scrollWrapper.appendChild(table);
         
         // Create table header
@@ -631,15 +1079,12 @@ function updateTraceTable(events, fields) {
             th.textContent = field;
             th.className = 'sortable';
             th.dataset.column = field;
+            headerRow.appendChild(th);
             
-            // Apply stored width if available
-            if (columnWidths[field]) {
-                th.style.width = columnWidths[field] + 'px';
-                th.style.minWidth = columnWidths[field] + 'px';
-            } else {
-                // Default minimum width
-                th.style.minWidth = '100px';
-            }
+            // Apply stored width if available, otherwise fit a sample of the loaded rows.
+            // The table has a fixed layout, so rows scrolled into view keep these widths.
+            const width = columnWidths[field] || Math.min(calculateMaxColumnWidth(field) + 20, COLUMN_MAX_WIDTH);
+            setColumnWidth(th, width);
             
             // Add click handler for sorting
             th.addEventListener('click', (e) => {
@@ -656,22 +1101,43 @@ function updateTraceTable(events, fields) {
             
             // Add resize functionality
             setupResizer(resizer, th, field);
-            
-            headerRow.appendChild(th);
         });
         
         // Create table body
         const tbody = document.createElement('tbody');
         tbody.id = 'eventsTableBody';
         table.appendChild(tbody);
+        
+        // Rows are re-rendered as the table scrolls, so one handler selects them all
+        tbody.addEventListener('click', (e) => {
+            const row = e.target.closest('tr.event-row');
+            if (!row || !window.tracePage) return;
+            
+            const index = Number(row.dataset.eventIndex);
+            window.tracePage.selectedIndex = index;
+            tbody.querySelectorAll('tr.event-row.selected').forEach(r => {
+                r.classList.remove('selected');
+            });
+            row.classList.add('selected');
+            
+            // Show event details
+            const event = traceRowAt(window.tracePage, index);
+            if (event && typeof showEventDetails === 'function') {
+                showEventDetails(event);
+            }
+        });
+        
+        page.headerHeight = thead.offsetHeight;
     }
     
-    // Reset sort status
-    currentSortColumn = null;
-    currentSortDirection = 'asc';
+    // Keep the server-side sort of the trace
+    currentSortColumn = page.sort;
+    currentSortDirection = page.order;
+    updateSortIndicators();
     
-    // Render the table body
-    renderTableBody();
+    // Render the rows in view, matched against any browser filters
+    applyBrowserFilters();
+    renderVisibleRows(true);
 }
 
 // Setup column resizer
@@ -688,8 +1154,7 @@ function setupResizer(resizer, th, field) {
         const newWidth = maxWidth + 20;
         
         // Set the new width
-        th.style.width = newWidth + 'px';
-        th.style.minWidth = newWidth + 'px';
+        setColumnWidth(th, newWidth);
         columnWidths[field] = newWidth;
     });
     
@@ -717,8 +1182,7 @@ function setupResizer(resizer, th, field) {
         
         // Apply minimum width
         if (newWidth >= 50) {
-            th.style.width = newWidth + 'px';
-            th.style.minWidth = newWidth + 'px';
+            setColumnWidth(th, newWidth);
             columnWidths[field] = newWidth;
         }
     }
@@ -736,45 +1200,65 @@ function setupResizer(resizer, th, field) {
     }
 }
 
-// Calculate max width needed for a column
+// Widest a column is made to fit its values when a table is created; wider
+// values are cut off until the column is resized
+const COLUMN_MAX_WIDTH = 300;
+
+// Loaded rows measured when fitting a column to its values
+const COLUMN_WIDTH_SAMPLE = 200;
+
+// Canvas context used to measure text without laying out elements
+let textMeasureContext = null;
+
+// Width in pixels of text drawn in a CSS font
+function measureTextWidth(text, font) {
+    if (!textMeasureContext) {
+        textMeasureContext = document.createElement('canvas').getContext('2d');
+    }
+    textMeasureContext.font = font;
+    return textMeasureContext.measureText(text).width;
+}
+
+// Set the width of a column of the events table. The table has a fixed
+// layout, so its width is the sum of the widths of its columns.
+function setColumnWidth(th, width) {
+    th.style.width = width + 'px';
+    th.style.minWidth = width + 'px';
+    
+    const table = th.closest('table');
+    if (table) {
+        const headers = Array.from(table.querySelectorAll('th'));
+        table.style.width = headers.reduce((total, header) => total + (parseFloat(header.style.width) || 0), 0) + 'px';
+    }
+}
+
+// Up to COLUMN_WIDTH_SAMPLE rows of the first page, spread evenly over them
+// by the filter worker
+function sampleTraceRows(page) {
+    return page.cache.sample;
+}
+
+// Calculate max width needed for a column, from its header and a sample of
+// the loaded rows rather than every row of the trace
 function calculateMaxColumnWidth(field) {
     let maxWidth = 100;  // Default minimum
     
+    const table = document.getElementById('eventsTable');
+    if (!table) return maxWidth;
+    const style = getComputedStyle(table);
+    const font = `${style.fontSize} ${style.fontFamily}`;
+    
     // Calculate header width
-    const headerElement = document.querySelector(`th[data-column="${field}"]`);
-    if (headerElement) {
-        // Create temporary span to measure text width
-        const tempSpan = document.createElement('span');
-        tempSpan.style.visibility = 'hidden';
-        tempSpan.style.position = 'absolute';
-        tempSpan.style.whiteSpace = 'nowrap';
-        tempSpan.textContent = headerElement.textContent;
-        document.body.appendChild(tempSpan);
-        
-        const headerWidth = tempSpan.offsetWidth;
-        document.body.removeChild(tempSpan);
-        
-        maxWidth = Math.max(maxWidth, headerWidth);
-    }
+    maxWidth = Math.max(maxWidth, measureTextWidth(field, `bold ${font}`));
     
     // Calculate max content width
-    const cells = document.querySelectorAll(`td[data-column="${field}"]`);
-    cells.forEach(cell => {
-        // For content cells, create a temporary measuring element
-        const tempSpan = document.createElement('span');
-        tempSpan.style.visibility = 'hidden';
-        tempSpan.style.position = 'absolute';
-        tempSpan.style.whiteSpace = 'nowrap';
-        tempSpan.textContent = cell.textContent;
-        document.body.appendChild(tempSpan);
-        
-        const contentWidth = tempSpan.offsetWidth;
-        document.body.removeChild(tempSpan);
-        
-        maxWidth = Math.max(maxWidth, contentWidth);
-    });
+    if (window.tracePage && window.tracePage.cache) {
+        sampleTraceRows(window.tracePage).forEach(event => {
+            maxWidth = Math.max(maxWidth, measureTextWidth(cellText(event[field]), font));
+        });
+    }
     
-    return maxWidth;
+    return Math.ceil(maxWidth);
 }
 
 // Add the following CSS to your document head or stylesheet
@@ -783,7 +1267,9 @@ document.addEventListener('DOMContentLoaded', function() {
     style.textContent = `
         .table-scroll-wrapper {
             width: 100%;
-            overflow-x: auto;
+            height: calc(100vh - 220px);
+            min-height: 300px;
+            overflow: auto;
             border-radius: 4px;
             position: relative;
         }
@@ -791,6 +1277,7 @@ document.addEventListener('DOMContentLoaded', function() {
         .resizable-table {
             width: max-content;
             min-width: 100%;
+            table-layout: fixed;
         }
         
         .resizable-table th {
@@ -869,6 +1356,7 @@ function populateColumnsList(traceData) {
             <input type="text" class="filter-input" 
                    id="column-filter-${column}" 
                    placeholder="Filter ${column}..."
+                   title="e.g. BFLOAT16, /regex/i, > 100, shape[-1] >= 32 AND buffer != DRAM, or js: expression on value"
                    value="${window.columnFilters[column] || ''}">
         `;
         
@@ -911,6 +1399,21 @@ function populateColumnsList(traceData) {
     });
 }
 
+// Reload the trace with the derived columns entered in the right panel
+document.addEventListener('DOMContentLoaded', function() {
+    const derivedColumnsInput = document.getElementById('derivedColumns');
+    derivedColumnsInput.addEventListener('keydown', function(e) {
+        if (e.key !== 'Enter') return;
+        e.preventDefault();
+        const page = window.tracePage;
+        const derived = getDerivedColumns();
+        if (page && JSON.stringify(derived) !== JSON.stringify(page.derived)) {
+            page.derived = derived;
+            loadTracePage();
+        }
+    });
+});
+
 // Set up common filter
 document.addEventListener('DOMContentLoaded', function() {
     const commonFilterTextarea = document.getElementById('commonFilter');
@@ -922,70 +1425,38 @@ document.addEventListener('DOMContentLoaded', function() {
     });
 });
 
-// Update the common filter function
+// Update the common filter function. It is evaluated with the browser
+// filters, by the filter worker, which reports whether it compiled.
 function updateCommonFilter() {
     const filterText = document.getElementById('commonFilter').value.trim();
+    window.commonFilterText = filterText || null;
     
-    if (filterText) {
-        try {
-            // Create a function from the filter text
-            window.commonFilterFn = new Function('row', `
-                try {
-                    // Make all parsers available in this scope
-                    ${Object.keys(window).filter(key => 
-                        typeof window[key] === 'function' && 
-                        key.match(/(tensor|parse)[A-Za-z]*/i)
-                    ).map(key => `const ${key} = window['${key}'];`).join('\n')}
-                    
-                    return (${filterText})(row);
-                } catch (e) {
-                    console.error('Common filter execution error:', e);
-                    return true;
-                }
-            `);
-            
-            window.showToast('Filter applied successfully');
-        } catch (error) {
-            window.commonFilterFn = null;
-            window.showToast(`Invalid filter: ${error.message}`, 'error');
-        }
-    } else {
-        window.commonFilterFn = null;
-    }
-    
-    // Re-display the current trace with the filter applied
-    if (window.currentTrace) {
-        if (window.viewMode === 'consolidated') {
-            displayConsolidatedTraceData(window.currentTrace);
-        } else {
-            displayTraceData(window.currentTrace);
+    if (window.tracePage) {
+        applyBrowserFilters();
+        if (filterText) {
+            commonFilterVersion = browserFilterVersion;
         }
+        renderVisibleRows(true);
     }
 }
 
 // Update the row count after filtering
 function updateRowCount() {
-    const totalRows = document.querySelectorAll('tr.event-row').length;
-    const visibleRows = document.querySelectorAll('tr.event-row:not([style*="display: none"])').length;
-    
-    // Update row count in UI
-    const rowCountElement = document.getElementById('rowCount');
-    if (rowCountElement) {
-        if (visibleRows < totalRows) {
-            rowCountElement.textContent = `Showing ${visibleRows} of ${totalRows} rows`;
-        } else {
-            rowCountElement.textContent = `${totalRows} rows`;
-        }
-    }
-    
-    // Also update trace stats if it exists
     const traceStatsElement = document.querySelector('.trace-stats');
-    if (traceStatsElement && currentEvents) {
-        if (visibleRows < totalRows) {
-            traceStatsElement.textContent = `Showing ${visibleRows} of ${totalRows} events`;
-        } else {
-            traceStatsElement.textContent = `${totalRows} events`;
-        }
+    const page = window.tracePage;
+    if (!traceStatsElement || !page) return;
+    
+    const matching = Object.keys(page.filters).length > 0 ? ' matching' : '';
+    if (page.browserFilters && !page.matches) {
+        traceStatsElement.textContent = `Filtering ${page.total}${matching} events...`;
+    } else if (page.matches) {
+        // Browser filters apply to the rows loaded so far
+        const loaded = matchedTraceRowCount(page);
+        traceStatsElement.textContent = loaded < page.total
+            ? `Showing ${page.matches.length} of ${loaded} loaded events (${page.total}${matching} total, scroll down to load more)`
+            : `Showing ${page.matches.length} of ${page.total}${matching} events`;
+    } else {
+        traceStatsElement.textContent = `${page.total}${matching} events`;
     }
 }
 
@@ -1023,80 +1494,188 @@ function testFilter(column, filterExpression, cellValue) {
 // Make debug function available globally
 window.testFilter = testFilter;
 
+// Fetch a page dropped since it was matched and have the filter worker send
+// its rows matching the browser filters, without keeping it
+function matchDroppedTracePage(page, pageIndex) {
+    return fetch(traceValuesUrl(page, pageIndex * page.limit))
+        .then(response => response.arrayBuffer())
+        .then(buffer => filterWorkerRequest({ type: 'match', buffer: buffer }, [buffer]));
+}
+
+// Rows matching the browser filters, in trace order. The filter worker has
+// those of the pages it holds; pages dropped since they were matched are
+// fetched again and matched by the worker without being kept.
+function browserFilteredRows(page) {
+    const cache = page.cache;
+    const matchesByPage = new Map();
+    page.matches.forEach(index => {
+        const pageIndex = Math.floor(index / page.limit);
+        if (!matchesByPage.has(pageIndex)) {
+            matchesByPage.set(pageIndex, []);
+        }
+        matchesByPage.get(pageIndex).push(index);
+    });
+    
+    let rows = [];
+    let chain = Promise.resolve();
+    matchesByPage.forEach((indices, pageIndex) => {
+        chain = chain
+            .then(() => cache.pages.has(pageIndex)
+                ? filterWorkerRequest({ type: 'rows', generation: cache.generation, limit: page.limit, indices: indices })
+                : null)
+            // The page may also be dropped while the export runs
+            .then(reply => reply && reply.rows.length === indices.length ? reply : matchDroppedTracePage(page, pageIndex))
+            .then(reply => {
+                if (reply.error) {
+                    throw new Error(reply.error);
+                }
+                rows = rows.concat(reply.rows);
+            });
+    });
+    return chain.then(() => rows);
+}
+
 // Export visible data to CSV
 function exportVisibleDataToCSV(traceIdentifier, isConsolidated) {
     console.log('Export CSV clicked', { traceIdentifier, isConsolidated });
     
-    // Get the visible rows from the current table
-    const visibleRows = Array.from(document.querySelectorAll('tr.event-row:not([style*="display: none"])'));
-    console.log('Visible rows:', visibleRows.length);
+    // Paged traces are exported by the server: every row matching the server
+    // filters, in the current sort order, not only the loaded page
+    const page = window.tracePage;
+    if (page && !Object.values(window.columnFilters).some(f => (f || '').trim().startsWith(BROWSER_FILTER_PREFIX))) {
+        const url = page.consolidated
+            ? `/api/consolidated-trace/${encodeURIComponent(page.traceId)}/export-filtered-csv`
+            : `/api/trace/${page.traceId}/export-filtered-csv`;
+        downloadServerExport(url, {
+            columnFilters: page.filters,
+            derived: page.derived,
+            sort: page.sort,
+            order: page.order
+        });
+        return;
+    }
+    
+    // Only the rows in view are rendered, so export the loaded rows matching
+    // the browser filters, which the filter worker holds
+    const matches = page && page.matches ? page.matches : [];
+    console.log('Visible rows:', matches.length);
     
-    if (visibleRows.length === 0) {
+    if (matches.length === 0) {
         showToast('error', 'No data to export');
         return;
     }
     
     // Get the column headers from the table
-    const headers = Array.from(document.querySelectorAll('th.sortable')).map(th => th.dataset.column);
+    const headers = page.columns;
     console.log('Headers:', headers);
     
-    // Extract data from visible rows
-    const exportData = [];
-    visibleRows.forEach(row => {
-        const rowData = {};
-        headers.forEach(header => {
-            const cell = row.querySelector(`td[data-column="${header}"]`);
-            rowData[header] = cell ? cell.textContent : '';
+    browserFilteredRows(page).then(rows => {
+        // Extract data from matching rows
+        const exportData = [];
+        rows.forEach(event => {
+            const rowData = {};
+            headers.forEach(header => {
+                rowData[header] = cellText(event[header]);
+            });
+            exportData.push(rowData);
         });
-        exportData.push(rowData);
-    });
-    console.log('Export data sample:', exportData.slice(0, 2));
-    
-    // Generate CSV directly in the browser
-    if (exportData.length > 0) {
-        // Create CSV content
-        const csvContent = [
-            // Headers
-            headers.join(','),
-            // Data rows
-            ...exportData.map(row => 
-                headers.map(header => {
-                    const value = row[header] || '';
-                    // Escape commas and quotes
-                    return /[",\n]/.test(value) 
-                        ? `"${value.replace(/"/g, '""')}"` 
-                        : value;
-                }).join(',')
-            )
-        ].join('\n');
-        
-        // Create a blob and download link
-        const blob = new Blob([csvContent], { type: 'text/csv;charset=utf-8;' });
-        const url = URL.createObjectURL(blob);
-        const downloadLink = document.createElement('a');
-        downloadLink.href = url;
+        console.log('Export data sample:', exportData.slice(0, 2));
         
-        // Generate filename
-        let filename = 'export.csv';
-        if (traceIdentifier) {
-            filename = `trace_${traceIdentifier}${isConsolidated ? '_consolidated' : ''}_filtered.csv`;
+        // Generate CSV directly in the browser
+        if (exportData.length > 0) {
+            // Create CSV content
+            const csvContent = [
+                // Headers
+                headers.join(','),
+                // Data rows
+                ...exportData.map(row => 
+                    headers.map(header => {
+                        const value = row[header] || '';
+                        // Escape commas and quotes
+                        return /[",\n]/.test(value) 
+                            ? `"${value.replace(/"/g, '""')}"` 
+                            : value;
+                    }).join(',')
+                )
+            ].join('\n');
+            
+            // Create a blob and download link
+            const blob = new Blob([csvContent], { type: 'text/csv;charset=utf-8;' });
+            const url = URL.createObjectURL(blob);
+            const downloadLink = document.createElement('a');
+            downloadLink.href = url;
+            
+            // Generate filename
+            let filename = 'export.csv';
+            if (traceIdentifier) {
+                filename = `trace_${traceIdentifier}${isConsolidated ? '_consolidated' : ''}_filtered.csv`;
+            } else {
+                const currentDate = new Date().toISOString().split('T')[0];
+                filename = `trace_export_${currentDate}.csv`;
+            }
+            
+            downloadLink.setAttribute('download', filename);
+            document.body.appendChild(downloadLink);
+            downloadLink.click();
+            document.body.removeChild(downloadLink);
+            URL.revokeObjectURL(url);
+            
+            showToast('CSV export successful');
         } else {
-            const currentDate = new Date().toISOString().split('T')[0];
-            filename = `trace_export_${currentDate}.csv`;
+            showToast('error', 'No data to export');
+        }
+    }).catch(error => {
+        console.error('Error exporting rows:', error);
+        showToast(`Export failed: ${error.message}`, 'error');
+    });
+}
+window.exportVisibleDataToCSV = exportVisibleDataToCSV;
+
+// POST an export request and download the CSV file the server returns
+function downloadServerExport(url, body) {
+    fetch(url, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(body)
+    })
+    .then(response => {
+        if (!response.ok) {
+            return response.json().then(data => {
+                throw new Error(data.error || 'Failed to export filtered CSV');
+            });
         }
         
-        downloadLink.setAttribute('download', filename);
-        document.body.appendChild(downloadLink);
-        downloadLink.click();
-        document.body.removeChild(downloadLink);
-        URL.revokeObjectURL(url);
+        // Get filename from Content-Disposition header
+        const contentDisposition = response.headers.get('Content-Disposition');
+        let filename = 'export.csv';
+        if (contentDisposition) {
+            const filenameMatch = contentDisposition.match(/filename="?([^"]+)"?/);
+            if (filenameMatch && filenameMatch[1]) {
+                filename = filenameMatch[1];
+            }
+        }
         
-        showToast('CSV export successful');
-    } else {
-        showToast('error', 'No data to export');
-    }
+        // Convert response to blob and create download link
+        return response.blob().then(blob => {
+            const blobUrl = window.URL.createObjectURL(blob);
+            const downloadLink = document.createElement('a');
+            downloadLink.href = blobUrl;
+            downloadLink.download = filename;
+            downloadLink.style.display = 'none';
+            document.body.appendChild(downloadLink);
+            downloadLink.click();
+            window.URL.revokeObjectURL(blobUrl);
+            document.body.removeChild(downloadLink);
+            showToast('CSV export successful');
+        });
+    })
+    .catch(error => {
+        console.error('Error exporting filtered CSV:', error);
+        showToast(`Failed to export filtered CSV: ${error.message}`, 'error');
+    });
 }
-window.exportVisibleDataToCSV = exportVisibleDataToCSV;
 
 // Update the existing export functions to accept exportData parameter
 function exportFilteredTraceToCSV(traceId, exportData) {
@@ -100,7 +100,7 @@ function displayUploadsList(traceFilter = '') {
                     <i class="bi bi-file-earmark-text"></i>
                     ${trace.filename}
                 </div>
-                <div class="trace-count">${trace.row_count || 0} rows</div>
+                <div class="trace-count" title="${trace.row_count || 0} rows stored">${trace.distinct_row_count || 0} distinct rows from ${(trace.uploads || []).length} uploads</div>
             `;
             
             traceItem.addEventListener('click', function() {
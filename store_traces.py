@@ -1,64 +1,174 @@
 import os
 import csv
 import argparse
-import tempfile
 import json
+import hashlib
 from trace_db import TraceDB
-from ttnn_capture_to_csv import json_to_csv
-from json_processor import is_raw_json, process_json
+from ttnn_capture_to_csv import build_grouped_rows, operation_file_name
+from json_processor import iter_operations
 
-def read_csv_file(file_path):
-    """Read CSV file with semicolon delimiter."""
+class SimpleDF:
+    """A simple DataFrame-like structure accepted by TraceDB.add_trace."""
+    def __init__(self, headers, data):
+        self.columns = headers
+        self.values = data
+        self._index = range(len(data))
+    
+    def iterrows(self):
+        for i, row in enumerate(self.values):
+            yield i, row
+    
+    def __len__(self):
+        return len(self.values)
+
+# Bytes read at a time when fingerprinting files
+FINGERPRINT_CHUNK_SIZE = 1024 * 1024
+
+# Seconds between commits while a background ingest stores its traces, so that
+# progress updates and other writers get the database in between
+STORE_COMMIT_INTERVAL = 0.5
+
+def file_fingerprint(path):
+    """SHA-256 hex digest of a file's contents, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(FINGERPRINT_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def save_with_fingerprint(stream, path):
+    """
+    Copy a binary stream to a file, fingerprinting it on the way.
+    Returns the SHA-256 hex digest of the bytes written.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'wb') as f:
+        for chunk in iter(lambda: stream.read(FINGERPRINT_CHUNK_SIZE), b''):
+            digest.update(chunk)
+            f.write(chunk)
+    return digest.hexdigest()
+
+def iter_csv_file(file_path):
+    """Yield the rows of a CSV file with semicolon delimiter, column names first."""
     with open(file_path, 'r', encoding='utf-8') as f:
-        reader = csv.reader(f, delimiter=';')
-        headers = next(reader)  # Get column names
-        data = list(reader)     # Get all rows
-    return headers, data
+        yield from csv.reader(f, delimiter=';')
 
-def process_json_file(json_file, upload_name):
+def process_json_file(json_file, upload_name, jobs=1):
     """
-    Process a JSON file by converting it to CSVs and storing them in the database.
+    Process a JSON file and store its operations in the database.
     Automatically detects whether the JSON is in raw format (with connections/arguments)
     or already processed format (with "content" key).
     
+    The file is streamed once and each operation goes straight from the
+    reader into per-operation row groups (with duplicate rows removed), so
+    memory grows with the number of distinct rows rather than the file size.
+    Raw graphs are serialized with `jobs` worker processes (0 = one per CPU).
+    
     Returns True if successful, False otherwise.
     """
     try:
-        # Create a temporary directory for CSV files
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # Check if it's raw or processed JSON
-            with open(json_file, 'r') as f:
-                try:
-                    data = json.load(f)
-                    raw_format = is_raw_json(data)
-                except json.JSONDecodeError as e:
-                    print(f"Invalid JSON format: {str(e)}")
-                    return False
-            
-            # Set up the processed subdirectory path
-            processed_dir = os.path.join(temp_dir, "processed")
-            os.makedirs(processed_dir, exist_ok=True)
-            
-            # Process the JSON using the auto-detection in process_json
-            print(f"Processing JSON file{' (detected raw format)' if raw_format else ' (detected processed format)'}")
-            process_json(
-                json_file,
-                processed_dir,
-                is_csv=True,
-                group_by=True,
-                no_duplicates=True
-            )
-            
-            # Store the generated CSV files from the processed subdirectory
-            print(f"Looking for CSV files in: {processed_dir}")
-            store_csv_files(processed_dir, upload_name)
-            return True
+        ingest_json_file(json_file, upload_name, jobs)
+        return True
+    except json.JSONDecodeError as e:
+        print(f"Invalid JSON format: {str(e)}")
+        return False
     except Exception as e:
         print(f"Error processing JSON file: {str(e)}")
         import traceback
         traceback.print_exc()
         return False
 
+def ingest_json_file(json_file, upload_name, jobs=1, progress=None, fingerprint=None, db=None):
+    """
+    Store the operations of a JSON file in the database, raising on failure.
+    
+    A file identical to one stored before is not parsed again: the earlier
+    upload is returned instead. `fingerprint` is the file's SHA-256 hex digest
+    when the caller already has it (see save_with_fingerprint).
+    
+    `progress`, if given, is called as progress(phase, done, total): with
+    phase 'parsing' while the file is read (done/total in bytes), then with
+    phase 'storing' while traces are written (done/total in rows), or once
+    as progress('reused', 1, 1) when an earlier upload is returned.
+    
+    The upload goes to `db`, or to the default TraceDB if not given.
+    Returns the id of the new (or earlier) upload.
+    """
+    if db is None:
+        db = TraceDB()
+    if fingerprint is None:
+        fingerprint = file_fingerprint(json_file)
+    existing = db.get_upload_by_content_hash(fingerprint)
+    if existing is not None:
+        upload_id, name, created_at = existing
+        print(f"{json_file} was already stored as upload {upload_id} ({name}, {created_at}); reusing it")
+        if progress is not None:
+            progress('reused', 1, 1)
+        return upload_id
+    
+    print(f"Reading input file: {json_file}")
+    on_read = None
+    if progress is not None:
+        on_read = lambda bytes_read, total_bytes, operations: progress('parsing', bytes_read, total_bytes)
+    grouped_rows = build_grouped_rows(iter_operations(json_file, jobs, on_read), remove_duplicates=True)
+    return store_row_groups(grouped_rows, upload_name, progress, content_hash=fingerprint, db=db)
+
+def store_row_groups(grouped_rows, upload_name, progress=None, content_hash=None, db=None):
+    """
+    Store per-operation row groups in the database.
+    Each operation group becomes a separate trace entry.
+    
+    All traces are written in one transaction. With `progress`, which is called
+    as progress('storing', rows_stored, total_rows), the upload is instead
+    committed every STORE_COMMIT_INTERVAL seconds and progress reported after
+    each commit. `content_hash` is recorded on the upload once every trace
+    is stored, so later copies of the same file can reuse it. The upload goes
+    to `db`, or to the default TraceDB if not given. Returns the id of the
+    new upload.
+    """
+    # Initialize database
+    if db is None:
+        db = TraceDB()
+
+    # Create new upload
+    upload_id = db.create_upload(upload_name)
+    print(f"Created upload: {upload_name}")
+
+    print(f"Found {len(grouped_rows)} operation groups to process")
+    
+    total_rows = sum(len(group.rows) for group in grouped_rows.values())
+    commit_interval = None
+    on_commit = None
+    if progress is not None:
+        progress('storing', 0, total_rows)
+        commit_interval = STORE_COMMIT_INTERVAL
+        on_commit = lambda rows_stored: progress('storing', rows_stored, total_rows)
+    
+    with db.bulk_load(upload_id, commit_interval, on_commit) as loader:
+        for operation_name, group in grouped_rows.items():
+            sheet_name = operation_file_name(operation_name)
+            filename = f"{sheet_name}.csv"
+            headers = []
+            try:
+                print(f"Processing {filename} ({group.operation_count} operations)...")
+                headers, rows = group.finish()
+                loader.add_trace(filename, sheet_name, headers, rows)
+                print(f"Successfully stored {filename}")
+            except Exception as e:
+                error_msg = str(e)
+                print(f"Error processing {filename}: {error_msg}")
+                # Store the error in the database
+                try:
+                    loader.add_trace(filename, sheet_name, headers, [], error=error_msg)
+                except:
+                    print(f"Could not store error information for {filename}")
+    print(f"Stored {loader.rows_stored} rows in {loader.traces_stored} traces "
+          f"({loader.rows_per_second:.0f} rows/s)")
+    
+    if content_hash is not None:
+        db.set_upload_content_hash(upload_id, content_hash)
+    return upload_id
+
 def store_csv_files(directory_path, upload_name):
     """
     Read all CSV files from the specified directory and store them in the database.
@@ -84,60 +194,47 @@ def store_csv_files(directory_path, upload_name):
 
     print(f"Found {len(csv_files)} CSV files to process")
     
-    # Process each CSV file
-    for csv_file in csv_files:
-        try:
-            file_path = os.path.join(directory_path, csv_file)
-            sheet_name = os.path.splitext(csv_file)[0]  # Use filename without extension as sheet name
-            
-            print(f"Processing {csv_file}...")
-            
-            # Read CSV file with semicolon delimiter
-            headers, data = read_csv_file(file_path)
-            
-            # Create a simple DataFrame-like structure
-            class SimpleDF:
-                def __init__(self, headers, data):
-                    self.columns = headers
-                    self.values = data
-                    self._index = range(len(data))
+    # Process each CSV file, storing them all in one transaction
+    with db.bulk_load(upload_id) as loader:
+        for csv_file in csv_files:
+            headers = []
+            try:
+                file_path = os.path.join(directory_path, csv_file)
+                sheet_name = os.path.splitext(csv_file)[0]  # Use filename without extension as sheet name
                 
-                def iterrows(self):
-                    for i, row in enumerate(self.values):
-                        yield i, row
+                print(f"Processing {csv_file}...")
                 
-                def __len__(self):
-                    return len(self.values)
-
-            df = SimpleDF(headers, data)
-            
-            # Store in database
-            db.add_trace(upload_id, csv_file, sheet_name, df)
-            
-            print(f"Successfully stored {csv_file}")
-            
-        except Exception as e:
-            error_msg = str(e)
-            print(f"Error processing {csv_file}: {error_msg}")
-            # Store the error in the database
-            try:
-                # Create an empty DataFrame-like structure with the same headers
-                empty_df = SimpleDF(headers if 'headers' in locals() else [], [])
-                db.add_trace(upload_id, csv_file, sheet_name, empty_df, error=error_msg)
-            except:
-                print(f"Could not store error information for {csv_file}")
+                # Read CSV file with semicolon delimiter, row by row as it is stored
+                rows = iter_csv_file(file_path)
+                headers = next(rows)
+                loader.add_trace(csv_file, sheet_name, headers, rows)
+                
+                print(f"Successfully stored {csv_file}")
+                
+            except Exception as e:
+                error_msg = str(e)
+                print(f"Error processing {csv_file}: {error_msg}")
+                # Store the error in the database, with the headers if they could be read
+                try:
+                    loader.add_trace(csv_file, sheet_name, headers, [], error=error_msg)
+                except:
+                    print(f"Could not store error information for {csv_file}")
+    print(f"Stored {loader.rows_stored} rows in {loader.traces_stored} traces "
+          f"({loader.rows_per_second:.0f} rows/s)")
 
 def main():
     parser = argparse.ArgumentParser(description='Store trace data in the database')
     parser.add_argument('input', help='Input file (.json) or directory containing CSV files')
     parser.add_argument('name', help='Name for this upload group')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Worker processes for raw graph serialization (0 = one per CPU)')
     
     args = parser.parse_args()
     
     # Check if input is a JSON file
     if os.path.isfile(args.input) and args.input.lower().endswith('.json'):
         print(f"Processing JSON file: {args.input}")
-        if process_json_file(args.input, args.name):
+        if process_json_file(args.input, args.name, args.jobs):
             print("\nJSON file has been processed and stored in the database.")
             print("You can now use ttnn-viewer to view the data.")
     else:
@@ -146,4 +243,4 @@ def main():
         print("\nAll files have been processed. You can now use ttnn-viewer to view the data.")
 
 if __name__ == '__main__':
-    main() 
\ No newline at end of file
+    main()
@@ -0,0 +1,165 @@
+import sqlite3
+
+import pytest
+
+from trace_db import TraceDB, _BUILTIN_TENSOR_SHAPE_CODE
+
+COLUMNS = ['operation', 'arg0']
+
+@pytest.fixture
+def db(tmp_path):
+    return TraceDB(str(tmp_path / 'traces.db'))
+
+def store(db, name, traces, columns=COLUMNS):
+    """Store an upload of {filename: rows} and return its id."""
+    upload_id = db.create_upload(name)
+    with db.bulk_load(upload_id) as loader:
+        for filename, rows in traces.items():
+            loader.add_trace(filename, filename, columns, rows)
+    return upload_id
+
+def summaries(db):
+    return {summary['filename']: summary for summary in db.get_trace_summaries()}
+
+def counted_distinct_rows(db, filename):
+    """Distinct row count of a filename, counted from every stored row."""
+    conn = sqlite3.connect(db.db_path)
+    try:
+        return conn.execute('''
+            SELECT COUNT(DISTINCT row_hash) FROM trace_rows
+            WHERE trace_id IN (SELECT id FROM traces WHERE filename = ? AND error IS NULL)
+        ''', (filename,)).fetchone()[0]
+    finally:
+        conn.close()
+
+def test_summaries_follow_added_and_deleted_uploads(db):
+    first = store(db, 'first', {'a.csv': [['add', 'x'], ['add', 'x'], ['mul', 'y']]})
+    second = store(db, 'second', {'a.csv': [['mul', 'y'], ['relu', 'z']], 'b.csv': [['add', 'x']]})
+
+    summary = summaries(db)['a.csv']
+    assert summary['row_count'] == 5
+    assert summary['distinct_row_count'] == 3 == counted_distinct_rows(db, 'a.csv')
+    assert [upload['id'] for upload in summary['uploads']] == [second, first]
+
+    db.delete_upload(first)
+    summary = summaries(db)['a.csv']
+    assert summary['row_count'] == 2
+    assert summary['distinct_row_count'] == 2 == counted_distinct_rows(db, 'a.csv')
+
+    db.delete_upload(second)
+    assert summaries(db) == {}
+
+def test_rows_padded_to_different_widths_deduplicate(db):
+    # Captures pad the arguments of each operation with empty strings up to
+    # the widest operation of the capture
+    store(db, 'narrow', {'a.csv': [['relu', 'a'], ['add', 'a']]})
+    store(db, 'wide', {'a.csv': [['relu', 'a', ''], ['add', 'a', 'b']]}, COLUMNS + ['arg1'])
+
+    assert summaries(db)['a.csv']['distinct_row_count'] == 3
+    rows, total, _, _ = db.get_deduplicated_values_page_by_filename('a.csv', 0, 10)
+    assert total == 3
+    occurrences = {(row['operation'], row.get('arg1') or ''): row['_occurrences'] for row in rows}
+    assert occurrences == {('relu', ''): 2, ('add', ''): 1, ('add', 'b'): 1}
+
+def test_failed_trace_leaves_later_traces_intact(db):
+    def failing_rows():
+        for i in range(6000):
+            yield ['add', f'Tensor[{i}]']
+        raise UnicodeDecodeError('utf-8', b'\xff', 0, 1, 'invalid start byte')
+
+    upload_id = db.create_upload('upload')
+    with db.bulk_load(upload_id) as loader:
+        with pytest.raises(UnicodeDecodeError):
+            loader.add_trace('bad.csv', 'bad', COLUMNS, failing_rows())
+        trace_id = loader.add_trace('good.csv', 'good', COLUMNS, [['add', 'Tensor[1]'], ['mul', 'Tensor[5999]']])
+
+    rows, total = db.get_values_page(trace_id, 0, 10)
+    assert total == 2
+    assert [(row['operation'], row['arg0']) for row in rows] == [('add', 'Tensor[1]'), ('mul', 'Tensor[5999]')]
+
+def create_baseline_db(path):
+    """A database in the schema from before migrations, as saved by the old UI."""
+    conn = sqlite3.connect(path)
+    try:
+        with conn:
+            conn.executescript('''
+                CREATE TABLE uploads (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    created_at TIMESTAMP NOT NULL
+                );
+                CREATE TABLE traces (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    upload_id INTEGER NOT NULL,
+                    filename TEXT NOT NULL,
+                    sheet_name TEXT NOT NULL,
+                    upload_time TIMESTAMP NOT NULL,
+                    row_count INTEGER NOT NULL,
+                    column_count INTEGER NOT NULL,
+                    column_names TEXT NOT NULL,
+                    error TEXT,
+                    FOREIGN KEY (upload_id) REFERENCES uploads(id) ON DELETE CASCADE
+                );
+                CREATE TABLE trace_values (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    trace_id INTEGER NOT NULL,
+                    row_idx INTEGER NOT NULL,
+                    column_name TEXT NOT NULL,
+                    value TEXT,
+                    FOREIGN KEY (trace_id) REFERENCES traces(id) ON DELETE CASCADE
+                );
+                CREATE TABLE parsers (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL UNIQUE,
+                    code TEXT NOT NULL,
+                    created_at TIMESTAMP NOT NULL,
+                    updated_at TIMESTAMP NOT NULL
+                );
+                INSERT INTO uploads VALUES (1, 'nightly', '2025-01-01 00:00:00');
+                INSERT INTO traces VALUES (
+                    1, 1, 'a.csv', 'a', '2025-01-01 00:00:00', 1, 2, '["operation", "arg0"]', NULL
+                );
+                INSERT INTO trace_values (trace_id, row_idx, column_name, value) VALUES
+                    (1, 0, 'operation', 'ttnn::add'),
+                    (1, 0, 'arg0', 'Tensor[1, 32|BFLOAT16]');
+            ''')
+            conn.execute(
+                "INSERT INTO parsers VALUES (1, 'tensorShape', ?, '2025-01-01 00:00:00', '2025-01-01 00:00:00')",
+                (_BUILTIN_TENSOR_SHAPE_CODE,)
+            )
+    finally:
+        conn.close()
+
+def test_builtin_parser_saved_by_old_ui_derives_columns(tmp_path):
+    path = str(tmp_path / 'traces.db')
+    create_baseline_db(path)
+    db = TraceDB(path)
+
+    assert db.get_parser_by_name('tensorShape')[5] == 'shape'
+    rows, total = db.get_values_page(1, 0, 10, derived=['tensorShape(arg0)'])
+    assert total == 1
+    assert rows[0]['tensorShape(arg0)'] == '[1, 32]'
+
+def cell_strings(db):
+    conn = sqlite3.connect(db.db_path)
+    try:
+        strings = {value for (value,) in conn.execute('SELECT value FROM cell_values WHERE value IS NOT NULL')}
+        tensors = conn.execute('SELECT COUNT(*) FROM tensor_values').fetchone()[0]
+        return strings, tensors
+    finally:
+        conn.close()
+
+def test_sweep_deletes_strings_of_deleted_uploads(db):
+    old = store(db, 'old', {'a.csv': [['add', 'Tensor[1, 32|BFLOAT16]'], ['mul', 'Tensor[1, 64|BFLOAT16]']]})
+    store(db, 'new', {'a.csv': [['add', 'Tensor[1, 32|BFLOAT16]']]})
+    db.delete_upload(old)
+
+    assert db.sweep_unused_values() == 2
+    assert cell_strings(db) == ({'add', 'Tensor[1, 32|BFLOAT16]'}, 1)
+
+    # Strings stored after a sweep are found by filters over the whole dictionary
+    newer = store(db, 'newer', {'a.csv': [['relu', 'Tensor[1, 128|BFLOAT16]']] * 5})
+    trace_id = db.get_traces_for_upload(newer)[0][0]
+    rows, total = db.get_values_page(trace_id, 0, 10, filters={'arg0': 'shape[-1] = 128'})
+    assert total == 5
+    assert db.sweep_unused_values() == 0
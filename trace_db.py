@@ -1,90 +1,1206 @@
 import sqlite3
 import json
+from json.encoder import encode_basestring_ascii
 from datetime import datetime
 import os
+import time
+import hashlib
+from contextlib import contextmanager
+from itertools import chain, islice
+from queue import LifoQueue, Empty, Full
+from trace_filters import compile_column_filters, register_filter_functions, tensor_attributes
+from trace_parsers import ParserError, compile_parser, parse_derived_column
+
+SORT_ORDERS = ('asc', 'desc')
+
+# Rows store each cell as the id of its string in cell_values. Empty cells use this
+# id, whose cell_values entry is NULL, so filters see them like any other value.
+EMPTY_CELL_ID = 0
+
+def _row_hash(columns, values):
+    """
+    Content hash of a stored row, as a signed 64-bit integer. Rows of traces with
+    different column orders or extra empty columns hash the same when every
+    non-empty cell matches; empty strings, which pad the arguments of shorter
+    operations, count as empty cells.
+    """
+    cells = sorted((name, value) for name, value in zip(columns, values) if value is not None and value != '')
+    digest = hashlib.blake2b(json.dumps(cells).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+def _row_hasher(columns):
+    """
+    Return a function computing _row_hash(columns, values) for the rows of one
+    trace, with the column names sorted and encoded once.
+    """
+    if len(set(columns)) != len(columns):
+        # Repeated names are ordered by value as well; keep the general form
+        return lambda values: _row_hash(columns, values)
+    # The JSON that json.dumps gives the sorted (name, value) pairs, built cell by cell
+    prefixes = [
+        (idx, f'[{encode_basestring_ascii(columns[idx])}, ')
+        for idx in sorted(range(len(columns)), key=columns.__getitem__)
+    ]
+    
+    def row_hash(values):
+        cells = []
+        for idx, prefix in prefixes:
+            value = values[idx] if idx < len(values) else None
+            if value is not None and value != '':
+                cells.append(prefix + encode_basestring_ascii(value) + ']')
+        digest = hashlib.blake2b(f"[{', '.join(cells)}]".encode('utf-8'), digest_size=8).digest()
+        return int.from_bytes(digest, 'big', signed=True)
+    
+    return row_hash
+
+def _pack_cells(ids, values):
+    """Stored form of a row: the JSON array of the cell ids of its values."""
+    return '[' + ','.join([str(ids[value]) for value in values]) + ']'
+
+def _cell_value_sql(id_sql):
+    """SQL expression for the string of the cell id given by `id_sql`."""
+    return f'(SELECT value FROM cell_values WHERE id = {id_sql})'
+
+def _derived_id_sql(parser_id, source_sql):
+    """
+    SQL expression for the cell id of a derived column: the stored output of
+    parser `parser_id` for the source cell id given by `source_sql`.
+    """
+    return (
+        f'COALESCE((SELECT output_id FROM parser_outputs '
+        f'WHERE parser_id = {parser_id} AND value_id = {source_sql}), {EMPTY_CELL_ID})'
+    )
+
+def _compile_cell_filters(filters, id_sql, scope=None):
+    """
+    Compile column filters for rows of cell ids. Each column's filter is evaluated
+    once per distinct string, and rows match on the resulting ids.
+    `id_sql` returns the SQL expression for a column's cell id.
+    
+    Without `scope` every string in cell_values is evaluated. `scope` is a
+    (sql, params) condition on trace_rows (see _filter_scope): only the strings
+    those rows use for the column are evaluated then, so the cost does not grow
+    with the strings of other uploads.
+    
+    Returns (sql, params), or (None, []) when there is nothing to filter on.
+    """
+    clauses = []
+    params = []
+    for column, sql, column_params in compile_column_filters(
+        filters, lambda column: 'value', lambda column: 'id'
+    ):
+        if scope is None:
+            clauses.append(f'{id_sql(column)} IN (SELECT id FROM cell_values WHERE {sql})')
+        else:
+            clauses.append(
+                f'{id_sql(column)} IN (SELECT id FROM cell_values WHERE id IN '
+                f'(SELECT {id_sql(column)} FROM trace_rows WHERE {scope[0]}) AND {sql})'
+            )
+            params.extend(scope[1])
+        params.extend(column_params)
+    if not clauses:
+        return None, []
+    return ' AND '.join(clauses), params
+
+def _filter_scope(cursor, row_count, scope_sql, scope_params=()):
+    """
+    Scope for _compile_cell_filters over `row_count` rows matching `scope_sql`:
+    None (evaluate the whole dictionary) when cell_values holds no more strings
+    than there are rows to collect them from. Strings are counted from the
+    largest id, less the ids left unused by TraceDB.sweep_unused_values.
+    """
+    cursor.execute('''
+        SELECT MAX(id) - COALESCE((SELECT unused_ids FROM cell_value_gaps WHERE id = 0), 0)
+        FROM cell_values
+    ''')
+    if (cursor.fetchone()[0] or 0) <= row_count:
+        return None
+    return scope_sql, scope_params
+
+def _sort_value(value):
+    """SQL sort key for a stored cell: numbers sort numerically ahead of text."""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+# Settings applied to every pooled connection. WAL lets readers proceed while an
+# upload is being written; synchronous=NORMAL is durable across crashes in WAL mode.
+CONNECTION_PRAGMAS = (
+    ('busy_timeout', 5000),       # wait up to 5 s for a writer instead of failing
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    ('cache_size', -16384),       # 16 MB page cache per connection
+    ('mmap_size', 268435456),     # memory-map up to 256 MB of the database file
+    ('foreign_keys', 'ON'),
+)
+
+# Idle connections kept per database, and prepared statements cached per connection
+POOL_SIZE = 8
+STATEMENT_CACHE_SIZE = 256
+
+# Rows read from a cursor at a time by the row iterators (iter_values and friends)
+ROW_BATCH_SIZE = 1000
+
+# Rows backfilled by a schema migration between two commits, and seconds between
+# its progress lines
+MIGRATION_BATCH_ROWS = 50000
+MIGRATION_PROGRESS_INTERVAL = 5.0
+
+# Code of the tensorShape parser saved by the parsers UI before parsers had
+# expressions, and the expression that does the same on the server
+_BUILTIN_TENSOR_SHAPE_CODE = """function tensorShape(x) {
+  // Extract the content between the square brackets
+  const match = x.match(/Tensor\\[(.*?)\\]/);
+  if (!match) return null;
+  
+  // Split the content to get the shape part (before the first '|')
+  const parts = match[1].split('|');
+  const shapeStr = parts[0];
+  
+  // Split the shape string by 'x' and convert to integers
+  return shapeStr.split('x').map(dim => parseInt(dim, 10));
+}"""
+_BUILTIN_TENSOR_SHAPE_EXPRESSION = 'shape'
+
+# Whether the rows of a trace still store their cell strings: rows of strings hold
+# text or null cells, rows of ids only integers, and a trace is converted at once
+_STRING_ROWS_SQL = (
+    "(SELECT json_type(data, '$[0]') FROM trace_rows WHERE trace_id = {trace_id} LIMIT 1) "
+    "IN ('text', 'null')"
+)
+
+class BackfillProgress:
+    """Prints how far a schema migration backfill has got, at most every MIGRATION_PROGRESS_INTERVAL seconds."""
+    def __init__(self, label, total):
+        self.label = label
+        self.total = total
+        self.done = 0
+        self.started = time.monotonic()
+        self.last_print = self.started
+
+    def advance(self, count):
+        self.done += count
+        now = time.monotonic()
+        if now - self.last_print >= MIGRATION_PROGRESS_INTERVAL:
+            self.last_print = now
+            self._print(now)
+
+    def finish(self):
+        self._print(time.monotonic())
+
+    def _print(self, now):
+        percent = 100.0 * self.done / self.total if self.total else 100.0
+        elapsed = now - self.started
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        print(f"  {self.label}: {self.done}/{self.total} rows ({percent:.0f}%, {rate:.0f} rows/s)")
+
+class ConnectionPool:
+    """
+    Thread-safe pool of SQLite connections to one database file.
+    
+    Connections are reused across calls, so their page cache and prepared
+    statements survive between queries. Each one has the SQL functions used by
+    the paged and filtered value queries registered.
+    """
+    def __init__(self, db_path, size=POOL_SIZE):
+        self.db_path = db_path
+        self.size = size
+        self.idle = LifoQueue(maxsize=size)
+        self.pid = os.getpid()
+
+    def _open(self):
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE
+        )
+        for name, value in CONNECTION_PRAGMAS:
+            conn.execute(f'PRAGMA {name} = {value}')
+        conn.create_function('sort_value', 1, _sort_value, deterministic=True)
+        register_filter_functions(conn)
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrow a connection for one transaction: it is committed when the block
+        succeeds, rolled back when it raises, and returned to the pool either way.
+        """
+        if self.pid != os.getpid():
+            # Connections must not be shared with a forked child; start over
+            self.idle = LifoQueue(maxsize=self.size)
+            self.pid = os.getpid()
+        try:
+            conn = self.idle.get_nowait()
+        except Empty:
+            conn = self._open()
+        try:
+            with conn:
+                yield conn
+        finally:
+            try:
+                self.idle.put_nowait(conn)
+            except Full:
+                conn.close()
+
+    def close(self):
+        """Close the idle connections, e.g. before forking so children inherit none."""
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except Empty:
+                return
+
+def _check_page_args(offset, limit, order):
+    if offset < 0:
+        raise ValueError("offset must not be negative")
+    if limit is not None and limit < 0:
+        raise ValueError("limit must not be negative")
+    if order not in SORT_ORDERS:
+        raise ValueError(f"order must be one of: {', '.join(SORT_ORDERS)}")
+
+def _check_columns(requested, available):
+    unknown = [column for column in requested if column not in available]
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+
+# Rows written per executemany by TraceLoader, and cell strings whose ids it
+# keeps cached between chunks
+BULK_CHUNK_ROWS = 5000
+BULK_CACHED_STRINGS = 20000
+
+def _string_chunks(rows, size):
+    """Split an iterable of rows into lists of `size` rows of cell strings (None for empty cells)."""
+    rows = iter(rows)
+    while True:
+        chunk = [
+            [str(value) if value is not None else None for value in row]
+            for row in islice(rows, size)
+        ]
+        if not chunk:
+            return
+        yield chunk
+
+class TraceLoader:
+    """
+    Writes the traces of one upload; see TraceDB.bulk_load.
+    
+    Rows are read from any iterable and inserted BULK_CHUNK_ROWS at a time, so
+    memory does not grow with the size of a trace. Everything goes through one
+    connection, in one transaction unless `commit_interval` is given: then the
+    loader commits after the first trace that ends `commit_interval` seconds or
+    more after the last commit, and calls `on_commit(rows_stored)` with no
+    transaction open.
+    """
+    def __init__(self, db, conn, upload_id, commit_interval=None, on_commit=None):
+        self.db = db
+        self.conn = conn
+        self.cursor = conn.cursor()
+        self.upload_id = upload_id
+        self.commit_interval = commit_interval
+        self.on_commit = on_commit
+        self.ids = {None: EMPTY_CELL_ID}
+        self.pending_summaries = set()
+        self.rows_stored = 0
+        self.traces_stored = 0
+        self.started = time.monotonic()
+        self.last_commit = self.started
+
+    @property
+    def rows_per_second(self):
+        elapsed = time.monotonic() - self.started
+        return self.rows_stored / elapsed if elapsed > 0 else 0.0
+
+    def begin(self):
+        """Start a transaction, taking the write lock, unless one is open."""
+        if not self.conn.in_transaction:
+            self.cursor.execute('BEGIN IMMEDIATE')
+
+    def add_trace(self, filename, sheet_name, columns, rows, error=None):
+        """
+        Store a trace. `rows` is an iterable of sequences of cell values aligned
+        with `columns`. If reading or storing the rows raises, nothing of the trace
+        is kept and the exception propagates. Returns the trace id.
+        """
+        chunks = _string_chunks(rows, BULK_CHUNK_ROWS)
+        # Read the first chunk before taking the write lock
+        first = next(chunks, [])
+        self.begin()
+        cursor = self.cursor
+        cursor.execute('SAVEPOINT add_trace')
+        try:
+            cursor.execute('''
+                INSERT INTO traces (
+                    upload_id, filename, sheet_name, upload_time, row_count, column_count,
+                    column_names, error
+                ) VALUES (?, ?, ?, ?, 0, ?, ?, ?)
+            ''', (
+                self.upload_id,
+                filename,
+                sheet_name,
+                datetime.now().isoformat(),
+                len(columns),
+                json.dumps(columns),
+                error
+            ))
+            trace_id = cursor.lastrowid
+            
+            # Store values, one packed row of cell ids per trace row, with its content hash
+            row_hash = _row_hasher(columns)
+            row_count = 0
+            for chunk in chain([first], chunks):
+                ids = self._cell_ids(chunk)
+                cursor.executemany('''
+                    INSERT INTO trace_rows (trace_id, row_idx, data, row_hash)
+                    VALUES (?, ?, ?, ?)
+                ''', [
+                    (trace_id, row_count + idx, _pack_cells(ids, values), row_hash(values))
+                    for idx, values in enumerate(chunk)
+                ])
+                row_count += len(chunk)
+            cursor.execute('UPDATE traces SET row_count = ? WHERE id = ?', (row_count, trace_id))
+            if error is None:
+                self.db._count_summary_hashes(cursor, filename, trace_id, 1)
+        except BaseException:
+            cursor.execute('ROLLBACK TO add_trace')
+            cursor.execute('RELEASE add_trace')
+            # Strings interned for the trace were rolled back with it
+            self.ids = {None: EMPTY_CELL_ID}
+            raise
+        cursor.execute('RELEASE add_trace')
+        
+        if error is None:
+            self.pending_summaries.add(filename)
+        self.rows_stored += row_count
+        self.traces_stored += 1
+        if self.commit_interval is not None and time.monotonic() - self.last_commit >= self.commit_interval:
+            self.commit()
+        return trace_id
+
+    def _cell_ids(self, chunk):
+        """Intern the cell strings of a chunk of rows and return the {string: id} cache."""
+        if len(self.ids) > BULK_CACHED_STRINGS:
+            self.ids = {None: EMPTY_CELL_ID}
+        # New strings go in sorted, so they land in the value index in order
+        missing = sorted({value for row in chunk for value in row if value not in self.ids})
+        if missing:
+            self.ids.update(self.db._intern_values(self.cursor, missing, tensors=True))
+        return self.ids
+
+    def commit(self):
+        """Bring the summaries of the loaded filenames up to date and commit."""
+        for filename in sorted(self.pending_summaries):
+            self.db._refresh_summary(self.cursor, filename)
+        self.pending_summaries.clear()
+        self.conn.commit()
+        self.last_commit = time.monotonic()
+        if self.on_commit is not None:
+            self.on_commit(self.rows_stored)
+
+# Environment variable naming the database file TraceDB opens when not given one
+DB_PATH_ENV = 'TTNN_TRACE_DB'
+DEFAULT_DB_PATH = 'traces.db'
 
 class TraceDB:
-    def __init__(self, db_path='traces.db'):
+    def __init__(self, db_path=None):
+        if db_path is None:
+            db_path = os.environ.get(DB_PATH_ENV, DEFAULT_DB_PATH)
         self.db_path = db_path
+        self.pool = ConnectionPool(db_path)
         self.init_db()
 
     def init_db(self):
-        """Initialize the database with required tables."""
-        # If database exists but has wrong schema, delete it
-        try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                # Check if traces table has upload_id column
-                cursor.execute("PRAGMA table_info(traces)")
-                columns = [row[1] for row in cursor.fetchall()]
-                if 'upload_id' not in columns:
-                    conn.close()
-                    os.remove(self.db_path)
-                    print(f"Removed old database with incompatible schema")
-        except:
-            # If database doesn't exist or other error, we'll create it
-            pass
-
-        with sqlite3.connect(self.db_path) as conn:
+        """
+        Create the database or bring its schema up to date.
+        
+        Every migration applied to the database is recorded in schema_version, and
+        pending ones (see _schema_migrations) run in order, in place: the stored
+        uploads are converted, never discarded.
+        """
+        migrations = self._schema_migrations()
+        latest = migrations[-1][0]
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
-            
-            # Create uploads table
             cursor.execute('''
-                CREATE TABLE IF NOT EXISTS uploads (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    created_at TIMESTAMP NOT NULL
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    description TEXT NOT NULL,
+                    applied_at TIMESTAMP NOT NULL
                 )
             ''')
-            
-            # Create traces table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS traces (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    upload_id INTEGER NOT NULL,
-                    filename TEXT NOT NULL,
-                    sheet_name TEXT NOT NULL,
-                    upload_time TIMESTAMP NOT NULL,
-                    row_count INTEGER NOT NULL,
-                    column_count INTEGER NOT NULL,
-                    column_names TEXT NOT NULL,  -- JSON array of column names
-                    error TEXT,
-                    FOREIGN KEY (upload_id) REFERENCES uploads(id) ON DELETE CASCADE
+            version = self._schema_version(cursor)
+            if version > latest:
+                raise RuntimeError(
+                    f"{self.db_path} has schema version {version}, but this version of "
+                    f"ttnn-trace-viewer only knows up to {latest}; upgrade ttnn-trace-viewer to open it"
                 )
-            ''')
             
-            # Create values table for storing actual data
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS trace_values (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    trace_id INTEGER NOT NULL,
-                    row_idx INTEGER NOT NULL,
-                    column_name TEXT NOT NULL,
-                    value TEXT,
-                    FOREIGN KEY (trace_id) REFERENCES traces(id) ON DELETE CASCADE
+            vacuum = False
+            for step_version, description, step in migrations:
+                if step_version <= version:
+                    continue
+                # Check again under the write lock, in case another process migrated first
+                cursor.execute('BEGIN IMMEDIATE')
+                version = self._schema_version(cursor)
+                if step_version <= version:
+                    conn.commit()
+                    continue
+                print(f"Migrating database to schema version {step_version}: {description}")
+                vacuum = bool(step(conn, cursor)) or vacuum
+                cursor.execute(
+                    'INSERT OR IGNORE INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)',
+                    (step_version, description, datetime.now().isoformat())
                 )
-            ''')
+                conn.commit()
+                version = step_version
             
-            # Create parsers table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS parsers (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL UNIQUE,
-                    code TEXT NOT NULL,
-                    created_at TIMESTAMP NOT NULL,
-                    updated_at TIMESTAMP NOT NULL
-                )
-            ''')
+            if vacuum:
+                # Give the space of replaced data back to the file system
+                conn.execute('VACUUM')
+            print(f"Database initialized with correct schema at {self.db_path}")
+
+    def _schema_version(self, cursor):
+        cursor.execute('SELECT COALESCE(MAX(version), 0) FROM schema_version')
+        return cursor.fetchone()[0]
+
+    def _schema_migrations(self):
+        """
+        Schema migrations in the order init_db applies them, as (version, description, step).
+        
+        A step is called as step(conn, cursor) in a write transaction, which is
+        committed together with its version, and returns True if it freed enough
+        space for a VACUUM. Long backfills commit in batches (see _backfill) and
+        pick up where they stopped when interrupted. Databases from before
+        schema_version start at version 0 whatever their layout, so every step
+        checks what is already in place. Add changes as new steps with the next
+        version; never edit a step that has shipped.
+        """
+        return [
+            (1, 'uploads, traces and parsers', self._migrate_base_tables),
+            (2, 'packed trace rows', self._migrate_trace_rows),
+            (3, 'background ingest jobs', self._migrate_ingest_jobs),
+            (4, 'row content hashes', self._migrate_row_hashes),
+            (5, 'per-filename trace summaries', self._migrate_trace_summaries),
+            (6, 'cell string dictionary', self._migrate_cell_values),
+            (7, 'upload fingerprints', self._migrate_upload_fingerprints),
+            (8, 'index of active ingest jobs', self._migrate_active_jobs_index),
+            (9, 'server-side parser outputs', self._migrate_parser_outputs),
+            (10, 'typed tensor attributes', self._migrate_tensor_values),
+            (11, 'per-filename row hash counts', self._migrate_summary_hashes),
+            (12, 'row hashes ignoring empty strings', self._migrate_empty_string_hashes),
+            (13, 'unused cell string ids', self._migrate_cell_value_gaps),
+        ]
+
+    def _backfill(self, conn, label, items, backfill):
+        """
+        Call backfill(key) for each (key, rows) in `items`, committing whenever
+        MIGRATION_BATCH_ROWS rows have been backfilled since the last commit, and
+        print the progress. A key is always backfilled within one transaction, so
+        after an interruption the caller can tell the remaining keys from the data.
+        backfill must do nothing for a key that is already done, which happens when
+        another process runs the same migration.
+        """
+        if not items:
+            return
+        progress = BackfillProgress(label, sum(rows for _, rows in items))
+        pending = 0
+        for key, rows in items:
+            backfill(key)
+            progress.advance(rows)
+            pending += rows
+            if pending >= MIGRATION_BATCH_ROWS:
+                conn.commit()
+                conn.execute('BEGIN IMMEDIATE')
+                pending = 0
+        progress.finish()
+
+    def _table_exists(self, cursor, name):
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,))
+        return cursor.fetchone() is not None
+
+    def _migrate_base_tables(self, conn, cursor):
+        """Create the uploads, traces and parsers tables."""
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS uploads (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                created_at TIMESTAMP NOT NULL
+            )
+        ''')
+        
+        # Traces stored before uploads existed are kept as one upload of their own
+        cursor.execute("PRAGMA table_info(traces)")
+        columns = [row[1] for row in cursor.fetchall()]
+        if columns and 'upload_id' not in columns:
+            cursor.execute(
+                'INSERT INTO uploads (name, created_at) VALUES (?, ?)',
+                ('Traces from before uploads', datetime.now().isoformat())
+            )
+            upload_id = cursor.lastrowid
+            cursor.execute(
+                'ALTER TABLE traces ADD COLUMN upload_id INTEGER REFERENCES uploads(id) ON DELETE CASCADE'
+            )
+            cursor.execute('UPDATE traces SET upload_id = ?', (upload_id,))
+            print(f"Moved traces stored without an upload to upload {upload_id}")
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS traces (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                upload_id INTEGER NOT NULL,
+                filename TEXT NOT NULL,
+                sheet_name TEXT NOT NULL,
+                upload_time TIMESTAMP NOT NULL,
+                row_count INTEGER NOT NULL,
+                column_count INTEGER NOT NULL,
+                column_names TEXT NOT NULL,  -- JSON array of column names
+                error TEXT,
+                FOREIGN KEY (upload_id) REFERENCES uploads(id) ON DELETE CASCADE
+            )
+        ''')
+        
+        # Indexes for looking up traces by upload and by filename (consolidated view)
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_traces_upload_id ON traces(upload_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_traces_filename ON traces(filename)')
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS parsers (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL UNIQUE,
+                code TEXT NOT NULL,
+                created_at TIMESTAMP NOT NULL,
+                updated_at TIMESTAMP NOT NULL
+            )
+        ''')
+
+    def _migrate_trace_rows(self, conn, cursor):
+        """
+        Create the trace_rows table, which stores each trace row once as a JSON
+        array aligned with traces.column_names, and move the rows of the legacy
+        per-cell trace_values table into it.
+        """
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS trace_rows (
+                trace_id INTEGER NOT NULL,
+                row_idx INTEGER NOT NULL,
+                data TEXT NOT NULL,  -- JSON array of cell ids, see cell_values
+                PRIMARY KEY (trace_id, row_idx),
+                FOREIGN KEY (trace_id) REFERENCES traces(id) ON DELETE CASCADE
+            ) WITHOUT ROWID
+        ''')
+        if not self._table_exists(cursor, 'trace_values'):
+            return
+        
+        print("Moving rows from trace_values to trace_rows...")
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_trace_values_row ON trace_values(trace_id, row_idx)')
+        # Traces that already have rows were moved before an interruption
+        cursor.execute('''
+            SELECT id, column_names, row_count FROM traces
+            WHERE id IN (SELECT DISTINCT trace_id FROM trace_values)
+                AND NOT EXISTS (SELECT 1 FROM trace_rows WHERE trace_id = traces.id)
+        ''')
+        traces = cursor.fetchall()
+        columns = {trace_id: json.loads(column_names) for trace_id, column_names, _ in traces}
+        self._backfill(
+            conn, 'trace_values rows',
+            [(trace_id, row_count) for trace_id, _, row_count in traces],
+            lambda trace_id: self._move_trace_values(cursor, trace_id, columns[trace_id])
+        )
+        cursor.execute('DROP TABLE IF EXISTS trace_values')
+
+    def _move_trace_values(self, cursor, trace_id, columns):
+        """Pack the trace_values cells of a trace into trace_rows."""
+        cursor.execute('SELECT 1 FROM trace_rows WHERE trace_id = ? LIMIT 1', (trace_id,))
+        if cursor.fetchone():
+            return
+        positions = {name: idx for idx, name in enumerate(columns)}
+        
+        def packed_rows():
+            current_idx = None
+            current_row = None
+            # Read through a separate cursor so inserts can stream alongside
+            for row_idx, column_name, value in cursor.connection.execute('''
+                SELECT row_idx, column_name, value
+                FROM trace_values
+                WHERE trace_id = ?
+                ORDER BY row_idx
+            ''', (trace_id,)):
+                if column_name not in positions:
+                    continue
+                if row_idx != current_idx:
+                    if current_idx is not None:
+                        yield trace_id, current_idx, json.dumps(current_row)
+                    current_idx = row_idx
+                    current_row = [None] * len(positions)
+                current_row[positions[column_name]] = value
+            if current_idx is not None:
+                yield trace_id, current_idx, json.dumps(current_row)
+        
+        cursor.executemany('''
+            INSERT OR REPLACE INTO trace_rows (trace_id, row_idx, data)
+            VALUES (?, ?, ?)
+        ''', packed_rows())
+
+    def _migrate_ingest_jobs(self, conn, cursor):
+        """
+        Create the ingest_jobs table for background uploads. Progress lives in the
+        database so any server process can answer status requests.
+        """
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS ingest_jobs (
+                id TEXT PRIMARY KEY,
+                upload_name TEXT NOT NULL,
+                filename TEXT NOT NULL,
+                client TEXT,
+                phase TEXT NOT NULL,  -- queued, parsing, storing, done or failed
+                percent REAL NOT NULL DEFAULT 0,
+                rows_stored INTEGER NOT NULL DEFAULT 0,
+                throughput REAL NOT NULL DEFAULT 0,
+                throughput_unit TEXT,
+                upload_id INTEGER,
+                error TEXT,
+                created_at TIMESTAMP NOT NULL,
+                updated_at TIMESTAMP NOT NULL,
+                finished_at TIMESTAMP
+            )
+        ''')
+
+    def _migrate_row_hashes(self, conn, cursor):
+        """Add trace_rows.row_hash, indexed for grouping a trace's rows by content, and fill it in."""
+        cursor.execute("PRAGMA table_info(trace_rows)")
+        if 'row_hash' not in [row[1] for row in cursor.fetchall()]:
+            cursor.execute('ALTER TABLE trace_rows ADD COLUMN row_hash INTEGER')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_trace_rows_hash ON trace_rows(trace_id, row_hash)')
+        
+        cursor.execute('''
+            SELECT id, column_names, row_count FROM traces
+            WHERE EXISTS (SELECT 1 FROM trace_rows WHERE trace_id = traces.id AND row_hash IS NULL)
+        ''')
+        traces = cursor.fetchall()
+        if not traces:
+            return
+        columns = {trace_id: json.loads(column_names) for trace_id, column_names, _ in traces}
+        self._backfill(
+            conn, 'row hashes',
+            [(trace_id, row_count) for trace_id, _, row_count in traces],
+            lambda trace_id: self._fill_row_hashes(cursor, trace_id, columns[trace_id])
+        )
+        # Summaries count distinct rows by hash; step 5 builds them again
+        if self._table_exists(cursor, 'trace_summaries'):
+            cursor.execute('DELETE FROM trace_summaries')
+
+    def _fill_row_hashes(self, cursor, trace_id, columns):
+        """Compute row_hash for the rows of a trace that do not have one yet."""
+        row_hash = _row_hasher(columns)
+        cursor.execute(
+            'SELECT row_idx, data FROM trace_rows WHERE trace_id = ? AND row_hash IS NULL',
+            (trace_id,)
+        )
+        hashes = [(row_hash(json.loads(data)), trace_id, row_idx) for row_idx, data in cursor.fetchall()]
+        cursor.executemany(
+            'UPDATE trace_rows SET row_hash = ? WHERE trace_id = ? AND row_idx = ?', hashes
+        )
+
+    def _migrate_trace_summaries(self, conn, cursor):
+        """
+        Create per-filename summaries for the consolidated listing, kept up to date
+        by add_trace and delete_upload, and build the missing ones.
+        """
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS trace_summaries (
+                filename TEXT PRIMARY KEY,
+                row_count INTEGER NOT NULL,
+                distinct_row_count INTEGER NOT NULL,
+                column_names TEXT NOT NULL,  -- JSON array, consolidated column order
+                upload_ids TEXT NOT NULL  -- JSON array of contributing uploads, newest first
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute(
+            'CREATE INDEX IF NOT EXISTS idx_trace_summaries_listing '
+            'ON trace_summaries(filename COLLATE NOCASE)'
+        )
+        cursor.execute('''
+            SELECT filename, SUM(row_count) FROM traces
+            WHERE filename NOT IN (SELECT filename FROM trace_summaries)
+            GROUP BY filename
+        ''')
+        self._backfill(
+            conn, 'trace summaries', cursor.fetchall(),
+            lambda filename: self._refresh_summary(cursor, filename)
+        )
+
+    def _migrate_cell_values(self, conn, cursor):
+        """
+        Create the dictionary of cell strings, where every distinct string is
+        stored once, and replace the strings of stored rows by their ids.
+        """
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS cell_values (
+                id INTEGER PRIMARY KEY,
+                value TEXT UNIQUE  -- NULL only for EMPTY_CELL_ID
+            )
+        ''')
+        cursor.execute(
+            'INSERT OR IGNORE INTO cell_values (id, value) VALUES (?, NULL)', (EMPTY_CELL_ID,)
+        )
+        
+        cursor.execute(f'''
+            SELECT id, row_count FROM traces WHERE {_STRING_ROWS_SQL.format(trace_id='traces.id')}
+        ''')
+        traces = cursor.fetchall()
+        if not traces:
+            return False
+        self._backfill(
+            conn, 'cell strings', traces,
+            lambda trace_id: self._intern_stored_rows(cursor, trace_id)
+        )
+        return True
+
+    def _intern_stored_rows(self, cursor, trace_id):
+        """Convert the rows of a trace that store their cell strings into rows of cell ids."""
+        cursor.execute(f'SELECT {_STRING_ROWS_SQL.format(trace_id="?")}', (trace_id,))
+        if not cursor.fetchone()[0]:
+            return
+        cursor.execute('SELECT row_idx, data FROM trace_rows WHERE trace_id = ?', (trace_id,))
+        rows = [(row_idx, json.loads(data)) for row_idx, data in cursor.fetchall()]
+        ids = self._intern_values(cursor, {value for _, values in rows for value in values})
+        cursor.executemany(
+            'UPDATE trace_rows SET data = ? WHERE trace_id = ? AND row_idx = ?',
+            ((_pack_cells(ids, values), trace_id, row_idx) for row_idx, values in rows)
+        )
+
+    def _migrate_upload_fingerprints(self, conn, cursor):
+        """
+        Record the content hash of uploaded files, so identical files can reuse
+        an earlier upload, and whether an ingest job did so.
+        """
+        cursor.execute("PRAGMA table_info(uploads)")
+        if 'content_hash' not in [row[1] for row in cursor.fetchall()]:
+            # SHA-256 of the uploaded file, set once it is stored
+            cursor.execute('ALTER TABLE uploads ADD COLUMN content_hash TEXT')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_uploads_content_hash ON uploads(content_hash)')
+        cursor.execute("PRAGMA table_info(ingest_jobs)")
+        if 'reused' not in [row[1] for row in cursor.fetchall()]:
+            # 1 if the file matched an earlier upload
+            cursor.execute('ALTER TABLE ingest_jobs ADD COLUMN reused INTEGER NOT NULL DEFAULT 0')
+
+    def _migrate_active_jobs_index(self, conn, cursor):
+        """Finished jobs are never removed, so index only the active ones that status polling reads."""
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_ingest_jobs_active ON ingest_jobs(client, created_at) "
+            "WHERE phase NOT IN ('done', 'failed')"
+        )
+
+    def _migrate_parser_outputs(self, conn, cursor):
+        """
+        Give parsers an optional server-side expression (see trace_parsers) and
+        store its output for each distinct cell string, along with the traces
+        whose cells all have one.
+        """
+        cursor.execute("PRAGMA table_info(parsers)")
+        if 'expression' not in [row[1] for row in cursor.fetchall()]:
+            cursor.execute('ALTER TABLE parsers ADD COLUMN expression TEXT')
+        # The UI does not save its built-in tensorShape parser again once the
+        # server has one, so give the copy saved by older versions its expression
+        cursor.execute('''
+            UPDATE parsers SET expression = ?
+            WHERE name = 'tensorShape' AND code = ? AND expression IS NULL
+        ''', (_BUILTIN_TENSOR_SHAPE_EXPRESSION, _BUILTIN_TENSOR_SHAPE_CODE))
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS parser_outputs (
+                parser_id INTEGER NOT NULL,
+                value_id INTEGER NOT NULL,   -- cell_values id of the parsed string
+                output_id INTEGER NOT NULL,  -- cell_values id of the parser's output
+                PRIMARY KEY (parser_id, value_id)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS parser_traces (
+                parser_id INTEGER NOT NULL,
+                trace_id INTEGER NOT NULL,
+                PRIMARY KEY (parser_id, trace_id)
+            ) WITHOUT ROWID
+        ''')
+        # For forgetting the traces of deleted uploads
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_parser_traces_trace_id ON parser_traces(trace_id)')
+
+    def _migrate_tensor_values(self, conn, cursor):
+        """
+        Store the dimensions, element count, dtype, memory layout and buffer type
+        of every Tensor[...] and Shape[...] cell string in tensor_values, indexed,
+        so filters on them are SQL lookups rather than string parsing.
+        """
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS tensor_values (
+                value_id INTEGER PRIMARY KEY,  -- cell_values id of the string
+                dims TEXT NOT NULL,            -- JSON array of the dimensions
+                rank INTEGER NOT NULL,
+                numel INTEGER NOT NULL,
+                dtype TEXT COLLATE NOCASE,     -- NULL when the string does not give it
+                layout TEXT COLLATE NOCASE,
+                buffer TEXT COLLATE NOCASE
+            )
+        ''')
+        for column in ('rank', 'numel', 'dtype', 'layout', 'buffer'):
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS idx_tensor_values_{column} ON tensor_values({column})'
+            )
+        
+        # Strings are read in id order, so an interrupted backfill resumes after
+        # the last tensor it stored
+        cursor.execute('SELECT COALESCE(MAX(value_id), 0) FROM tensor_values')
+        start = cursor.fetchone()[0] + 1
+        cursor.execute('SELECT COALESCE(MAX(id), 0) FROM cell_values')
+        end = cursor.fetchone()[0] + 1
+        self._backfill(
+            conn, 'tensor strings',
+            [(first, min(MIGRATION_BATCH_ROWS, end - first)) for first in range(start, end, MIGRATION_BATCH_ROWS)],
+            lambda first: self._store_tensor_values(cursor, self._cell_range(cursor, first, MIGRATION_BATCH_ROWS))
+        )
+        return False
+
+    def _cell_range(self, cursor, first, count):
+        """The (id, string) of the cell strings with ids from `first` to `first + count - 1`."""
+        cursor.execute(
+            'SELECT id, value FROM cell_values WHERE id >= ? AND id < ?', (first, first + count)
+        )
+        return cursor.fetchall()
+
+    def _store_tensor_values(self, cursor, cells):
+        """Store the tensor attributes of those (id, string) cells that are tensors or shapes."""
+        rows = []
+        for value_id, value in cells:
+            # Most strings are not tensors; skip them without parsing
+            attributes = tensor_attributes(value) if value is not None and '[' in value else None
+            if attributes is not None:
+                rows.append((
+                    value_id, f"[{', '.join(map(str, attributes['dims']))}]", attributes['rank'], attributes['numel'],
+                    attributes['dtype'], attributes['layout'], attributes['buffer']
+                ))
+        cursor.executemany('''
+            INSERT OR IGNORE INTO tensor_values (value_id, dims, rank, numel, dtype, layout, buffer)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+
+    def _intern_values(self, cursor, values, tensors=False):
+        """
+        Store each distinct cell string once in cell_values and return {string: id}.
+        With `tensors`, the attributes of new tensor strings go in tensor_values
+        as well; only migration steps older than tensor_values leave them out.
+        """
+        strings = json.dumps([value for value in values if value is not None])
+        if tensors:
+            # New strings get ids above the largest one
+            cursor.execute('SELECT COALESCE(MAX(id), 0) FROM cell_values')
+            last_id = cursor.fetchone()[0]
+        cursor.execute(
+            'INSERT OR IGNORE INTO cell_values (value) SELECT j.value FROM json_each(?) AS j',
+            (strings,)
+        )
+        cursor.execute(
+            'SELECT value, id FROM cell_values WHERE value IN (SELECT j.value FROM json_each(?) AS j)',
+            (strings,)
+        )
+        ids = dict(cursor.fetchall())
+        if tensors:
+            self._store_tensor_values(
+                cursor, [(value_id, value) for value, value_id in ids.items() if value_id > last_id]
+            )
+        ids[None] = EMPTY_CELL_ID
+        return ids
+
+    def _cell_strings(self, cursor, id_rows):
+        """Map rows of cell ids back to rows of cell strings."""
+        ids = json.dumps(list({cell for row in id_rows for cell in row}))
+        cursor.execute(
+            'SELECT id, value FROM cell_values WHERE id IN (SELECT j.value FROM json_each(?) AS j)',
+            (ids,)
+        )
+        strings = dict(cursor.fetchall())
+        return [[strings.get(cell) for cell in row] for row in id_rows]
+
+    def _derived_columns(self, cursor, derived, available):
+        """
+        Resolve the names of derived columns, parser(column), to
+        {name: (parser_id, expression, source column)}, where the parser is the
+        saved parser of that name, the expression its server-side expression
+        (see trace_parsers) and the source one of the `available` columns.
+        Raises ValueError for malformed names, unknown columns and parsers
+        without an expression.
+        """
+        resolved = {}
+        for name in derived or ():
+            parsed = parse_derived_column(name)
+            if parsed is None:
+                raise ValueError(f"Derived columns are written parser(column), not {name}")
+            parser_name, source = parsed
+            _check_columns([source], available)
+            cursor.execute('SELECT id, expression FROM parsers WHERE name = ?', (parser_name,))
+            parser = cursor.fetchone()
+            if parser is None or parser[1] is None:
+                raise ValueError(f"{parser_name} is not a parser with a server-side expression")
+            try:
+                compile_parser(parser[1])
+            except ParserError as e:
+                raise ValueError(f"Parser {parser_name}: {e}")
+            resolved[name] = (parser[0], parser[1], source)
+        return resolved
+
+    def _materialize_derived(self, conn, derived_columns, cell_id_sql, trace_ids):
+        """
+        Store the parser outputs of the derived columns for the traces in
+        `trace_ids` that have none yet, and commit them. Each parser runs once
+        per distinct cell string and keeps its outputs across queries, traces
+        and uploads; a trace is done once all its strings have an output.
+        """
+        cursor = conn.cursor()
+        for name, (parser_id, expression, source) in derived_columns.items():
+            cursor.execute(
+                f'SELECT trace_id FROM parser_traces WHERE parser_id = ? AND trace_id IN '
+                f'({", ".join(str(trace_id) for trace_id in trace_ids)})',
+                (parser_id,)
+            )
+            done = {row[0] for row in cursor.fetchall()}
+            pending = [trace_id for trace_id in trace_ids if trace_id not in done]
+            if not pending:
+                continue
             
-            # Enable foreign key support
-            cursor.execute('PRAGMA foreign_keys = ON')
+            cursor.execute(f'''
+                SELECT id, value FROM cell_values
+                WHERE id IN (
+                    SELECT {cell_id_sql(source)} FROM trace_rows
+                    WHERE trace_id IN ({", ".join(str(trace_id) for trace_id in pending)})
+                )
+                AND id NOT IN (SELECT value_id FROM parser_outputs WHERE parser_id = ?)
+            ''', (parser_id,))
+            parser = compile_parser(expression)
+            outputs = [(value_id, parser(value)) for value_id, value in cursor.fetchall()]
             
+            # Store the outputs only if the parser was not changed meanwhile
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.execute('SELECT expression FROM parsers WHERE id = ?', (parser_id,))
+            row = cursor.fetchone()
+            if row is None or row[0] != expression:
+                conn.rollback()
+                continue
+            ids = self._intern_values(cursor, {output for _, output in outputs}, tensors=True)
+            cursor.executemany(
+                'INSERT OR IGNORE INTO parser_outputs (parser_id, value_id, output_id) VALUES (?, ?, ?)',
+                ((parser_id, value_id, ids[output]) for value_id, output in outputs)
+            )
+            cursor.executemany(
+                'INSERT OR IGNORE INTO parser_traces (parser_id, trace_id) VALUES (?, ?)',
+                ((parser_id, trace_id) for trace_id in pending)
+            )
             conn.commit()
-            print(f"Database initialized with correct schema at {self.db_path}")
+            print(f"Stored {len(outputs)} outputs of {name} for {len(pending)} traces")
+
+    def _derived_ids(self, cursor, derived_columns, trace_columns, batch, id_rows):
+        """
+        Cell ids of the derived columns of a batch of consolidated rows, one
+        list per row. Rows come from the traces of `trace_columns` ({trace id:
+        column names}), with the trace id first and their cell ids in `id_rows`.
+        """
+        derived_ids = [[] for _ in id_rows]
+        for parser_id, _, source in derived_columns.values():
+            sources = []
+            for row, ids in zip(batch, id_rows):
+                names = trace_columns[row[0]]
+                position = names.index(source) if source in names else None
+                sources.append(EMPTY_CELL_ID if position is None or position >= len(ids) else ids[position])
+            cursor.execute('''
+                SELECT value_id, output_id FROM parser_outputs
+                WHERE parser_id = ? AND value_id IN (SELECT j.value FROM json_each(?) AS j)
+            ''', (parser_id, json.dumps(list(set(sources)))))
+            outputs = dict(cursor.fetchall())
+            for extra, value_id in zip(derived_ids, sources):
+                extra.append(outputs.get(value_id, EMPTY_CELL_ID))
+        return derived_ids
+
+    def _migrate_summary_hashes(self, conn, cursor):
+        """
+        Count the rows of each content hash per filename in summary_hashes, so
+        trace summaries keep their distinct row count up to date from the rows
+        added and removed rather than by counting every stored row again.
+        """
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS summary_hashes (
+                filename TEXT NOT NULL,
+                row_hash INTEGER NOT NULL,
+                row_count INTEGER NOT NULL,  -- rows with this hash in the filename's error-free traces
+                PRIMARY KEY (filename, row_hash)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('''
+            SELECT filename, SUM(row_count) FROM traces
+            WHERE error IS NULL AND filename NOT IN (SELECT filename FROM summary_hashes)
+            GROUP BY filename
+        ''')
+        self._backfill(
+            conn, 'row hash counts', cursor.fetchall(),
+            lambda filename: self._rebuild_summary_hashes(cursor, filename)
+        )
+
+    def _migrate_empty_string_hashes(self, conn, cursor):
+        """
+        Hash the rows holding empty strings again, now that those count as empty
+        cells, so the same operation padded to different argument counts in two
+        uploads is one distinct row, and count the row hashes of every filename
+        again.
+        """
+        cursor.execute("SELECT id FROM cell_values WHERE value = ''")
+        row = cursor.fetchone()
+        if row is None:
+            return
+        empty_id = row[0]
+        cursor.execute('SELECT id, column_names, row_count FROM traces')
+        traces = cursor.fetchall()
+        columns = {trace_id: json.loads(column_names) for trace_id, column_names, _ in traces}
+        # Hashes do not change once recomputed, so an interrupted run just starts over
+        self._backfill(
+            conn, 'row hashes', [(trace_id, row_count) for trace_id, _, row_count in traces],
+            lambda trace_id: self._rehash_empty_strings(cursor, trace_id, columns[trace_id], empty_id)
+        )
+        cursor.execute('SELECT filename, SUM(row_count) FROM traces WHERE error IS NULL GROUP BY filename')
+        self._backfill(
+            conn, 'row hash counts', cursor.fetchall(),
+            lambda filename: self._rebuild_summary_hashes(cursor, filename)
+        )
+
+    def _migrate_cell_value_gaps(self, conn, cursor):
+        """
+        Remember how many ids below the largest one of cell_values no string
+        has since sweep_unused_values last ran, so the dictionary size that
+        _filter_scope weighs stays right after strings are deleted.
+        """
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS cell_value_gaps (
+                id INTEGER PRIMARY KEY CHECK (id = 0),  -- a single row
+                unused_ids INTEGER NOT NULL
+            )
+        ''')
+
+    def _rehash_empty_strings(self, cursor, trace_id, columns, empty_id):
+        """Recompute row_hash for the rows of a trace with a cell holding the empty string."""
+        cursor.execute('SELECT row_idx, data FROM trace_rows WHERE trace_id = ?', (trace_id,))
+        rows = []
+        for row_idx, data in cursor.fetchall():
+            ids = json.loads(data)
+            if empty_id in ids:
+                rows.append((row_idx, ids))
+        if not rows:
+            return
+        row_hash = _row_hasher(columns)
+        strings = self._cell_strings(cursor, [ids for _, ids in rows])
+        cursor.executemany(
+            'UPDATE trace_rows SET row_hash = ? WHERE trace_id = ? AND row_idx = ?',
+            ((row_hash(values), trace_id, row_idx) for (row_idx, _), values in zip(rows, strings))
+        )
+
+    def _rebuild_summary_hashes(self, cursor, filename):
+        """Count the row hashes of a filename from scratch and set its distinct row count."""
+        cursor.execute('DELETE FROM summary_hashes WHERE filename = ?', (filename,))
+        cursor.execute('''
+            INSERT INTO summary_hashes (filename, row_hash, row_count)
+            SELECT ?, row_hash, COUNT(*) FROM trace_rows
+            WHERE trace_id IN (SELECT id FROM traces WHERE filename = ? AND error IS NULL)
+            GROUP BY row_hash
+        ''', (filename, filename))
+        cursor.execute(
+            'UPDATE trace_summaries SET distinct_row_count = ? WHERE filename = ?',
+            (cursor.rowcount, filename)
+        )
+
+    def _count_summary_hashes(self, cursor, filename, trace_id, sign):
+        """
+        Add (sign 1) or remove (sign -1) the rows of an error-free trace from the
+        row hash counts of its filename, and change the distinct row count of the
+        filename's summary by the hashes that appear or disappear. The cost
+        depends on the trace's rows only; _refresh_summary fills in the rest of
+        the summary.
+        """
+        cursor.execute(
+            'SELECT row_hash, COUNT(*) FROM trace_rows WHERE trace_id = ? GROUP BY row_hash', (trace_id,)
+        )
+        counts = cursor.fetchall()
+        if not counts:
+            return
+        hashes = json.dumps([row_hash for row_hash, _ in counts])
+        if sign > 0:
+            cursor.execute('''
+                SELECT COUNT(*) FROM summary_hashes
+                WHERE filename = ? AND row_hash IN (SELECT j.value FROM json_each(?) AS j)
+            ''', (filename, hashes))
+            change = len(counts) - cursor.fetchone()[0]
+            cursor.executemany('''
+                INSERT INTO summary_hashes (filename, row_hash, row_count) VALUES (?, ?, ?)
+                ON CONFLICT (filename, row_hash) DO UPDATE SET row_count = row_count + excluded.row_count
+            ''', ((filename, row_hash, count) for row_hash, count in counts))
+        else:
+            cursor.executemany(
+                'UPDATE summary_hashes SET row_count = row_count - ? WHERE filename = ? AND row_hash = ?',
+                ((count, filename, row_hash) for row_hash, count in counts)
+            )
+            cursor.execute('''
+                DELETE FROM summary_hashes
+                WHERE filename = ? AND row_hash IN (SELECT j.value FROM json_each(?) AS j) AND row_count <= 0
+            ''', (filename, hashes))
+            change = -cursor.rowcount
+        # The summary's other columns are set by _refresh_summary before the commit
+        cursor.execute('''
+            INSERT INTO trace_summaries (filename, row_count, distinct_row_count, column_names, upload_ids)
+            VALUES (?, 0, ?, '[]', '[]')
+            ON CONFLICT (filename) DO UPDATE SET distinct_row_count = distinct_row_count + excluded.distinct_row_count
+        ''', (filename, change))
+
+    def _refresh_summary(self, cursor, filename):
+        """
+        Recompute the trace_summaries row of a filename from its error-free traces.
+        The distinct row count is kept by _count_summary_hashes as traces are
+        added and removed.
+        """
+        cursor.execute("""
+            SELECT t.id, t.column_names, t.row_count, t.upload_id
+            FROM traces t
+            JOIN uploads u ON t.upload_id = u.id
+            WHERE t.filename = ? AND t.error IS NULL
+            ORDER BY u.created_at DESC
+        """, (filename,))
+        traces = cursor.fetchall()
+        if not traces:
+            cursor.execute('DELETE FROM trace_summaries WHERE filename = ?', (filename,))
+            if self._table_exists(cursor, 'summary_hashes'):
+                cursor.execute('DELETE FROM summary_hashes WHERE filename = ?', (filename,))
+            return
+        
+        # Same column and upload order as get_deduplicated_values_page_by_filename
+        all_columns = []
+        upload_ids = []
+        for _, column_names, _, upload_id in traces:
+            all_columns.extend(c for c in json.loads(column_names) if c not in all_columns)
+            if upload_id not in upload_ids:
+                upload_ids.append(upload_id)
+        
+        cursor.execute('''
+            INSERT INTO trace_summaries (
+                filename, row_count, distinct_row_count, column_names, upload_ids
+            ) VALUES (?, ?, 0, ?, ?)
+            ON CONFLICT (filename) DO UPDATE SET
+                row_count = excluded.row_count,
+                column_names = excluded.column_names,
+                upload_ids = excluded.upload_ids
+        ''', (
+            filename,
+            sum(trace[2] for trace in traces),
+            json.dumps(all_columns),
+            json.dumps(upload_ids)
+        ))
 
     def create_upload(self, name):
         """Create a new upload group."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 INSERT INTO uploads (name, created_at)
@@ -92,59 +1208,112 @@ class TraceDB:
             ''', (name, datetime.now().isoformat()))
             return cursor.lastrowid
 
+    def set_upload_content_hash(self, upload_id, content_hash):
+        """Record the fingerprint of the file an upload was stored from."""
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('UPDATE uploads SET content_hash = ? WHERE id = ?', (content_hash, upload_id))
+
+    def get_upload_by_content_hash(self, content_hash):
+        """Get (id, name, created_at) of the earliest upload stored from a file with this fingerprint, or None."""
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT id, name, created_at
+                FROM uploads
+                WHERE content_hash = ?
+                ORDER BY id
+                LIMIT 1
+            ''', (content_hash,))
+            return cursor.fetchone()
+
     def delete_upload(self, upload_id):
         """Delete an upload and all its associated traces and values."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
+            cursor.execute('SELECT DISTINCT filename FROM traces WHERE upload_id = ?', (upload_id,))
+            filenames = [row[0] for row in cursor.fetchall()]
+            cursor.execute('SELECT id, filename FROM traces WHERE upload_id = ? AND error IS NULL', (upload_id,))
+            for trace_id, filename in cursor.fetchall():
+                self._count_summary_hashes(cursor, filename, trace_id, -1)
+            cursor.execute('''
+                DELETE FROM trace_rows
+                WHERE trace_id IN (SELECT id FROM traces WHERE upload_id = ?)
+            ''', (upload_id,))
+            cursor.execute('''
+                DELETE FROM parser_traces
+                WHERE trace_id IN (SELECT id FROM traces WHERE upload_id = ?)
+            ''', (upload_id,))
+            cursor.execute('DELETE FROM traces WHERE upload_id = ?', (upload_id,))
             cursor.execute('DELETE FROM uploads WHERE id = ?', (upload_id,))
+            for filename in filenames:
+                self._refresh_summary(cursor, filename)
             conn.commit()
 
-    def add_trace(self, upload_id, filename, sheet_name, df, error=None):
-        """Add a trace to the database."""
-        with sqlite3.connect(self.db_path) as conn:
+    def sweep_unused_values(self):
+        """
+        Delete the cell strings that no stored row or parser output refers to,
+        along with their tensor attributes and parser outputs.
+        
+        delete_upload leaves the strings of deleted uploads in the dictionary,
+        since telling which of them other uploads share means reading every
+        stored row; this does so once for all deleted uploads, as a maintenance
+        step (see ttnn-db-sweep). Stores that are loading meanwhile are safe:
+        the strings a load has looked up are referred to by its rows from the
+        transaction that looked them up on.
+        
+        Returns the number of strings deleted.
+        """
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
-            
-            # Store trace metadata
-            column_names = df.columns  # Already a list in SimpleDF
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.execute('CREATE TEMP TABLE used_values (id INTEGER PRIMARY KEY)')
+            cursor.execute('INSERT INTO used_values (id) VALUES (?)', (EMPTY_CELL_ID,))
             cursor.execute('''
-                INSERT INTO traces (
-                    upload_id, filename, sheet_name, upload_time, row_count, column_count, 
-                    column_names, error
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                upload_id,
-                filename,
-                sheet_name,
-                datetime.now().isoformat(),
-                len(df),
-                len(df.columns),
-                json.dumps(column_names),
-                error
-            ))
-            
-            trace_id = cursor.lastrowid
-            
-            # Store values
-            values = []
-            for idx, row in df.iterrows():
-                for col_idx, col in enumerate(df.columns):
-                    values.append((
-                        trace_id,
-                        idx,
-                        col,
-                        str(row[col_idx]) if row[col_idx] is not None else None
-                    ))
-            
-            cursor.executemany('''
-                INSERT INTO trace_values (trace_id, row_idx, column_name, value)
-                VALUES (?, ?, ?, ?)
-            ''', values)
-            
+                INSERT OR IGNORE INTO used_values (id)
+                SELECT j.value FROM trace_rows, json_each(trace_rows.data) AS j
+            ''')
+            # Outputs of unused strings go first, so strings only they produced are unused too
+            cursor.execute('DELETE FROM parser_outputs WHERE value_id NOT IN (SELECT id FROM used_values)')
+            cursor.execute('INSERT OR IGNORE INTO used_values (id) SELECT output_id FROM parser_outputs')
+            cursor.execute('DELETE FROM tensor_values WHERE value_id NOT IN (SELECT id FROM used_values)')
+            cursor.execute('DELETE FROM cell_values WHERE id NOT IN (SELECT id FROM used_values)')
+            deleted = cursor.rowcount
+            cursor.execute('DROP TABLE temp.used_values')
+            # New strings get ids above the largest one, so the unused ids below it
+            # stay as many until the next sweep
+            cursor.execute('''
+                INSERT OR REPLACE INTO cell_value_gaps (id, unused_ids)
+                SELECT 0, MAX(id) + 1 - COUNT(*) FROM cell_values
+            ''')
             conn.commit()
+            return deleted
+
+    @contextmanager
+    def bulk_load(self, upload_id, commit_interval=None, on_commit=None):
+        """
+        Store traces of an upload through a TraceLoader:
+        
+            with db.bulk_load(upload_id) as loader:
+                loader.add_trace(filename, sheet_name, columns, rows)
+        
+        The load is committed when the block ends and rolled back (to its last
+        commit, with `commit_interval`) when it raises. Summaries of the loaded
+        filenames are refreshed once per commit rather than after every trace.
+        """
+        with self.pool.connection() as conn:
+            loader = TraceLoader(self, conn, upload_id, commit_interval, on_commit)
+            yield loader
+            loader.commit()
+
+    def add_trace(self, upload_id, filename, sheet_name, df, error=None):
+        """Add a trace to the database."""
+        with self.bulk_load(upload_id) as loader:
+            loader.add_trace(filename, sheet_name, df.columns, (row for _, row in df.iterrows()), error)
 
     def get_uploads(self):
         """Get all uploads with their traces."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT 
@@ -154,9 +1323,38 @@ class TraceDB:
             ''')
             return cursor.fetchall()
 
+    def get_trace_summaries(self):
+        """
+        Get the consolidated listing: one dictionary per filename with its total and
+        distinct row counts, consolidated columns and contributing uploads
+        ({id, name, timestamp}, newest first), ordered by filename.
+        """
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT id, name, created_at FROM uploads')
+            uploads = {
+                upload_id: {'id': upload_id, 'name': name, 'timestamp': created_at}
+                for upload_id, name, created_at in cursor.fetchall()
+            }
+            cursor.execute('''
+                SELECT filename, row_count, distinct_row_count, column_names, upload_ids
+                FROM trace_summaries
+                ORDER BY filename COLLATE NOCASE
+            ''')
+            return [
+                {
+                    'filename': filename,
+                    'row_count': row_count,
+                    'distinct_row_count': distinct_row_count,
+                    'columns': json.loads(column_names),
+                    'uploads': [uploads[upload_id] for upload_id in json.loads(upload_ids)]
+                }
+                for filename, row_count, distinct_row_count, column_names, upload_ids in cursor.fetchall()
+            ]
+
     def get_traces_for_upload(self, upload_id):
         """Get all traces for a specific upload."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT 
@@ -169,7 +1367,7 @@ class TraceDB:
 
     def get_columns(self, trace_id):
         """Get column names for a specific trace."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
             cursor.execute('SELECT column_names FROM traces WHERE id = ?', (trace_id,))
             result = cursor.fetchone()
@@ -177,7 +1375,7 @@ class TraceDB:
 
     def get_traces(self, upload_id=None):
         """Get traces with optional filtering by upload_id."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
             
             query = "SELECT * FROM traces"
@@ -192,46 +1390,177 @@ class TraceDB:
             return cursor.fetchall()
 
     def get_trace_values(self, trace_id):
-        """Get values for a specific trace."""
-        with sqlite3.connect(self.db_path) as conn:
+        """Get the stored (row_idx, values) rows for a specific trace."""
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM trace_values WHERE trace_id = ?", (trace_id,))
-            return cursor.fetchall()
+            cursor.execute('''
+                SELECT row_idx, data
+                FROM trace_rows
+                WHERE trace_id = ?
+                ORDER BY row_idx
+            ''', (trace_id,))
+            rows = cursor.fetchall()
+            values = self._cell_strings(cursor, [json.loads(data) for _, data in rows])
+            return [(row_idx, row_values) for (row_idx, _), row_values in zip(rows, values)]
 
     def get_unique_values(self, column_name, table='traces'):
         """Get unique values for a column."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
             cursor.execute(f"SELECT DISTINCT {column_name} FROM {table}")
             return [row[0] for row in cursor.fetchall()]
 
     def get_values(self, trace_id):
         """Get values for a specific trace, organized by rows."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
             
-            # First, get all values for this trace
+            cursor.execute('SELECT column_names FROM traces WHERE id = ?', (trace_id,))
+            result = cursor.fetchone()
+            if not result:
+                return []
+            columns = json.loads(result[0])
+            
             cursor.execute('''
-                SELECT row_idx, column_name, value
-                FROM trace_values
+                SELECT row_idx, data
+                FROM trace_rows
                 WHERE trace_id = ?
-                ORDER BY row_idx, column_name
+                ORDER BY row_idx
             ''', (trace_id,))
+            rows = cursor.fetchall()
+            values = self._cell_strings(cursor, [json.loads(data) for _, data in rows])
             
-            values = cursor.fetchall()
-            
-            # Organize values by row
-            rows = {}
-            for row_idx, column_name, value in values:
-                if row_idx not in rows:
-                    rows[row_idx] = {'id': row_idx}
-                rows[row_idx][column_name] = value
-            
-            return list(rows.values())
+            return [
+                {'id': row_idx, **dict(zip(columns, row_values))}
+                for (row_idx, _), row_values in zip(rows, values)
+            ]
+
+    def get_values_page(self, trace_id, offset=0, limit=None, sort=None, order='asc', columns=None,
+                        filters=None, derived=None):
+        """
+        Get one page of a trace's rows, filtered, sorted, sliced and projected in SQL.
+        
+        Rows are dictionaries like those of get_values, restricted to `columns`
+        when given. `filters` maps column names to trace_filters expressions
+        that all have to match. `sort` names a column; numeric values sort
+        numerically ahead of text, and rows keep their stored order among equal
+        values. Without `sort` rows are returned in stored order.
+        
+        `derived` lists derived columns, named parser(column) after a parser
+        with a server-side expression (see _derived_columns). They follow the
+        trace's columns in the rows, and `columns`, `sort` and `filters` may
+        name them too.
+        
+        Returns (rows, total) where total is the number of rows in the trace
+        that match the filters.
+        Raises ValueError for unknown columns, malformed filters or invalid
+        paging arguments.
+        """
+        with self.pool.connection() as conn:
+            total, rows = self._values_rows(
+                conn, trace_id, offset, limit, sort, order, columns, filters, derived
+            )
+            return list(rows), total
+
+    def iter_values(self, trace_id, sort=None, order='asc', columns=None, filters=None, derived=None):
+        """
+        Iterate over the rows of get_values_page without a limit, reading them
+        from the database in batches of ROW_BATCH_SIZE instead of all at once.
+        
+        The generator holds a pooled connection until it is exhausted or closed.
+        Raises ValueError, on the first next(), for the arguments get_values_page rejects.
+        """
+        with self.pool.connection() as conn:
+            _, rows = self._values_rows(
+                conn, trace_id, 0, None, sort, order, columns, filters, derived, count=False
+            )
+            yield from rows
+
+    def _values_rows(self, conn, trace_id, offset, limit, sort, order, columns, filters, derived=None,
+                     count=True):
+        """
+        Run the query of get_values_page on `conn`.
+        Returns (total, rows) where rows is an iterator over the page's rows and
+        total is None unless `count` is set.
+        """
+        _check_page_args(offset, limit, order)
+        direction = 'DESC' if order == 'desc' else 'ASC'
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT column_names, row_count FROM traces WHERE id = ?', (trace_id,))
+        result = cursor.fetchone()
+        if not result:
+            return 0, iter(())
+        trace_columns = json.loads(result[0])
+        total = result[1] if count else None
+        positions = {name: idx for idx, name in enumerate(trace_columns)}
+        derived_columns = self._derived_columns(cursor, derived, positions)
+        
+        selected = trace_columns + list(derived_columns) if columns is None else columns
+        _check_columns(selected, {**positions, **derived_columns})
+        if sort is not None:
+            _check_columns([sort], {**positions, **derived_columns})
+        
+        def cell_id_sql(name):
+            if name in derived_columns:
+                parser_id, _, source = derived_columns[name]
+                return _derived_id_sql(parser_id, cell_id_sql(source))
+            _check_columns([name], positions)
+            return f"json_extract(data, '$[{positions[name]}]')"
+        
+        self._materialize_derived(conn, derived_columns, cell_id_sql, [trace_id])
+        
+        scope = _filter_scope(cursor, result[1], 'trace_id = ?', (trace_id,)) if filters else None
+        where_sql, where_params = _compile_cell_filters(filters, cell_id_sql, scope)
+        condition = 'trace_id = ?' if where_sql is None else f'trace_id = ? AND {where_sql}'
+        if where_sql is not None and count:
+            cursor.execute(f'SELECT COUNT(*) FROM trace_rows WHERE {condition}', (trace_id, *where_params))
+            total = cursor.fetchone()[0]
+        
+        # Sort on row ids and keys only, then fetch the data of the page's rows
+        if sort is None:
+            sort_key = 'row_idx'
+        else:
+            sort_key = f'sort_value({_cell_value_sql(cell_id_sql(sort))})'
+        # The page's query reads `data` of its rows only, so cell_id_sql applies to them
+        if columns is None:
+            values_sql = ', '.join(['r.data'] + [cell_id_sql(name) for name in derived_columns])
+        else:
+            values_sql = ', '.join(cell_id_sql(name) for name in selected)
+        
+        cursor.execute(f'''
+            SELECT r.row_idx, {values_sql}
+            FROM (
+                SELECT row_idx, {sort_key} AS sort_key
+                FROM trace_rows
+                WHERE {condition}
+                ORDER BY sort_key {direction}, row_idx
+                LIMIT ? OFFSET ?
+            ) AS page
+            JOIN trace_rows r ON r.trace_id = ? AND r.row_idx = page.row_idx
+            ORDER BY page.sort_key {direction}, page.row_idx
+        ''', (trace_id, *where_params, -1 if limit is None else limit, offset, trace_id))
+        
+        def rows():
+            # Cell strings are looked up per batch on a second cursor, since
+            # this one is still stepping through the query
+            lookup = conn.cursor()
+            while True:
+                batch = cursor.fetchmany(ROW_BATCH_SIZE)
+                if not batch:
+                    return
+                if columns is None:
+                    values = self._cell_strings(lookup, [json.loads(row[1]) + list(row[2:]) for row in batch])
+                else:
+                    values = self._cell_strings(lookup, [row[1:] for row in batch])
+                for row, row_values in zip(batch, values):
+                    yield {'id': row[0], **dict(zip(selected, row_values))}
+        
+        return total, rows()
 
     def get_all_traces(self):
         """Get all traces from the database."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT id, filename, sheet_name, error, row_count, upload_id
@@ -242,7 +1571,7 @@ class TraceDB:
             
     def get_trace_by_id(self, trace_id):
         """Get a specific trace by ID."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT id, filename, sheet_name, error, row_count, upload_id
@@ -253,7 +1582,7 @@ class TraceDB:
             
     def get_traces_by_filename(self, filename):
         """Get all traces with a specific filename."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT id, filename, sheet_name, error, row_count, upload_id
@@ -265,14 +1594,14 @@ class TraceDB:
             
     def get_upload(self, upload_id):
         """Get upload information by ID."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT * FROM uploads WHERE id = ?", (upload_id,))
             return cursor.fetchone()
 
     def rename_upload(self, upload_id, new_name):
         """Rename an upload."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 UPDATE uploads 
@@ -282,63 +1611,211 @@ class TraceDB:
             conn.commit()
 
     def get_deduplicated_values_by_filename(self, filename):
-        """Get deduplicated values for all traces with a given filename."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            # First get all trace IDs for this filename
-            cursor.execute("""
-                SELECT t.id, t.upload_id, u.name as upload_name, u.created_at
-                FROM traces t
-                JOIN uploads u ON t.upload_id = u.id
-                WHERE t.filename = ? AND t.error IS NULL
-                ORDER BY u.created_at DESC
-            """, (filename,))
-            traces = cursor.fetchall()
-            
-            if not traces:
-                return []
-            
-            # Create a list to store all events from all traces
-            all_events = []
-            
-            # Process each trace to build complete events
-            for trace_id, upload_id, upload_name, upload_time in traces:
-                # Get all values for this trace
-                cursor.execute("""
-                    SELECT row_idx, column_name, value
-                    FROM trace_values
-                    WHERE trace_id = ?
-                    ORDER BY row_idx, column_name
-                """, (trace_id,))
-                
-                values = cursor.fetchall()
-                
-                # Group values by row to form complete events
-                rows = {}
-                for row_idx, column_name, value in values:
-                    if row_idx not in rows:
-                        rows[row_idx] = {
-                            'id': row_idx,
-                            '_upload_id': upload_id,
-                            '_upload_name': upload_name,
-                            '_upload_time': upload_time
-                        }
-                    rows[row_idx][column_name] = value
-                
-                # Add these complete events to our list
-                all_events.extend(list(rows.values()))
-            
-            return all_events
+        """
+        Get the distinct rows of all traces with a given filename.
+        
+        Each row appears once, as first found in the newest upload, with
+        `_occurrences` (how many stored rows have the same content) and
+        `_uploads` (ids of the uploads containing it, newest first).
+        """
+        rows, _, _, _ = self.get_deduplicated_values_page_by_filename(filename)
+        return rows
+
+    def get_deduplicated_values_page_by_filename(self, filename, offset=0, limit=None, sort=None,
+                                                order='asc', columns=None, filters=None, derived=None):
+        """
+        Get one page of the distinct rows of all traces with a given filename.
+        
+        Rows are the events of get_deduplicated_values_by_filename, grouped by
+        content hash in one SQL query, then filtered, sorted and sliced like
+        get_values_page. Without `sort` they keep the order of their first
+        occurrence (newest upload first). Traces of different uploads may have
+        different columns; `columns`, `sort` and `filters` may name any column
+        of any of them, or any of the `derived` columns (see get_values_page).
+        
+        Returns (rows, total, columns, uploads): the page of rows, the number of
+        distinct rows that match the filters, the consolidated column names
+        (followed by the derived ones) and the uploads ({id, name, timestamp})
+        the traces belong to.
+        Raises ValueError for unknown columns, malformed filters or invalid
+        paging arguments.
+        """
+        with self.pool.connection() as conn:
+            total, all_columns, uploads, rows = self._distinct_values(
+                conn, filename, offset, limit, sort, order, columns, filters, derived
+            )
+            return list(rows), total, all_columns, uploads
+
+    def iter_deduplicated_values_by_filename(self, filename, sort=None, order='asc', columns=None,
+                                             filters=None, derived=None):
+        """
+        Iterate over the rows of get_deduplicated_values_page_by_filename without
+        a limit, reading them from the database in batches of ROW_BATCH_SIZE.
+        
+        The generator holds a pooled connection until it is exhausted or closed.
+        Raises ValueError, on the first next(), for the arguments
+        get_deduplicated_values_page_by_filename rejects.
+        """
+        with self.pool.connection() as conn:
+            _, _, _, rows = self._distinct_values(
+                conn, filename, 0, None, sort, order, columns, filters, derived, count=False
+            )
+            yield from rows
+
+    def _distinct_values(self, conn, filename, offset, limit, sort, order, columns, filters, derived=None,
+                         count=True):
+        """
+        Run the query of get_deduplicated_values_page_by_filename on `conn`.
+        Returns (total, columns, uploads, rows) where rows is an iterator over the
+        page's rows and total is None unless `count` is set.
+        """
+        _check_page_args(offset, limit, order)
+        direction = 'DESC' if order == 'desc' else 'ASC'
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT t.id, t.column_names, t.upload_id, u.name, u.created_at, t.row_count
+            FROM traces t
+            JOIN uploads u ON t.upload_id = u.id
+            WHERE t.filename = ? AND t.error IS NULL
+            ORDER BY u.created_at DESC
+        """, (filename,))
+        traces = cursor.fetchall()
+        if not traces:
+            return 0, [], [], iter(())
+        
+        trace_columns = {}
+        trace_meta = {}
+        all_columns = []
+        uploads = []
+        row_count = 0
+        for rank, (trace_id, column_names, upload_id, upload_name, upload_time, rows) in enumerate(traces):
+            trace_columns[trace_id] = json.loads(column_names)
+            trace_meta[trace_id] = (rank, upload_id, upload_name, upload_time)
+            row_count += rows
+            all_columns.extend(c for c in trace_columns[trace_id] if c not in all_columns)
+            if upload_id not in [upload['id'] for upload in uploads]:
+                uploads.append({'id': upload_id, 'name': upload_name, 'timestamp': upload_time})
+        
+        derived_columns = self._derived_columns(cursor, derived, all_columns)
+        all_columns += [name for name in derived_columns if name not in all_columns]
+        selected = all_columns if columns is None else columns
+        _check_columns(selected, all_columns)
+        if sort is not None:
+            _check_columns([sort], all_columns)
+        
+        def cell_id_sql(name):
+            if name in derived_columns:
+                parser_id, _, source = derived_columns[name]
+                return _derived_id_sql(parser_id, cell_id_sql(source))
+            # The column's position differs per trace, so pick the JSON path by
+            # trace; traces without the column have an empty cell
+            _check_columns([name], all_columns)
+            paths = ' '.join(
+                f"WHEN {trace_id} THEN '$[{names.index(name)}]'"
+                for trace_id, names in trace_columns.items() if name in names
+            )
+            return f"COALESCE(json_extract(data, CASE trace_id {paths} END), {EMPTY_CELL_ID})"
+        
+        self._materialize_derived(conn, derived_columns, cell_id_sql, list(trace_columns))
+        trace_ids = ', '.join(str(trace_id) for trace_id in trace_columns)
+        condition = f'trace_id IN ({trace_ids})'
+        scope = _filter_scope(cursor, row_count, condition) if filters else None
+        where_sql, where_params = _compile_cell_filters(filters, cell_id_sql, scope)
+        if where_sql is not None:
+            condition += f' AND {where_sql}'
+        total = None
+        if count:
+            if where_sql is None:
+                cursor.execute('SELECT distinct_row_count FROM trace_summaries WHERE filename = ?', (filename,))
+            else:
+                cursor.execute(f'SELECT COUNT(DISTINCT row_hash) FROM trace_rows WHERE {condition}', where_params)
+            total = cursor.fetchone()[0]
+        
+        sort_key = 'NULL' if sort is None else f'sort_value({_cell_value_sql(cell_id_sql(sort))})'
+        self._query_distinct_rows(
+            cursor, trace_meta, condition, where_params, sort_key, offset, limit,
+            direction, 'ASC' if sort is not None else direction
+        )
+        
+        def rows():
+            # Cell strings are looked up per batch on a second cursor, since
+            # this one is still stepping through the query
+            lookup = conn.cursor()
+            upload_order = [upload['id'] for upload in uploads]
+            while True:
+                batch = cursor.fetchmany(ROW_BATCH_SIZE)
+                if not batch:
+                    return
+                id_rows = [json.loads(row[2]) for row in batch]
+                derived_ids = self._derived_ids(lookup, derived_columns, trace_columns, batch, id_rows)
+                batch_values = self._cell_strings(lookup, [ids + extra for ids, extra in zip(id_rows, derived_ids)])
+                for (trace_id, row_idx, _, occurrences, upload_ids), row_values in zip(batch, batch_values):
+                    _, upload_id, upload_name, upload_time = trace_meta[trace_id]
+                    event = {
+                        'id': row_idx,
+                        '_upload_id': upload_id,
+                        '_upload_name': upload_name,
+                        '_upload_time': upload_time,
+                        '_occurrences': occurrences,
+                        '_uploads': sorted(
+                            {int(upload) for upload in upload_ids.split(',')}, key=upload_order.index
+                        )
+                    }
+                    values = dict(zip(trace_columns[trace_id] + list(derived_columns), row_values))
+                    if columns is None:
+                        event.update(values)
+                    else:
+                        event.update((name, values[name]) for name in selected if name in values)
+                    yield event
+        
+        return total, all_columns, uploads, rows()
+
+    def _query_distinct_rows(self, cursor, trace_meta, condition, params, sort_key, offset, limit,
+                             direction, position_direction):
+        """
+        Group the rows matching `condition` by content hash and query a page of
+        (trace_id, row_idx, data, occurrences, upload_ids) for the groups, ordered by
+        `sort_key` and then by the position of each group's first row (trace rank,
+        row index). upload_ids is a comma-separated list. The rows are left on
+        `cursor` for the caller to fetch.
+        """
+        rank_sql = 'CASE trace_id ' + ' '.join(
+            f'WHEN {trace_id} THEN {meta[0]}' for trace_id, meta in trace_meta.items()
+        ) + ' END'
+        upload_sql = 'CASE trace_id ' + ' '.join(
+            f'WHEN {trace_id} THEN {meta[1]}' for trace_id, meta in trace_meta.items()
+        ) + ' END'
+        
+        # With a single min() aggregate SQLite takes the bare columns (trace_id,
+        # row_idx, sort_key) from the group's first row. Sort on row ids and keys
+        # only, then fetch the data of the page's rows.
+        cursor.execute(f'''
+            SELECT r.trace_id, r.row_idx, r.data, page.occurrences, page.upload_ids
+            FROM (
+                SELECT
+                    trace_id, row_idx, {sort_key} AS sort_key,
+                    MIN(({rank_sql}) * 4294967296 + row_idx) AS position,
+                    COUNT(*) AS occurrences,
+                    group_concat(DISTINCT {upload_sql}) AS upload_ids
+                FROM trace_rows
+                WHERE {condition}
+                GROUP BY row_hash
+                ORDER BY sort_key {direction}, position {position_direction}
+                LIMIT ? OFFSET ?
+            ) AS page
+            JOIN trace_rows r ON r.trace_id = page.trace_id AND r.row_idx = page.row_idx
+            ORDER BY page.sort_key {direction}, page.position {position_direction}
+        ''', (*params, -1 if limit is None else limit, offset))
 
     # Parser-related methods
     
     def get_all_parsers(self):
         """Get all parsers from the database."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
-                SELECT id, name, code, created_at, updated_at 
+                SELECT id, name, code, created_at, updated_at, expression
                 FROM parsers
                 ORDER BY name
             """)
@@ -346,10 +1823,10 @@ class TraceDB:
     
     def get_parser(self, parser_id):
         """Get a specific parser by ID."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
-                SELECT id, name, code, created_at, updated_at 
+                SELECT id, name, code, created_at, updated_at, expression
                 FROM parsers
                 WHERE id = ?
             """, (parser_id,))
@@ -357,49 +1834,121 @@ class TraceDB:
     
     def get_parser_by_name(self, name):
         """Get a specific parser by name."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
-                SELECT id, name, code, created_at, updated_at 
+                SELECT id, name, code, created_at, updated_at, expression
                 FROM parsers
                 WHERE name = ?
             """, (name,))
             return cursor.fetchone()
     
-    def create_parser(self, name, code):
-        """Create a new parser."""
+    def create_parser(self, name, code, expression=None):
+        """
+        Create a new parser. `expression` is its optional server-side form
+        (see trace_parsers), which derived columns run.
+        """
         now = datetime.now().isoformat()
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
             try:
                 cursor.execute("""
-                    INSERT INTO parsers (name, code, created_at, updated_at)
-                    VALUES (?, ?, ?, ?)
-                """, (name, code, now, now))
+                    INSERT INTO parsers (name, code, created_at, updated_at, expression)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (name, code, now, now, expression))
                 return cursor.lastrowid
             except sqlite3.IntegrityError:
                 # Parser with this name already exists
                 return None
     
-    def update_parser(self, parser_id, name, code):
-        """Update an existing parser."""
+    def update_parser(self, parser_id, name, code, expression=None):
+        """
+        Update an existing parser. The stored outputs of its server-side
+        expression are dropped when the expression changes.
+        """
         now = datetime.now().isoformat()
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
             try:
+                cursor.execute('SELECT expression FROM parsers WHERE id = ?', (parser_id,))
+                previous = cursor.fetchone()
                 cursor.execute("""
                     UPDATE parsers
-                    SET name = ?, code = ?, updated_at = ?
+                    SET name = ?, code = ?, updated_at = ?, expression = ?
                     WHERE id = ?
-                """, (name, code, now, parser_id))
-                return cursor.rowcount > 0
+                """, (name, code, now, expression, parser_id))
+                updated = cursor.rowcount > 0
+                if previous is not None and previous[0] != expression:
+                    self._drop_parser_outputs(cursor, parser_id)
+                return updated
             except sqlite3.IntegrityError:
                 # Parser with this name already exists
                 return False
     
     def delete_parser(self, parser_id):
         """Delete a parser."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM parsers WHERE id = ?", (parser_id,))
-            return cursor.rowcount > 0 
\ No newline at end of file
+            deleted = cursor.rowcount > 0
+            self._drop_parser_outputs(cursor, parser_id)
+            return deleted
+
+    def _drop_parser_outputs(self, cursor, parser_id):
+        """Forget the stored outputs of a parser, so derived columns compute them again."""
+        cursor.execute('DELETE FROM parser_outputs WHERE parser_id = ?', (parser_id,))
+        cursor.execute('DELETE FROM parser_traces WHERE parser_id = ?', (parser_id,))
+
+    # Columns of ingest_jobs that update_job may change
+    JOB_FIELDS = (
+        'phase', 'percent', 'rows_stored', 'throughput', 'throughput_unit',
+        'upload_id', 'reused', 'error', 'finished_at'
+    )
+
+    def create_job(self, job_id, upload_name, filename, client=None):
+        """Register a new queued ingest job."""
+        now = datetime.now().isoformat()
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO ingest_jobs (id, upload_name, filename, client, phase, created_at, updated_at)
+                VALUES (?, ?, ?, ?, 'queued', ?, ?)
+            """, (job_id, upload_name, filename, client, now, now))
+            conn.commit()
+
+    def update_job(self, job_id, **fields):
+        """Update the progress fields of an ingest job."""
+        unknown = set(fields) - set(self.JOB_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown job fields: {', '.join(sorted(unknown))}")
+        assignments = ', '.join(f"{name} = ?" for name in fields)
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                UPDATE ingest_jobs
+                SET {assignments}, updated_at = ?
+                WHERE id = ?
+            """, (*fields.values(), datetime.now().isoformat(), job_id))
+            conn.commit()
+
+    def get_job(self, job_id):
+        """Get an ingest job as a dictionary, or None if it does not exist."""
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            cursor.execute("SELECT * FROM ingest_jobs WHERE id = ?", (job_id,))
+            row = cursor.fetchone()
+            return dict(row) if row else None
+
+    def get_active_jobs(self, client=None):
+        """Get ingest jobs that are queued or running, optionally only those of one client."""
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            query = "SELECT * FROM ingest_jobs WHERE phase NOT IN ('done', 'failed')"
+            params = ()
+            if client is not None:
+                query += " AND client = ?"
+                params = (client,)
+            cursor.execute(query + " ORDER BY created_at", params)
+            return [dict(row) for row in cursor.fetchall()]
@@ -0,0 +1,324 @@
+"""
+Filter language for trace rows, compiled to SQL.
+
+A filter is written against one column and matches the cell value:
+
+    BFLOAT16                    case-insensitive substring (bare words form one phrase)
+    "TILE | L1"                 quoted substring, for text containing keywords or symbols
+    /^ttnn::(add|mul)$/i        regular expression, with optional i flag
+    > 100                       numeric comparison on the cell (=, !=, <, <=, >, >=)
+    shape[0] >= 32              comparison on a dimension of a Tensor[...] or Shape[...] value
+    shape[-1] = 64              negative indexes count from the last dimension
+    rank = 4                    comparison on the number of dimensions
+    numel > 16000000            comparison on the number of elements
+    dtype = BFLOAT16            attributes of a Tensor[dims | dtype | layout | buffer] value,
+    layout != INTERLEAVED       compared case-insensitively with = or !=
+    buffer = DRAM
+
+Predicates combine with AND, OR, NOT (upper case) and parentheses; AND binds tighter than OR:
+
+    shape[-1] > 1024 AND (BFLOAT16 OR BFLOAT8_B) AND NOT DRAM
+
+compile_column_filters turns each filter of a {column: filter} mapping into
+its own SQL condition on the column's value, for the caller to combine (TraceDB
+matches each against the cell_values dictionary); the SQL functions the
+conditions rely on are registered with register_filter_functions. Given the
+SQL of a cell's id in cell_values as well, shape, rank, numel and tensor
+attribute checks look the cell up in the indexed tensor_values table (see
+TraceDB and tensor_attributes) instead of parsing its string.
+"""
+import math
+import re
+from functools import lru_cache
+
+KEYWORDS = ('AND', 'OR', 'NOT')
+
+_TOKEN = re.compile(r'''
+    (?P<space>\s+)
+  | (?P<regex>/(?:\\.|[^/\\])*/i?)
+  | (?P<quoted>"(?:\\.|[^"\\])*")
+  | (?P<op>!=|<=|>=|=|<|>)
+  | (?P<lparen>\()
+  | (?P<rparen>\))
+  | (?P<shape>shape\s*\[\s*-?\d+\s*\])
+  | (?P<number>-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?(?![^\s()]))
+  | (?P<word>[^\s()"]+)
+''', re.VERBOSE)
+
+# Leading dimension list of a Tensor[1,32,64 | ...] or Shape[1, 32, 64] cell
+_SHAPE = re.compile(r'^\s*(?:Tensor|Shape)\[\s*(\d+(?:\s*,\s*\d+)*)?\s*[|\]]')
+
+# Dimension list, as _SHAPE, and the fields after it of a Tensor[dims | dtype | layout | buffer] cell
+_TENSOR = re.compile(r'^\s*(?:Tensor|Shape)\[\s*(\d+(?:\s*,\s*\d+)*)?\s*(?:\]|\|([^\]]*))')
+
+# Tensor attributes that filters compare with a number, and with a text
+NUMERIC_TENSOR_FIELDS = ('rank', 'numel')
+TEXT_TENSOR_FIELDS = ('dtype', 'layout', 'buffer')
+
+class FilterError(ValueError):
+    """Raised when a filter expression cannot be parsed."""
+
+def _tokenize(text):
+    tokens = []
+    pos = 0
+    while pos < len(text):
+        match = _TOKEN.match(text, pos)
+        if not match:
+            raise FilterError(f"Unexpected character at position {pos}: {text[pos]!r}")
+        kind = match.lastgroup
+        value = match.group()
+        if kind == 'word' and value in KEYWORDS:
+            kind = value
+        if kind != 'space':
+            tokens.append((kind, value, match.start(), match.end()))
+        pos = match.end()
+    return tokens
+
+class _Parser:
+    """Recursive-descent parser producing (sql, params) for one column expression."""
+    def __init__(self, text, value_sql, id_sql=None):
+        self.text = text
+        self.tokens = _tokenize(text)
+        self.pos = 0
+        self.value_sql = value_sql
+        self.id_sql = id_sql
+
+    def peek(self):
+        return self.tokens[self.pos][0] if self.pos < len(self.tokens) else None
+
+    def take(self, *kinds):
+        kind = self.peek()
+        if kind not in kinds:
+            found = repr(self.tokens[self.pos][1]) if kind else 'end of filter'
+            raise FilterError(f"Expected {' or '.join(kinds)} but found {found}")
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def parse(self):
+        if not self.tokens:
+            raise FilterError("Empty filter")
+        sql, params = self.parse_or()
+        if self.peek() is not None:
+            raise FilterError(f"Expected AND or OR before {self.tokens[self.pos][1]!r}")
+        return sql, params
+
+    def parse_or(self):
+        sql, params = self.parse_and()
+        while self.peek() == 'OR':
+            self.take('OR')
+            right_sql, right_params = self.parse_and()
+            sql, params = f"({sql} OR {right_sql})", params + right_params
+        return sql, params
+
+    def parse_and(self):
+        sql, params = self.parse_unary()
+        while self.peek() == 'AND':
+            self.take('AND')
+            right_sql, right_params = self.parse_unary()
+            sql, params = f"({sql} AND {right_sql})", params + right_params
+        return sql, params
+
+    def parse_unary(self):
+        kind = self.peek()
+        if kind == 'NOT':
+            self.take('NOT')
+            sql, params = self.parse_unary()
+            return f"(NOT {sql})", params
+        if kind == 'lparen':
+            self.take('lparen')
+            sql, params = self.parse_or()
+            self.take('rparen')
+            return sql, params
+        return self.parse_predicate()
+
+    def parse_predicate(self):
+        value = self.value_sql
+        kind = self.peek()
+        if kind == 'regex':
+            _, token, _, _ = self.take('regex')
+            pattern = token[1:-1] if token.endswith('/') else '(?i)' + token[1:-2]
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                raise FilterError(f"Invalid regular expression {token}: {e}")
+            return f"COALESCE({value} REGEXP ?, 0)", [pattern]
+        if kind == 'quoted':
+            _, token, _, _ = self.take('quoted')
+            return self.substring(re.sub(r'\\(.)', r'\1', token[1:-1]))
+        if kind == 'shape':
+            _, token, _, _ = self.take('shape')
+            index = int(re.search(r'-?\d+', token).group())
+            op, number = self.comparison()
+            path = f'$[{index}]' if index >= 0 else f'$[#{index}]'
+            return self.tensor_predicate(
+                f"json_extract(dims, ?) {op} ?", [path, number],
+                f"shape_dim({value}, ?) {op} ?", [index, number],
+                indexed=False
+            )
+        field = self.at_tensor_field()
+        if field in NUMERIC_TENSOR_FIELDS:
+            self.take('word')
+            op, number = self.comparison()
+            return self.tensor_predicate(
+                f"{field} {op} ?", [number],
+                f"tensor_field({value}, '{field}') {op} ?", [number]
+            )
+        if field in TEXT_TENSOR_FIELDS:
+            self.take('word')
+            op, text = self.text_comparison(field)
+            return self.tensor_predicate(
+                f"{field} {op} ?", [text],
+                f"tensor_field({value}, '{field}') {op} ? COLLATE NOCASE", [text]
+            )
+        if kind == 'op':
+            op, number = self.comparison()
+            return f"COALESCE(to_number({value}) {op} ?, 0)", [number]
+        if kind in ('word', 'number'):
+            # Adjacent bare words form one phrase, matched as typed
+            _, _, start, end = self.take('word', 'number')
+            while self.peek() in ('word', 'number'):
+                _, _, _, end = self.take('word', 'number')
+            return self.substring(self.text[start:end])
+        found = repr(self.tokens[self.pos][1]) if kind else 'end of filter'
+        raise FilterError(f"Expected a filter term but found {found}")
+
+    def at_tensor_field(self):
+        # Field names are only keywords when a comparison follows them
+        if self.peek() != 'word' or self.pos + 1 >= len(self.tokens) or self.tokens[self.pos + 1][0] != 'op':
+            return None
+        field = self.tokens[self.pos][1].lower()
+        return field if field in NUMERIC_TENSOR_FIELDS + TEXT_TENSOR_FIELDS else None
+
+    def comparison(self):
+        _, op, _, _ = self.take('op')
+        _, number, _, _ = self.take('number')
+        return op, float(number)
+
+    def text_comparison(self, field):
+        _, op, _, _ = self.take('op')
+        if op not in ('=', '!='):
+            raise FilterError(f"{field} is compared with = or !=, not {op}")
+        kind, token, _, _ = self.take('word', 'quoted', 'number')
+        return op, re.sub(r'\\(.)', r'\1', token[1:-1]) if kind == 'quoted' else token
+
+    def tensor_predicate(self, condition, params, fallback, fallback_params, indexed=True):
+        """
+        A check on the dimensions or attributes of a tensor cell: `condition`
+        on the cell's tensor_values row when the cell id is known, else
+        `fallback` on its string. An `indexed` condition selects the matching
+        tensors through an index of tensor_values; others are checked on the
+        row of each cell, as no index covers them.
+        """
+        if self.id_sql is None:
+            return f"COALESCE({fallback}, 0)", fallback_params
+        if indexed:
+            return f"{self.id_sql} IN (SELECT value_id FROM tensor_values WHERE {condition})", params
+        return f"EXISTS (SELECT 1 FROM tensor_values WHERE value_id = {self.id_sql} AND {condition})", params
+
+    def substring(self, text):
+        return f"instr(lower(COALESCE({self.value_sql}, '')), ?) > 0", [text.lower()]
+
+def compile_filter(text, value_sql, id_sql=None):
+    """
+    Compile one filter expression against the SQL expression of a cell value,
+    and optionally of the cell's id in cell_values.
+    Returns (sql, params). Raises FilterError for malformed filters.
+    """
+    return _Parser(text, value_sql, id_sql).parse()
+
+def compile_column_filters(filters, column_sql, column_id_sql=None):
+    """
+    Compile each filter of a {column: filter} mapping on its own.
+
+    Args:
+        filters: Mapping of column name to filter expression; empty filters are ignored
+        column_sql: Callable returning the SQL expression for a column's value,
+            raising ValueError for unknown columns
+        column_id_sql: Optional callable returning the SQL expression for the
+            cell_values id of a column's value, for tensor checks
+
+    Returns:
+        List of (column, sql, params), one per non-empty filter
+    """
+    compiled = []
+    for column, text in (filters or {}).items():
+        if text is None or not str(text).strip():
+            continue
+        try:
+            id_sql = column_id_sql(column) if column_id_sql is not None else None
+            sql, params = compile_filter(str(text), column_sql(column), id_sql)
+        except FilterError as e:
+            raise FilterError(f"Filter on {column}: {e}")
+        compiled.append((column, sql, params))
+    return compiled
+
+@lru_cache(maxsize=256)
+def compiled_pattern(pattern):
+    """Compiled regular expression for a pattern, cached across filters and parsers."""
+    return re.compile(pattern)
+
+@lru_cache(maxsize=4096)
+def parse_shape(value):
+    """Dimensions of a Tensor[...] or Shape[...] cell string as a tuple, or None."""
+    match = _SHAPE.match(value)
+    if not match:
+        return None
+    dims = match.group(1)
+    return tuple(int(dim) for dim in dims.split(',')) if dims else ()
+
+def tensor_attributes(value):
+    """
+    Dimensions and attributes of a Tensor[dims | dtype | layout | buffer] or
+    Shape[dims] cell string, as a dict with dims (a tuple), rank, numel, dtype,
+    layout and buffer; attributes a value does not give, or gives as unknown,
+    are None. Returns None for other strings.
+    """
+    match = _TENSOR.match(value)
+    if not match:
+        return None
+    dims = tuple(map(int, match.group(1).split(','))) if match.group(1) else ()
+    numel = math.prod(dims)
+    fields = [field.strip() for field in match.group(2).split('|')] if match.group(2) is not None else []
+    fields += [None] * (len(TEXT_TENSOR_FIELDS) - len(fields))
+    attributes = {
+        'dims': dims,
+        'rank': len(dims),
+        # SQLite integers are 64-bit
+        'numel': numel if numel < 2 ** 63 else float(numel),
+    }
+    for field, text in zip(TEXT_TENSOR_FIELDS, fields):
+        attributes[field] = text if text and text != 'unknown' else None
+    return attributes
+
+_tensor_attributes = lru_cache(maxsize=4096)(tensor_attributes)
+
+def _regexp(pattern, value):
+    if value is None:
+        return None
+    return compiled_pattern(pattern).search(value) is not None
+
+def _to_number(value):
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+def _shape_dim(value, index):
+    dims = parse_shape(value) if isinstance(value, str) else None
+    if dims is None or not -len(dims) <= index < len(dims):
+        return None
+    return dims[index]
+
+def _tensor_field(value, field):
+    attributes = _tensor_attributes(value) if isinstance(value, str) else None
+    return None if attributes is None else attributes.get(field)
+
+def register_filter_functions(conn):
+    """Register the SQL functions used by compiled filters on a connection."""
+    conn.create_function('regexp', 2, _regexp, deterministic=True)
+    conn.create_function('to_number', 1, _to_number, deterministic=True)
+    conn.create_function('shape_dim', 2, _shape_dim, deterministic=True)
+    conn.create_function('tensor_field', 2, _tensor_field, deterministic=True)
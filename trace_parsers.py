@@ -0,0 +1,228 @@
+"""
+Server-side parser language for derived columns.
+
+A saved parser may carry an expression in this language besides its JavaScript
+code. The expression is a pipeline of steps applied to a cell value, left to
+right, and unlike the JavaScript code it runs in the viewer's database queries:
+
+    shape | join("x")                  dimensions of a Tensor[...] value, as 1x32x64
+    split("|") | item(1) | trim        second field of a Tensor[... | BFLOAT16 | ...] value
+    match("(\\w+)::(\\w+)", 2)         second group of a regular expression's first match
+    numel                              number of elements of a tensor
+
+Steps:
+
+    match(pattern[, group])     first match of a regular expression, or one of its groups
+    replace(pattern, text)      every match of a regular expression replaced by text
+    split(separator)            parts of a text, as a list
+    item(index)                 item of a list; negative indexes count from the end
+    join(separator)             items of a list joined into a text
+    trim, lower, upper          text with surrounding spaces removed, or its case changed
+    number                      the value as a number
+    length                      number of items of a list, or characters of a text
+    shape, rank, numel          dimensions, number of dimensions and number of elements
+                                of a Tensor[...] or Shape[...] value
+
+A step that does not apply to its input (a text that is not a number, an index
+out of range, a regular expression that does not match) gives no value, and so
+do the steps after it. Results are stored as text: lists as JSON, whole numbers
+without a decimal point.
+
+The derived column of a parser over a column is named parser(column), e.g.
+tensorShape(arg0); see TraceDB for how its values are stored.
+"""
+import json
+import math
+import re
+from functools import lru_cache
+from trace_filters import compiled_pattern, parse_shape
+
+_TOKEN = re.compile(r'''
+    (?P<space>\s+)
+  | (?P<string>"(?:\\.|[^"\\])*")
+  | (?P<number>-?\d+)
+  | (?P<name>[A-Za-z_]\w*)
+  | (?P<pipe>\|)
+  | (?P<lparen>\()
+  | (?P<rparen>\))
+  | (?P<comma>,)
+''', re.VERBOSE)
+
+# Name of the derived column of a parser over a column
+_DERIVED_COLUMN = re.compile(r'^([A-Za-z_$][\w$]*)\((.+)\)$')
+
+class ParserError(ValueError):
+    """Raised when a parser expression cannot be parsed."""
+
+def _match(value, pattern, group=0):
+    match = compiled_pattern(pattern).search(_text(value))
+    return match.group(group) if match else None
+
+def _replace(value, pattern, text):
+    return compiled_pattern(pattern).sub(text, _text(value))
+
+def _item(value, index):
+    if not isinstance(value, list) or not -len(value) <= index < len(value):
+        return None
+    return value[index]
+
+def _join(value, separator):
+    if not isinstance(value, list):
+        return None
+    return separator.join(_text(item) for item in value)
+
+def _number(value):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+def _dims(value):
+    dims = parse_shape(value) if isinstance(value, str) else None
+    return None if dims is None else list(dims)
+
+def _numel(value):
+    dims = _dims(value)
+    if dims is None:
+        return None
+    numel = 1
+    for dim in dims:
+        numel *= dim
+    return numel
+
+# Steps by name: (function, argument types). The value is passed to the
+# function ahead of the arguments.
+_STEPS = {
+    'match': (_match, (str, int)),
+    'replace': (_replace, (str, str)),
+    'split': (lambda value, separator: _text(value).split(separator), (str,)),
+    'item': (_item, (int,)),
+    'join': (_join, (str,)),
+    'trim': (lambda value: _text(value).strip(), ()),
+    'lower': (lambda value: _text(value).lower(), ()),
+    'upper': (lambda value: _text(value).upper(), ()),
+    'number': (_number, ()),
+    'length': (lambda value: len(value) if isinstance(value, list) else len(_text(value)), ()),
+    'shape': (_dims, ()),
+    'rank': (lambda value: None if _dims(value) is None else len(_dims(value)), ()),
+    'numel': (_numel, ()),
+}
+
+# Number of required arguments of the steps whose last arguments are optional
+_REQUIRED_ARGS = {'match': 1}
+
+def _text(value):
+    """Text of a step result, as it is stored."""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, list):
+        return json.dumps(value)
+    return str(value)
+
+def _tokenize(text):
+    tokens = []
+    pos = 0
+    while pos < len(text):
+        match = _TOKEN.match(text, pos)
+        if not match:
+            raise ParserError(f"Unexpected character at position {pos}: {text[pos]!r}")
+        if match.lastgroup != 'space':
+            tokens.append((match.lastgroup, match.group()))
+        pos = match.end()
+    return tokens
+
+class _Parser:
+    """Recursive-descent parser producing the list of (step, args) of an expression."""
+    def __init__(self, text):
+        self.tokens = _tokenize(text)
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos][0] if self.pos < len(self.tokens) else None
+
+    def take(self, *kinds):
+        kind = self.peek()
+        if kind not in kinds:
+            found = repr(self.tokens[self.pos][1]) if kind else 'end of expression'
+            raise ParserError(f"Expected {' or '.join(kinds)} but found {found}")
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token[1]
+
+    def parse(self):
+        if not self.tokens:
+            raise ParserError("Empty parser expression")
+        steps = [self.parse_step()]
+        while self.peek() == 'pipe':
+            self.take('pipe')
+            steps.append(self.parse_step())
+        if self.peek() is not None:
+            raise ParserError(f"Expected | before {self.tokens[self.pos][1]!r}")
+        return steps
+
+    def parse_step(self):
+        name = self.take('name')
+        if name not in _STEPS:
+            raise ParserError(f"Unknown step {name!r}; steps are {', '.join(sorted(_STEPS))}")
+        args = []
+        if self.peek() == 'lparen':
+            self.take('lparen')
+            if self.peek() != 'rparen':
+                args.append(self.parse_argument())
+                while self.peek() == 'comma':
+                    self.take('comma')
+                    args.append(self.parse_argument())
+            self.take('rparen')
+
+        function, types = _STEPS[name]
+        required = _REQUIRED_ARGS.get(name, len(types))
+        if not required <= len(args) <= len(types):
+            expected = len(types) if required == len(types) else f"{required} to {len(types)}"
+            raise ParserError(f"{name} takes {expected} arguments, not {len(args)}")
+        for arg, arg_type in zip(args, types):
+            if not isinstance(arg, arg_type):
+                raise ParserError(f"{name} expects {'a text' if arg_type is str else 'a whole number'}, not {arg!r}")
+        if name in ('match', 'replace'):
+            try:
+                re.compile(args[0])
+            except re.error as e:
+                raise ParserError(f"Invalid regular expression {args[0]!r}: {e}")
+        return function, args
+
+    def parse_argument(self):
+        if self.peek() == 'number':
+            return int(self.take('number'))
+        token = self.take('string')
+        try:
+            return json.loads(token)
+        except ValueError:
+            raise ParserError(f"Invalid text {token}")
+
+@lru_cache(maxsize=256)
+def compile_parser(expression):
+    """
+    Compile a parser expression into a function from a cell value (a string, or
+    None for an empty cell) to the derived value (a string, or None).
+    Raises ParserError for malformed expressions.
+    """
+    steps = _Parser(expression).parse()
+
+    def parse(value):
+        for function, args in steps:
+            if value is None:
+                return None
+            try:
+                value = function(value, *args)
+            except (TypeError, ValueError, IndexError, re.error):
+                return None
+        return None if value is None else _text(value)
+
+    return parse
+
+def parse_derived_column(name):
+    """Split the name of a derived column into (parser name, column name), or None."""
+    match = _DERIVED_COLUMN.match(name)
+    return (match.group(1), match.group(2)) if match else None
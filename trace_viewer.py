@@ -1,36 +1,67 @@
 from flask import Flask, render_template, jsonify, request, flash, Response
-from trace_db import TraceDB
+from trace_db import TraceDB, POOL_SIZE, DB_PATH_ENV, DEFAULT_DB_PATH
+import io
+import itertools
 import json
 import os
+import threading
 import time
+import uuid
+import zipfile
 from werkzeug.utils import secure_filename
-from store_traces import process_json_file
+from ingest_jobs import IngestJobQueue, job_status
+from store_traces import save_with_fingerprint
+from trace_parsers import compile_parser
+
+# Environment variable for the secret key. Without it a random key is made once
+# per server, shared by its --production workers, and sessions end on restart.
+SECRET_KEY_ENV = 'TTNN_TRACE_VIEWER_SECRET_KEY'
 
 app = Flask(__name__)
-app.secret_key = os.urandom(24)  # Required for flash messages
-db = TraceDB()
+app.secret_key = os.environ.get(SECRET_KEY_ENV) or os.urandom(24)  # Required for flash messages
 
 UPLOAD_FOLDER = 'uploads'
 ALLOWED_EXTENSIONS = {'json'}
 
-# Ensure upload directory exists
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+# Number of uploads that are ingested at the same time, per server process
+INGEST_WORKERS = 1
+
+# Worker processes and threads per worker for --production. Each thread can
+# hold one of a worker's pooled database connections.
+PRODUCTION_WORKERS = 4
+PRODUCTION_THREADS = POOL_SIZE
+
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 
-# Track active uploads with timestamps
-active_uploads = {}
-
-# Clean stale uploads periodically
-def clean_stale_uploads():
-    """Remove stale uploads from tracking (older than 10 minutes)"""
-    current_time = time.time()
-    stale_keys = []
-    for key, timestamp in active_uploads.items():
-        if current_time - timestamp > 600:  # 10 minutes
-            stale_keys.append(key)
-    
-    for key in stale_keys:
-        active_uploads.pop(key, None)
+# The database served and the queue ingesting uploads into it. Importing the
+# module opens nothing; main() opens the database given on the command line,
+# and the first request the default one if the app is served some other way.
+db = None
+ingest_jobs = None
+_open_lock = threading.Lock()
+
+def open_database(db_path=None):
+    """
+    Serve the database at db_path (see TraceDB for the default). Uploaded files
+    are ingested in the background with progress tracked in the database, so
+    every server process sharing it reports the same jobs.
+    """
+    global db, ingest_jobs
+    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+    db = TraceDB(db_path)
+    ingest_jobs = IngestJobQueue(db, max_workers=INGEST_WORKERS)
+
+@app.before_request
+def ensure_database():
+    if db is None:
+        with _open_lock:
+            if db is None:
+                open_database()
+
+def active_jobs_for(client):
+    """Active ingest jobs of a client, excluding jobs that stopped reporting progress."""
+    statuses = [job_status(job, db) for job in db.get_active_jobs(client)]
+    return [status for status in statuses if not status['finished']]
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
@@ -44,33 +75,9 @@ def get_uploads():
     view_mode = request.args.get('mode', 'by_upload')
     
     if view_mode == 'consolidated':
-        # Get all traces
-        traces = db.get_all_traces()
-        unique_traces = {}
-        
-        for trace in traces:
-            trace_id, filename, sheet_name, error, row_count, upload_id = trace
-            
-            # Skip traces with errors
-            if error:
-                continue
-                
-            if filename not in unique_traces:
-                # Get columns from the first occurrence of this trace
-                columns = db.get_columns(trace_id)
-                # Get actual row count from deduplicated values
-                values = db.get_deduplicated_values_by_filename(filename)
-                
-                unique_traces[filename] = {
-                    'filename': filename,
-                    'row_count': len(values),
-                    'columns': columns
-                }
-        
-        # Convert to list and sort by filename
-        result = list(unique_traces.values())
-        result.sort(key=lambda x: x['filename'].lower())
-        return jsonify(result)
+        # One entry per filename (traces with errors excluded), read from the
+        # summaries the database keeps up to date as traces are added and removed
+        return jsonify(db.get_trace_summaries())
     else:
         # Original by-upload view logic
         uploads = db.get_uploads()
@@ -99,10 +106,181 @@ def get_uploads():
             result.append(upload_data)
         return jsonify(result)
 
+# Query parameters that switch the values endpoints to paged responses
+PAGE_ARGS = ('offset', 'limit', 'sort', 'order', 'columns', 'filters', 'derived')
+
+def parse_column_filters(filters):
+    """Validate a {column: filter expression} mapping sent by the client."""
+    if filters is None:
+        return None
+    if not isinstance(filters, dict) or not all(isinstance(v, str) for v in filters.values()):
+        raise ValueError("filters must map column names to filter expressions")
+    return filters
+
+def parse_derived_columns(derived):
+    """Validate a list of derived column names, parser(column), sent by the client."""
+    if derived is None:
+        return None
+    if not isinstance(derived, list) or not all(isinstance(name, str) for name in derived):
+        raise ValueError("derived must be a list of parser(column) names")
+    return derived
+
+def parse_parser_expression(expression):
+    """
+    Validate the server-side expression of a parser sent by the client (see
+    trace_parsers). Returns it, or None for no expression. Raises ValueError
+    for malformed expressions.
+    """
+    if expression is None or not str(expression).strip():
+        return None
+    compile_parser(str(expression).strip())
+    return str(expression).strip()
+
+def get_page_args():
+    """
+    Read offset/limit/sort/order/columns/filters/derived from the query string.
+    `filters` is a JSON object mapping column names to trace_filters expressions,
+    `derived` a JSON array of derived column names (see TraceDB.get_values_page).
+    Returns None when none of them is given, so callers can keep the plain list response.
+    Raises ValueError for malformed values.
+    """
+    if not any(name in request.args for name in PAGE_ARGS):
+        return None
+    
+    def int_arg(name, default):
+        value = request.args.get(name, '')
+        if value == '':
+            return default
+        try:
+            return int(value)
+        except ValueError:
+            raise ValueError(f"{name} must be an integer")
+    
+    filters = request.args.get('filters')
+    if filters:
+        try:
+            filters = json.loads(filters)
+        except json.JSONDecodeError:
+            raise ValueError("filters must be a JSON object")
+    
+    derived = request.args.get('derived')
+    if derived:
+        try:
+            derived = json.loads(derived)
+        except json.JSONDecodeError:
+            raise ValueError("derived must be a JSON array")
+    
+    columns = request.args.get('columns')
+    return {
+        'offset': int_arg('offset', 0),
+        'limit': int_arg('limit', None),
+        'sort': request.args.get('sort') or None,
+        'order': request.args.get('order', 'asc').lower(),
+        'columns': [c for c in columns.split(',') if c] if columns else None,
+        'filters': parse_column_filters(filters or None),
+        'derived': parse_derived_columns(derived or None)
+    }
+
+# Columns of exported rows that describe the row rather than hold trace data
+EXPORT_META_COLUMNS = ('id', '_upload_id', '_upload_name', '_upload_time', '_occurrences', '_uploads')
+
+# CSV lines written to an export response at a time
+EXPORT_CHUNK_LINES = 1000
+
+def export_columns(row):
+    """Names of the trace data columns of an exported row."""
+    return [col for col in row.keys() if col not in EXPORT_META_COLUMNS]
+
+def csv_chunks(columns, rows):
+    """
+    Generate the semicolon-separated CSV of rows (header first, no trailing newline)
+    in chunks of EXPORT_CHUNK_LINES lines, so exports stream instead of being
+    built in memory.
+    """
+    lines = [";".join(columns)]
+    separator = ""
+    for row in rows:
+        # Don't quote values - directly add them to the CSV
+        lines.append(";".join(str(row.get(col, "")) for col in columns))
+        if len(lines) >= EXPORT_CHUNK_LINES:
+            yield separator + "\n".join(lines)
+            separator = "\n"
+            lines = []
+    if lines:
+        yield separator + "\n".join(lines)
+
+class ZipStream(io.RawIOBase):
+    """Unseekable file that buffers what zipfile writes until it is drained."""
+    def __init__(self):
+        super().__init__()
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+def zip_chunks(entries):
+    """
+    Generate a deflated zip archive of (name, text chunks) entries as it is written.
+    zipfile writes a data descriptor after each entry since the stream is not seekable.
+    """
+    stream = ZipStream()
+    with zipfile.ZipFile(stream, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, chunks in entries:
+            # Entry sizes are unknown up front, so allow them to exceed 2 GB
+            with zf.open(name, 'w', force_zip64=True) as entry:
+                for chunk in chunks:
+                    entry.write(chunk.encode('utf-8'))
+                    data = stream.drain()
+                    if data:
+                        yield data
+            yield stream.drain()
+    yield stream.drain()
+
+def csv_response(rows, filename):
+    """
+    Stream rows as a CSV download, with the columns of the first row.
+    Returns None when there are no rows.
+    """
+    first = next(rows, None)
+    if first is None:
+        return None
+    columns = export_columns(first)
+    response = Response(csv_chunks(columns, itertools.chain([first], rows)), mimetype="text/csv")
+    response.headers["Content-Disposition"] = f"attachment; filename={filename}"
+    response.headers["Content-Type"] = "text/csv; charset=utf-8; header=present; delimiter=semicolon"
+    return response
+
 @app.route('/api/trace/<int:trace_id>/values')
 def get_trace_values(trace_id):
-    values = db.get_values(trace_id)
-    return jsonify(values)
+    """
+    Get the rows of a trace. With any of offset, limit, sort, order, columns,
+    filters or derived the rows are paged in SQL and returned with the matching
+    row count.
+    """
+    try:
+        page_args = get_page_args()
+        if page_args is None:
+            values = db.get_values(trace_id)
+            return jsonify(values)
+        
+        rows, total = db.get_values_page(trace_id, **page_args)
+        return jsonify({
+            'rows': rows,
+            'total': total,
+            'offset': page_args['offset'],
+            'limit': page_args['limit']
+        })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
 @app.route('/api/trace/<int:trace_id>/export-filtered-csv', methods=['POST'])
 def export_filtered_trace_to_csv(trace_id):
@@ -113,31 +291,6 @@ def export_filtered_trace_to_csv(trace_id):
     # Check if client sent pre-filtered data
     export_data = filter_data.get('exportData')
     
-    # If client provides pre-filtered data, use it directly
-    if export_data:
-        filtered_values = export_data
-    else:
-        # Otherwise, get all values and filter server-side
-        values = db.get_values(trace_id)
-        
-        if not values:
-            return jsonify({"error": "No data found for this trace"}), 404
-        
-        # Filter values based on filter criteria
-        filtered_values = []
-        
-        # Apply column filters if provided
-        column_filters = filter_data.get('columnFilters', {})
-        for row in values:
-            include_row = True
-            for column, filter_value in column_filters.items():
-                cell_value = row.get(column, '')
-                if filter_value and cell_value and filter_value.lower() not in str(cell_value).lower():
-                    include_row = False
-                    break
-            if include_row:
-                filtered_values.append(row)
-    
     # Get trace info for filename
     trace_info = db.get_trace_by_id(trace_id)
     if not trace_info:
@@ -145,43 +298,53 @@ def export_filtered_trace_to_csv(trace_id):
     else:
         filename = f"{trace_info[1].replace(' ', '_')}_{trace_id}_filtered.csv"
     
+    try:
+        # If client provides pre-filtered data, use it directly
+        if export_data:
+            filtered_values = iter(export_data)
+        else:
+            # Otherwise filter (and sort) all values in SQL, reading them as they are sent
+            filtered_values = db.iter_values(
+                trace_id,
+                sort=filter_data.get('sort'),
+                order=filter_data.get('order', 'asc'),
+                filters=parse_column_filters(filter_data.get('columnFilters') or None),
+                derived=parse_derived_columns(filter_data.get('derived') or None)
+            )
+        response = csv_response(filtered_values, filename)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
     # If filtered values is empty, return an error
-    if not filtered_values:
+    if response is None:
         return jsonify({"error": "No data matches the filter criteria"}), 404
-    
-    # Get all column names from the first row
-    if filtered_values and len(filtered_values) > 0:
-        columns = list(filtered_values[0].keys())
-        # Remove metadata columns if present
-        for meta_col in ['id', '_upload_id', '_upload_name', '_upload_time']:
-            if meta_col in columns:
-                columns.remove(meta_col)
-    else:
-        columns = []
-    
-    # Generate CSV data
-    csv_data = []
-    csv_data.append(";".join(columns))
-    
-    for row in filtered_values:
-        csv_row = []
-        for col in columns:
-            # Don't quote values - directly add them to the CSV
-            value = str(row.get(col, ""))
-            csv_row.append(value)
-        csv_data.append(";".join(csv_row))
-    
-    # Create response with CSV data
-    response = Response("\n".join(csv_data), mimetype="text/csv")
-    response.headers["Content-Disposition"] = f"attachment; filename={filename}"
-    response.headers["Content-Type"] = "text/csv; charset=utf-8; header=present; delimiter=semicolon"
     return response
 
 @app.route('/api/consolidated-trace/<path:filename>/values')
 def get_consolidated_trace_values(filename):
+    """
+    Get the distinct rows of all traces with a filename, each with its occurrence
+    count and the uploads containing it. With any of offset, limit, sort, order,
+    columns, filters or derived the rows are paged in SQL and returned with the
+    matching row count, the consolidated columns and the uploads the rows come from.
+    """
     try:
-        values = db.get_deduplicated_values_by_filename(filename)
-        return jsonify(values)
+        page_args = get_page_args()
+        if page_args is None:
+            values = db.get_deduplicated_values_by_filename(filename)
+            return jsonify(values)
+        
+        rows, total, columns, uploads = db.get_deduplicated_values_page_by_filename(filename, **page_args)
+        return jsonify({
+            'rows': rows,
+            'total': total,
+            'offset': page_args['offset'],
+            'limit': page_args['limit'],
+            'columns': columns,
+            'uploads': uploads
+        })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -195,65 +358,30 @@ def export_filtered_consolidated_trace_to_csv(filename):
         # Check if client sent pre-filtered data
         export_data = filter_data.get('exportData')
         
-        # If client provides pre-filtered data, use it directly
-        if export_data:
-            filtered_values = export_data
-        else:
-            # Otherwise, get all values and filter server-side
-            values = db.get_deduplicated_values_by_filename(filename)
-            
-            if not values:
-                return jsonify({"error": "No data found for this trace"}), 404
-            
-            # Filter values based on filter criteria
-            filtered_values = []
-            
-            # Apply column filters if provided
-            column_filters = filter_data.get('columnFilters', {})
-            for row in values:
-                include_row = True
-                for column, filter_value in column_filters.items():
-                    cell_value = row.get(column, '')
-                    if filter_value and cell_value and filter_value.lower() not in str(cell_value).lower():
-                        include_row = False
-                        break
-                if include_row:
-                    filtered_values.append(row)
-        
         # Sanitize filename
         safe_filename = filename.replace(' ', '_').replace('/', '_').replace('\\', '_')
         output_filename = f"{safe_filename}_consolidated_filtered.csv"
         
+        try:
+            # If client provides pre-filtered data, use it directly
+            if export_data:
+                filtered_values = iter(export_data)
+            else:
+                # Otherwise filter (and sort) all values in SQL, reading them as they are sent
+                filtered_values = db.iter_deduplicated_values_by_filename(
+                    filename,
+                    sort=filter_data.get('sort'),
+                    order=filter_data.get('order', 'asc'),
+                    filters=parse_column_filters(filter_data.get('columnFilters') or None),
+                    derived=parse_derived_columns(filter_data.get('derived') or None)
+                )
+            response = csv_response(filtered_values, output_filename)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
         # If filtered values is empty, return an error
-        if not filtered_values:
+        if response is None:
             return jsonify({"error": "No data matches the filter criteria"}), 404
-        
-        # Get all column names from the first row
-        if filtered_values and len(filtered_values) > 0:
-            columns = list(filtered_values[0].keys())
-            # Remove metadata columns if present
-            for meta_col in ['id', '_upload_id', '_upload_name', '_upload_time']:
-                if meta_col in columns:
-                    columns.remove(meta_col)
-        else:
-            columns = []
-        
-        # Generate CSV data
-        csv_data = []
-        csv_data.append(";".join(columns))
-        
-        for row in filtered_values:
-            csv_row = []
-            for col in columns:
-                # Don't quote values - directly add them to the CSV
-                value = str(row.get(col, ""))
-                csv_row.append(value)
-            csv_data.append(";".join(csv_row))
-        
-        # Create response with CSV data
-        response = Response("\n".join(csv_data), mimetype="text/csv")
-        response.headers["Content-Disposition"] = f"attachment; filename={output_filename}"
-        response.headers["Content-Type"] = "text/csv; charset=utf-8; header=present; delimiter=semicolon"
         return response
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -268,11 +396,11 @@ def delete_upload(upload_id):
 
 @app.route('/api/upload/<int:upload_id>/export-csv', methods=['GET'])
 def export_upload_to_csv(upload_id):
-    """Export all traces from an upload as a zip of CSV files."""
+    """
+    Export all traces from an upload as a zip of CSV files. The zip is streamed
+    while the rows are read, one trace at a time.
+    """
     try:
-        import zipfile
-        import io
-        
         # Get upload info
         upload = db.get_upload(upload_id)
         if not upload:
@@ -282,10 +410,8 @@ def export_upload_to_csv(upload_id):
         traces = db.get_traces_for_upload(upload_id)
         if not traces or len(traces) == 0:
             return jsonify({"error": "No traces found for this upload"}), 404
-            
-        # Create in-memory zip file
-        memory_file = io.BytesIO()
-        with zipfile.ZipFile(memory_file, 'w', zipfile.ZIP_DEFLATED) as zf:
+        
+        def csv_files():
             for trace in traces:
                 trace_id, filename, sheet_name, error, row_count = trace
                 
@@ -295,36 +421,23 @@ def export_upload_to_csv(upload_id):
                 
                 # Get columns and values
                 columns = db.get_columns(trace_id)
-                values = db.get_values(trace_id)
-                
-                if not values or len(values) == 0:
+                values = db.iter_values(trace_id)
+                first = next(values, None)
+                if first is None:
                     continue
                 
-                # Generate CSV data
-                csv_data = []
-                csv_data.append(";".join(columns))
-                
-                for row in values:
-                    csv_row = []
-                    for col in columns:
-                        # Don't quote values - directly add them to the CSV
-                        value = str(row.get(col, ""))
-                        csv_row.append(value)
-                    csv_data.append(";".join(csv_row))
-                
                 # Add CSV file to zip
                 safe_filename = filename.replace(' ', '_').replace('/', '_').replace('\\', '_')
                 # Remove .csv extension if it already exists to avoid double extension
                 if safe_filename.lower().endswith('.csv'):
                     safe_filename = safe_filename[:-4]
-                zf.writestr(f"{safe_filename}.csv", "\n".join(csv_data))
+                yield f"{safe_filename}.csv", csv_chunks(columns, itertools.chain([first], values))
         
         # Prepare response
-        memory_file.seek(0)
         safe_upload_name = upload[1].replace(' ', '_').replace('/', '_').replace('\\', '_')
         
         response = Response(
-            memory_file.getvalue(),
+            zip_chunks(csv_files()),
             mimetype="application/zip",
             headers={
                 "Content-Disposition": f"attachment; filename={safe_upload_name}_traces.zip"
@@ -419,22 +532,14 @@ def export_upload_to_sheets(upload_id):
 @app.route('/api/uploads/status', methods=['GET'])
 def get_upload_status():
     """Check if there are any active uploads."""
-    # Clean stale uploads first
-    clean_stale_uploads()
-    
     # Get client IP for more accurate tracking
-    client_ip = request.remote_addr
-    
-    # Check if this client has any active uploads
-    client_uploads = []
-    for key in list(active_uploads.keys()):
-        if key.startswith(f"{client_ip}_"):
-            client_uploads.append(key.split('_', 1)[1])
+    client_jobs = active_jobs_for(request.remote_addr)
     
     # Build response
     response = {
-        'uploading': bool(active_uploads) and bool(client_uploads),
-        'uploads': client_uploads,
+        'uploading': bool(client_jobs),
+        'uploads': [job['upload_name'] for job in client_jobs],
+        'jobs': [job['id'] for job in client_jobs],
         'server_time': time.time()
     }
     
@@ -445,8 +550,20 @@ def get_upload_status():
     resp.headers['Expires'] = '0'
     return resp
 
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Get the phase, progress, rows stored and throughput of an ingest job."""
+    job = db.get_job(job_id)
+    if not job:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    
+    resp = jsonify(job_status(job, db))
+    resp.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
+    return resp
+
 @app.route('/api/upload', methods=['POST'])
 def upload_file():
+    """Save an uploaded JSON file and queue it for ingest, returning the job id."""
     if 'file' not in request.files:
         return jsonify({'success': False, 'error': 'No file part'}), 400
     
@@ -463,39 +580,22 @@ def upload_file():
         upload_name = os.path.splitext(secure_filename(file.filename))[0]  # Use filename without extension as fallback
     
     try:
-        filename = secure_filename(file.filename)
+        # Unique name so concurrent uploads of the same file do not overwrite each other
+        filename = f"{uuid.uuid4().hex}_{secure_filename(file.filename)}"
         file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
         
-        # Track this upload with client IP for more accurate tracking
-        client_ip = request.remote_addr
-        upload_id = f"{client_ip}_{upload_name}_{filename}"
-        active_uploads[upload_id] = time.time()
+        # Save the uploaded file, fingerprinting it so a repeated upload can be recognized
+        fingerprint = save_with_fingerprint(file.stream, file_path)
         
-        # Save the uploaded file
-        file.save(file_path)
-        
-        # Process the JSON file
-        if process_json_file(file_path, upload_name):
-            # Clean up the temporary file
-            os.remove(file_path)
-            # Remove from active uploads
-            active_uploads.pop(upload_id, None)
-            return jsonify({
-                'success': True,
-                'message': 'File successfully processed and stored in the database'
-            })
-        else:
-            # Remove from active uploads
-            active_uploads.pop(upload_id, None)
-            return jsonify({
-                'success': False,
-                'error': 'Failed to process the file'
-            }), 500
+        # Process the JSON file in the background
+        job_id = ingest_jobs.submit(file_path, upload_name, client=request.remote_addr, fingerprint=fingerprint)
+        return jsonify({
+            'success': True,
+            'job_id': job_id,
+            'message': 'File uploaded and queued for processing'
+        }), 202
             
     except Exception as e:
-        # Remove from active uploads if there was an error
-        upload_id = f"{client_ip}_{upload_name}_{filename}" if 'filename' in locals() else f"{client_ip}_{upload_name}_error"
-        active_uploads.pop(upload_id, None)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/upload/<int:upload_id>/rename', methods=['POST'])
@@ -531,7 +631,8 @@ def get_parsers():
                 'name': parser[1],
                 'code': parser[2],
                 'created_at': parser[3],
-                'updated_at': parser[4]
+                'updated_at': parser[4],
+                'expression': parser[5]
             })
         return jsonify(result)
     except Exception as e:
@@ -548,7 +649,8 @@ def get_parser(parser_id):
                 'name': parser[1],
                 'code': parser[2],
                 'created_at': parser[3],
-                'updated_at': parser[4]
+                'updated_at': parser[4],
+                'expression': parser[5]
             })
         else:
             return jsonify({'success': False, 'error': 'Parser not found'}), 404
@@ -568,7 +670,12 @@ def create_parser():
         if existing:
             return jsonify({'success': False, 'error': 'Parser with this name already exists'}), 409
         
-        parser_id = db.create_parser(data['name'], data['code'])
+        try:
+            expression = parse_parser_expression(data.get('expression'))
+        except ValueError as e:
+            return jsonify({'success': False, 'error': f'Invalid expression: {e}'}), 400
+        
+        parser_id = db.create_parser(data['name'], data['code'], expression)
         if parser_id:
             return jsonify({'success': True, 'id': parser_id})
         else:
@@ -595,7 +702,13 @@ def update_parser(parser_id):
             if existing and existing[0] != parser_id:
                 return jsonify({'success': False, 'error': 'Parser with this name already exists'}), 409
         
-        success = db.update_parser(parser_id, data['name'], data['code'])
+        # Clients that do not send an expression keep the stored one
+        try:
+            expression = parse_parser_expression(data.get('expression', parser[5]))
+        except ValueError as e:
+            return jsonify({'success': False, 'error': f'Invalid expression: {e}'}), 400
+        
+        success = db.update_parser(parser_id, data['name'], data['code'], expression)
         if success:
             return jsonify({'success': True})
         else:
@@ -623,31 +736,71 @@ def delete_parser(parser_id):
 @app.route('/api/debug/active-uploads', methods=['GET'])
 def debug_active_uploads():
     """Debug endpoint to view active uploads."""
-    clean_stale_uploads()
     client_ip = request.remote_addr
     
+    all_jobs = [job_status(job, db) for job in db.get_active_jobs()]
     return jsonify({
-        'active_uploads': active_uploads,
+        'active_uploads': all_jobs,
         'client_ip': client_ip,
-        'all_active_count': len(active_uploads),
-        'client_active_uploads': {k: v for k, v in active_uploads.items() if k.startswith(f"{client_ip}_")},
+        'all_active_count': len(all_jobs),
+        'client_active_uploads': active_jobs_for(client_ip),
         'server_time': time.time(),
         'server_time_human': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime())
     })
 
+def serve_production(host, port, workers, threads):
+    """
+    Serve the app with gunicorn: `workers` processes of `threads` threads each,
+    without the debugger or the reloader.
+    """
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        raise SystemExit("--production needs gunicorn: pip install 'ttnn_trace_viewer[production]'")
+    
+    class ViewerApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', f'{host}:{port}')
+            self.cfg.set('workers', workers)
+            self.cfg.set('threads', threads)
+            self.cfg.set('worker_class', 'gthread')
+        
+        def load(self):
+            return app
+    
+    # Workers are forked from this process; they open their own connections
+    db.pool.close()
+    print(f"Trace viewer serving {db.db_path} at http://{host}:{port} "
+          f"with {workers} workers x {threads} threads")
+    ViewerApplication().run()
+
 def main():
     """Entry point for the trace viewer application."""
     import webbrowser
-    import threading
     import argparse
     import os
     
     parser = argparse.ArgumentParser(description='TT-NN Trace Viewer')
     parser.add_argument('--no-browser', action='store_true', help='Do not open browser automatically')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=5000, help='Port to listen on (default: 5000)')
+    parser.add_argument('--db', help=f'Database file (default: ${DB_PATH_ENV} or {DEFAULT_DB_PATH})')
+    parser.add_argument('--production', action='store_true',
+                        help='Serve with gunicorn worker processes instead of the debug server')
+    parser.add_argument('--workers', type=int, default=PRODUCTION_WORKERS,
+                        help=f'Worker processes with --production (default: {PRODUCTION_WORKERS})')
+    parser.add_argument('--threads', type=int, default=PRODUCTION_THREADS,
+                        help=f'Threads per worker with --production (default: {PRODUCTION_THREADS})')
     args = parser.parse_args()
     
-    host = '127.0.0.1'
-    port = 5000
+    open_database(args.db)
+    
+    if args.production:
+        serve_production(args.host, args.port, args.workers, args.threads)
+        return
+    
+    host = args.host
+    port = args.port
     url = f'http://{host}:{port}'
     
     # Check if this is the initial run or a reload
@@ -2,7 +2,8 @@ import json
 import csv
 import re
 import os
-from typing import Dict, Any, Callable, List, Tuple, Optional
+from typing import Dict, Any, Callable, Iterable, List, Tuple, Optional
+from json_stream import iter_json_items
 
 # Registry for transformer functions
 TRANSFORMERS: Dict[str, Callable[[Any], str]] = {}
@@ -118,73 +119,111 @@ def extract_arg_info(arg: Dict[str, Any]) -> Tuple[str, Any]:
     
     return arg_key, arg_value
 
-def group_operations_by_name(data: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
-    """Group operations by operation name."""
-    grouped_operations = {}
+def operation_row(item: Dict[str, Any]) -> List[str]:
+    """Convert a single operation into a table row (operation name followed by its arguments)."""
+    row = [item.get('operation', 'unknown')]
+    for arg in item.get('arguments', []):
+        _, arg_value = extract_arg_info(arg)
+        
+        # Process the value based on its type
+        row.append(process_arg_value(arg_value))
+    return row
+
+class RowGroup:
+    """
+    Accumulates the rows of one table while operations are streamed in.
+    
+    Rows are padded to the widest operation only when the table is finished,
+    so operations can be consumed one at a time without keeping them around.
+    """
+    def __init__(self, remove_duplicates: bool = False):
+        self.remove_duplicates = remove_duplicates
+        self.max_args = 0
+        self.operation_count = 0
+        self.rows = []
+        self.seen_rows = set()
     
-    for item in data.get('content', []):
-        operation_name = item.get('operation', 'unknown')
-        if operation_name not in grouped_operations:
-            grouped_operations[operation_name] = []
+    def add(self, row: List[str]) -> None:
+        """Add a row produced by operation_row."""
+        self.operation_count += 1
+        self.max_args = max(self.max_args, len(row) - 1)
         
-        grouped_operations[operation_name].append(item)
+        if self.remove_duplicates:
+            # Missing trailing arguments are padded with empty cells, so rows that
+            # only differ by trailing empty cells are duplicates of each other
+            row_key = tuple(row)
+            while row_key and row_key[-1] == '':
+                row_key = row_key[:-1]
+            if row_key in self.seen_rows:
+                return
+            self.seen_rows.add(row_key)
+        
+        self.rows.append(row)
     
-    return grouped_operations
+    def finish(self) -> Tuple[List[str], List[List[str]]]:
+        """Return the header and the rows padded to the header width."""
+        # Create header: operation-name;arg0;arg1;...
+        header = ['operation'] + [f'arg{i}' for i in range(self.max_args)]
+        width = len(header)
+        rows = [row + [''] * (width - len(row)) for row in self.rows]
+        return header, rows
 
-def write_csv_file(operations: List[Dict[str, Any]], output_file: str, remove_duplicates: bool = False) -> None:
-    """Write operations to a CSV file.
+def build_rows(operations: Iterable[Dict[str, Any]], remove_duplicates: bool = False) -> Tuple[List[str], List[List[str]]]:
+    """Build the header and table rows for a list of operations.
     
     Args:
-        operations: List of operations to write
-        output_file: Path to the output CSV file
-        remove_duplicates: If True, removes duplicate lines from the output
+        operations: Operations to convert (any iterable, consumed once)
+        remove_duplicates: If True, removes duplicate rows from the output
+    
+    Returns:
+        Tuple of (header, rows)
     """
-    # First determine the maximum number of arguments in any operation
-    max_args = 0
+    group = RowGroup(remove_duplicates)
     for item in operations:
-        arg_count = len(item.get('arguments', []))
-        max_args = max(max_args, arg_count)
-    
-    # Create header: operation-name;arg0;arg1;...
-    header = ['operation'] + [f'arg{i}' for i in range(max_args)]
+        group.add(operation_row(item))
+    return group.finish()
+
+def build_grouped_rows(operations: Iterable[Dict[str, Any]], remove_duplicates: bool = False) -> Dict[str, RowGroup]:
+    """Build one RowGroup per operation name, consuming the operations once.
     
-    # Store rows for deduplication if needed
-    rows = []
-    seen_rows = set()
+    Args:
+        operations: Operations to convert (any iterable, e.g. a streaming reader)
+        remove_duplicates: If True, removes duplicate rows within each group
     
-    # Process each operation
+    Returns:
+        Dict mapping operation name to its RowGroup, in order of first appearance
+    """
+    groups = {}
     for item in operations:
-        operation_name = item.get('operation', 'unknown')
-        arguments = item.get('arguments', [])
-        
-        # Process each argument
-        row = [operation_name]
-        for i in range(max_args):
-            if i < len(arguments):
-                arg = arguments[i]
-                _, arg_value = extract_arg_info(arg)
-                
-                # Process the value based on its type
-                processed_value = process_arg_value(arg_value)
-                row.append(processed_value)
-            else:
-                # If we don't have this argument, add an empty cell
-                row.append('')
-        
-        # Convert row to tuple for hashability
-        row_tuple = tuple(row)
-        
-        # Add row if we're not removing duplicates or if it's a new unique row
-        if not remove_duplicates or row_tuple not in seen_rows:
-            rows.append(row)
-            seen_rows.add(row_tuple)
-    
-    # Write to CSV
+        row = operation_row(item)
+        group = groups.get(row[0])
+        if group is None:
+            group = groups[row[0]] = RowGroup(remove_duplicates)
+        group.add(row)
+    return groups
+
+def write_rows(header: List[str], rows: List[List[str]], output_file: str) -> None:
+    """Write a header and rows to a semicolon separated CSV file."""
     with open(output_file, 'w', newline='') as csvfile:
         writer = csv.writer(csvfile, delimiter=';')
         writer.writerow(header)
         writer.writerows(rows)
 
+def write_csv_file(operations: List[Dict[str, Any]], output_file: str, remove_duplicates: bool = False) -> None:
+    """Write operations to a CSV file.
+    
+    Args:
+        operations: List of operations to write
+        output_file: Path to the output CSV file
+        remove_duplicates: If True, removes duplicate lines from the output
+    """
+    header, rows = build_rows(operations, remove_duplicates)
+    write_rows(header, rows, output_file)
+
+def operation_file_name(operation_name: str) -> str:
+    """Sanitize an operation name for use as a file name (without extension)."""
+    return re.sub(r'[<>:"/\\|?*]', '_', operation_name)
+
 def json_to_csv(input_file: str, output_file: str, group_by_operation: bool = False, remove_duplicates: bool = False) -> None:
     """
     Convert the JSON file to CSV format.
@@ -195,30 +234,39 @@ def json_to_csv(input_file: str, output_file: str, group_by_operation: bool = Fa
         group_by_operation: If True, group operations by name and create separate files
         remove_duplicates: If True, removes duplicate lines from the output
     """
-    # Read JSON data
-    with open(input_file, 'r') as f:
-        data = json.load(f)
+    # Stream operations from the JSON file instead of loading it whole
+    with open(input_file, 'r', encoding='utf-8') as f:
+        operations_to_csv(iter_json_items(f), output_file, group_by_operation, remove_duplicates)
+
+def operations_to_csv(operations: Iterable[Dict[str, Any]], output_file: str, group_by_operation: bool = False, remove_duplicates: bool = False) -> None:
+    """
+    Convert a stream of processed operations to CSV format.
     
+    Args:
+        operations: Iterable of processed operations, consumed once
+        output_file: Path to the output CSV file (or directory if group_by_operation is True)
+        group_by_operation: If True, group operations by name and create separate files
+        remove_duplicates: If True, removes duplicate lines from the output
+    """
     if group_by_operation:
         # Create output directory if it doesn't exist
         output_dir = output_file.rstrip('/\\')
         os.makedirs(output_dir, exist_ok=True)
         
         # Group operations by name
-        grouped_operations = group_operations_by_name(data)
+        grouped_rows = build_grouped_rows(operations, remove_duplicates)
         
         # Write each group to a separate file
-        for operation_name, operations in grouped_operations.items():
+        for operation_name, group in grouped_rows.items():
             # Sanitize filename by replacing invalid characters
-            safe_name = re.sub(r'[<>:"/\\|?*]', '_', operation_name)
+            safe_name = operation_file_name(operation_name)
             group_file = os.path.join(output_dir, f"{safe_name}.csv")
             
-            print(f"Writing {len(operations)} operations to {group_file}")
-            write_csv_file(operations, group_file, remove_duplicates)
+            print(f"Writing {group.operation_count} operations to {group_file}")
+            write_rows(*group.finish(), group_file)
     else:
         # Write all operations to a single file
-        all_operations = data.get('content', [])
-        write_csv_file(all_operations, output_file, remove_duplicates)
+        write_csv_file(operations, output_file, remove_duplicates)
 
 def simplify_cpp_type(type_str: str) -> str:
     """
@@ -1,11 +1,4 @@
 import os
-import pandas as pd
-import numpy as np
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
 import pickle
 import argparse
 import time
@@ -14,12 +7,18 @@ from random import uniform
 # If modifying these scopes, delete the file token.pickle.
 SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
 
+# pandas, numpy and the Google client libraries are imported by the functions
+# that use them: together they take far longer to import than the rest of the
+# command, and the viewer imports this module to export an upload.
+
 # Rate limiting constants
 WRITES_PER_MINUTE_LIMIT = 60
 MIN_DELAY_BETWEEN_WRITES = 60.0 / WRITES_PER_MINUTE_LIMIT  # Minimum seconds between writes
 
 def sanitize_value(val):
     """Sanitize a value for Google Sheets API."""
+    import numpy as np
+    import pandas as pd
     if pd.isna(val) or (isinstance(val, float) and np.isnan(val)):
         return ""
     if isinstance(val, (float, np.float64, np.float32)):
@@ -40,6 +39,7 @@ def retry_with_backoff(func, max_retries=5, initial_delay=5):
         max_retries: Maximum number of retry attempts
         initial_delay: Initial delay in seconds
     """
+    from googleapiclient.errors import HttpError
     retries = 0
     delay = initial_delay
 
@@ -71,6 +71,8 @@ def rate_limited_operation(func):
 
 def get_google_sheets_credentials():
     """Gets valid user credentials from storage or initiates OAuth2 flow."""
+    from google_auth_oauthlib.flow import InstalledAppFlow
+    from google.auth.transport.requests import Request
     creds = None
     # The file token.pickle stores the user's access and refresh tokens
     if os.path.exists('token.pickle'):
@@ -136,6 +138,9 @@ def upload_csv_files(directory_path, spreadsheet_title):
     Uploads all CSV files from the specified directory to a new Google Spreadsheet.
     Each CSV file becomes a separate sheet/tab in the spreadsheet.
     """
+    import pandas as pd
+    from googleapiclient.discovery import build
+    from googleapiclient.errors import HttpError
     # Verify directory exists
     if not os.path.isdir(directory_path):
         raise ValueError(f"Directory not found: {directory_path}")